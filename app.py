@@ -1,14 +1,27 @@
 import streamlit as st
-import pandas as pd
 from src.projet_final_data_viz.description import describe_dataset
 from src.projet_final_data_viz.auth import auth_page
-from src.projet_final_data_viz.agents import initialize_claude_client, suggest_graphs
-from src.projet_final_data_viz.tapas_code import process_question
-from src.projet_final_data_viz.display import setup_page_config, user_graph_display, graph_display, display_suggestions
+from src.projet_final_data_viz.dataset_cache import content_hash, get_dataset_cache
+from src.projet_final_data_viz.profiler import profile_dataset
+from src.projet_final_data_viz.agents import initialize_claude_client, stream_suggestions, latency_caption
+from src.projet_final_data_viz.llm_cache import get_response_cache
+from src.projet_final_data_viz.code_executor import get_code_executor
+from src.projet_final_data_viz.tapas_code import answer_question, preload_tapas_model, tapas_registry
+from src.projet_final_data_viz.tapas_backends import DEFAULT_BACKEND
+from src.projet_final_data_viz.model_registry import FAILED
+from src.projet_final_data_viz.tapas_client import get_tapas_client
+from src.projet_final_data_viz.display import setup_page_config, user_graph_display, graph_display, display_suggestions, extract_graph_list
 
 def main():
     setup_page_config()
 
+    # Chargement du modèle TAPAS en arrière-plan, une seule fois par processus (sauf s'il est servi à part)
+    service_tapas = get_tapas_client()
+    if service_tapas is None:
+        preload_tapas_model(DEFAULT_BACKEND)
+    # Processus d'exécution du code Plotly démarrés (imports pandas / Plotly faits) avant le premier graphique
+    executeur = get_code_executor()
+
     # Vérifier si l'utilisateur est authentifié
     if 'authentication_status' not in st.session_state:
         st.session_state['authentication_status'] = False
@@ -30,21 +43,46 @@ def main():
         uploaded_file = st.file_uploader("📂 Télécharger un fichier CSV", type=["csv"])
 
     if uploaded_file:
-        file_id = uploaded_file.name  # Identifiant unique pour le fichier
+        # Identifiant du fichier : empreinte de son contenu, calculée une fois par téléversement
+        empreintes = st.session_state.setdefault('upload_hashes', {})
+        upload_id = getattr(uploaded_file, 'file_id', None) or uploaded_file.name
+        if upload_id not in empreintes:
+            empreintes[upload_id] = content_hash(uploaded_file)
+        file_id = empreintes[upload_id]
+        dataset_cache = get_dataset_cache()
 
         # Vérifier si le fichier a changé
         if 'uploaded_file_id' not in st.session_state or st.session_state.uploaded_file_id != file_id:
             st.session_state.uploaded_file_id = file_id  # Met à jour l'ID du fichier
-            st.session_state.df = pd.read_csv(uploaded_file)
-
-            # Réinitialiser les suggestions et la liste des graphes
+            barre_progression = st.progress(0.0, text="Lecture du fichier...")
+            _, entree = dataset_cache.load(
+                uploaded_file,
+                progress=lambda fraction: barre_progression.progress(fraction, text="Lecture du fichier..."),
+                key=file_id
+            )
+            barre_progression.empty()
+            # Bail sur le DataFrame partagé (projeté depuis le disque) ; l'ancien bail est rendu en le remplaçant
+            st.session_state.dataset_lease = dataset_cache.acquire(file_id, entree)
+            st.session_state.df = st.session_state.dataset_lease.df
+            st.session_state.ingestion_report = entree['report']
+            if entree['profile'] is None:
+                dataset_cache.update(file_id, profile=profile_dataset(entree['df']))
+
+            # Suggestions déjà obtenues pour ce contenu (éventuellement par une autre session)
             st.session_state.graph_list = None
-            st.session_state.suggestions = None
+            st.session_state.suggestions = entree['suggestions']
+
+        rapport = st.session_state.get('ingestion_report')
+        if rapport:
+            legende = f"Fichier lu en {rapport['parse_seconds']:.2f}s ({rapport['engine']})"
+            if 'memory_saved_mb' in rapport:
+                legende += (
+                    f" · mémoire {rapport['memory_before_mb']:.1f} → {rapport['memory_after_mb']:.1f} MB "
+                    f"({rapport['memory_saved_mb']:.1f} MB économisés)"
+                )
+            st.caption(legende)
 
         try:
-            if st.session_state.suggestions is None:
-                st.session_state.suggestions = suggest_graphs(st.session_state.df, client)
-
             tabs = st.tabs(["📈 Analyse du Jeu de Données", "🤖 Moteur de Requêtes TAPAS", "📊 Visualisation Avancée", "💡 Suggérer un Graphe"])
 
             with tabs[0]:
@@ -57,6 +95,7 @@ def main():
                 """
                 **📝 Remarque sur TAPAS :**  
                 - TAPAS fonctionne **beaucoup plus rapidement** et est **plus performant** sur des petits jeux de données.  
+                - Les questions citant une **valeur précise** (un nom, une ville…) sont plus rapides : seules les lignes qui la contiennent sont analysées.  
                 - Vous devez poser des questions claire et écrire le nom exact des colonnes.
                 - Il accepte les **questions uniquement en anglais**.  
                 """
@@ -77,14 +116,24 @@ def main():
                 query = st.text_input("Entrez votre requête de données :")
                 if query:
                     with st.spinner("Traitement de la requête..."):
-                        result = process_question(query, st.session_state.df)
+                        # Réponse partagée entre sessions et reruns tant que le fichier et la question sont les mêmes
+                        result = answer_question(query, st.session_state.df, file_id)
                         st.success(f"Résultat de la requête : {result}")
 
             with tabs[2]:
                 st.markdown("⚠️ En cas d'erreur, n'hésitez pas à recharger le graphique.")
                 if st.session_state.graph_list is None:
                     st.subheader("📌 Graphes Suggérés")
-                    st.session_state.graph_list = display_suggestions(st.session_state.suggestions)
+                    if st.session_state.suggestions is None:
+                        # Suggestions affichées au fil de l'eau, puis partagées via le cache de jeux de données
+                        metriques = {}
+                        texte = st.write_stream(stream_suggestions(st.session_state.df, client, metriques))
+                        st.caption(latency_caption(metriques))
+                        st.session_state.suggestions = [texte]
+                        dataset_cache.update(file_id, suggestions=st.session_state.suggestions)
+                        st.session_state.graph_list = extract_graph_list(st.session_state.suggestions)
+                    else:
+                        st.session_state.graph_list = display_suggestions(st.session_state.suggestions)
                     
                 graph_display(client, st.session_state.df)
 
@@ -98,6 +147,35 @@ def main():
     else:
         st.info("Veuillez télécharger un fichier CSV pour commencer l'analyse")
 
+    for model_status in tapas_registry.status():
+        memoire = f" · {model_status['memory_mb']:.0f} MB" if model_status['memory_mb'] is not None else ""
+        st.sidebar.caption(f"Modèle TAPAS ({model_status['key']}) : {model_status['state']}{memoire}")
+        if model_status['state'] == FAILED and st.sidebar.button("Réessayer le chargement", key=f"tapas-{model_status['key']}"):
+            tapas_registry.preload(model_status['key'], force=True)
+    if service_tapas is not None:
+        service = service_tapas.stats()
+        st.sidebar.caption(
+            "Service TAPAS : injoignable (inférence locale)" if service is None else
+            f"Service TAPAS : {service['questions']} questions, {service['chunks_per_batch']:.1f} chunks par lot, "
+            f"{service['queued']} en attente, {service['rejected']} refusées"
+        )
+    cache_claude = get_response_cache().stats()
+    st.sidebar.caption(
+        f"Cache Claude : {cache_claude['memory_hits'] + cache_claude['disk_hits']} réponses réutilisées, "
+        f"{cache_claude['coalesced']} partagées en cours d'appel, "
+        f"{cache_claude['misses']} appels ({cache_claude['hit_rate']:.0%} de réutilisation)"
+    )
+    jeux = get_dataset_cache().stats()
+    st.sidebar.caption(
+        f"Jeux de données : {jeux['leased'] + jeux['items']} en mémoire, {jeux['leased']} ouverts par "
+        f"{jeux['leases']} sessions, {jeux['heap_bytes'] / 1024**2:.0f} MB hors fichiers projetés"
+    )
+    execution = executeur.stats()
+    st.sidebar.caption(
+        f"Exécution du code : {execution['workers']} processus, {execution['runs']} graphiques, "
+        f"{execution['timeouts']} interrompus"
+    )
+
     if st.sidebar.button("Se Déconnecter"):
         st.session_state['authentication_status'] = False
         st.session_state['claude_api_key'] = None
@@ -0,0 +1,84 @@
+"""Benchmark : agrégations sur une grande table, chemin historique (fill_missing + boucle) vs moteur vectorisé.
+
+Usage : python benchmarks/bench_aggregation.py --rows 5000000 --repeat 3 --memory
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from projet_final_data_viz.aggregation import aggregate  # noqa: E402
+from projet_final_data_viz.tapas_code import fill_missing, process_aggregation  # noqa: E402
+
+
+def make_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    amount = rng.integers(10, 5000, rows).astype(np.float64)
+    amount[rng.random(rows) < 0.01] = np.nan
+    return pd.DataFrame({
+        'city': pd.Categorical(rng.choice(['Paris', 'London', 'Berlin', 'Madrid', 'Rome'], rows)),
+        'product': rng.choice(['laptop', 'phone', 'tablet', 'screen'], rows),
+        'amount': amount,
+        'units': rng.integers(1, 20, rows),
+    })
+
+
+def legacy_aggregation(df, operation, column, group_by=None):
+    """Chemin historique de process_question : copie fill_missing, conversion en place, formatage en boucle."""
+    df = fill_missing(df)
+    df[column] = pd.to_numeric(df[column], errors='coerce')
+    if group_by:
+        result = getattr(df.groupby(group_by, observed=False)[column], operation)()
+        lines = []
+        for group, value in result.items():
+            lines.append(f"{group}: ${value:,.2f}" if isinstance(value, float) else f"{group}: {value}")
+        return "\n".join(lines)
+    return str(getattr(df[column], operation)())
+
+
+def measure(label, fn, repeat, memory):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    peak = ""
+    if memory:
+        # tracemalloc ralentit fortement les colonnes objet : une seule exécution tracée, hors chronométrage
+        tracemalloc.start()
+        fn()
+        peak = f"{tracemalloc.get_traced_memory()[1] / 1024**2:10.1f} MB"
+        tracemalloc.stop()
+    print(f"{label:<44} {elapsed * 1000:10.1f} ms {peak}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--memory', action='store_true', help="mesure aussi le pic d'allocations (tracemalloc)")
+    args = parser.parse_args()
+
+    df = make_table(args.rows)
+    print(f"{args.rows} lignes, {df.memory_usage(deep=True).sum() / 1024**2:.0f} MB")
+    print(f"{'cas':<44} {'durée':>13} {'pic mémoire' if args.memory else '':>13}")
+    cases = [
+        ("historique : mean of amount by city", lambda: legacy_aggregation(df, 'mean', 'amount', 'city')),
+        ("moteur : mean of amount by city", lambda: process_aggregation(df, 'mean', 'amount', 'city')),
+        ("historique : sum of amount", lambda: legacy_aggregation(df, 'sum', 'amount')),
+        ("moteur : sum of amount", lambda: process_aggregation(df, 'sum', 'amount')),
+        ("historique : 3 agrégations par city, product",
+         lambda: [legacy_aggregation(df, op, 'amount', ['city', 'product']) for op in ('sum', 'mean', 'max')]),
+        ("moteur : 3 agrégations par city, product",
+         lambda: aggregate(df, [('sum', 'amount'), ('mean', 'amount'), ('max', 'units')], ['city', 'product'])),
+    ]
+    for label, fn in cases:
+        measure(label, fn, args.repeat, args.memory)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark : questions compilées par le planificateur pandas (taux de prise en charge et latence).
+
+Les questions sans plan partent vers TAPAS (non mesuré ici, voir bench_tapas_batching.py).
+Usage : python benchmarks/bench_query_planner.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from projet_final_data_viz.query_planner import execute_plan, plan_question  # noqa: E402
+
+QUESTIONS = [
+    "What is the sum of amount?",
+    "total amount in Paris",
+    "average amount by city and product",
+    "how many distinct customers",
+    "top 3 city by total amount",
+    "top 5 rows by amount",
+    "which product has the highest average amount",
+    "how many orders in 2021",
+    "sum of amount where amount > 4000 in berlin",
+    "mean amount between 2021-03-01 and 2021-03-31",
+    "number of orders per city",
+    "list products in rome",
+    "which customer bought a laptop twice?",
+    "what is the amount of order 1234?",
+]
+
+
+def make_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'order_date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 3 * 365 * 24, rows), unit='h'),
+        'city': rng.choice(['Paris', 'London', 'Berlin', 'Madrid', 'Rome'], rows),
+        'product': rng.choice(['laptop', 'phone', 'tablet', 'screen'], rows),
+        'customer': [f"client-{i % 50000}" for i in range(rows)],
+        'amount': rng.integers(10, 5000, rows),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_table(args.rows)
+    start = time.perf_counter()
+    plan_question(QUESTIONS[0], df)
+    print(f"{args.rows} lignes · index des colonnes et des valeurs : {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"{'question':<50} {'plan':>14} {'analyse':>10} {'exécution':>11}")
+    planned = 0
+    for question in QUESTIONS:
+        start = time.perf_counter()
+        plan = plan_question(question, df)
+        parse = time.perf_counter() - start
+        if plan is None:
+            print(f"{question:<50} {'TAPAS':>14} {parse * 1000:8.2f}ms {'-':>11}")
+            continue
+        planned += 1
+        start = time.perf_counter()
+        execute_plan(plan, df)
+        run = time.perf_counter() - start
+        print(f"{question:<50} {plan['kind']:>14} {parse * 1000:8.2f}ms {run * 1000:9.1f}ms")
+    print(f"Questions prises en charge par le planificateur : {planned}/{len(QUESTIONS)}")
+
+
+if __name__ == '__main__':
+    main()
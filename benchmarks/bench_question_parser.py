@@ -0,0 +1,82 @@
+"""Benchmark : détection du type de question sur des tables larges, scan historique vs index de colonnes.
+
+Usage : python benchmarks/bench_question_parser.py --columns 50 500 2000 --repeat 200
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from projet_final_data_viz.question_parser import ColumnIndex  # noqa: E402
+
+QUESTIONS = [
+    "What is the average of amount_40 by city_1?",
+    "What is the total amount_48?",
+    "Show all city_1 values",
+    "What is the mean of amout_44 by citty_45?",
+    "Which product sold the most in Paris?",
+]
+
+
+def legacy_detect(question, df):
+    """detect_question_type historique : regex reconstruites et scan des colonnes à chaque question."""
+    question_lower = question.lower()
+    group_match = re.search(r'(average|mean|sum|count|min|max) of (\w+) by (\w+)', question_lower)
+    if group_match:
+        operation, measure_col, group_col = group_match.groups()
+        measure_col = next((c for c in df.columns if c.lower().replace('_', '') in measure_col.replace('_', '')), None)
+        group_col = next((c for c in df.columns if c.lower().replace('_', '') in group_col.replace('_', '')), None)
+        if measure_col and group_col:
+            return 'group_aggregation', {'operation': operation, 'column': measure_col, 'group_by': group_col}
+    patterns = {'sum': r'sum of|total|sum', 'mean': r'average|mean|avg', 'count': r'count|how many|number of',
+                'min': r'minimum|min|lowest', 'max': r'maximum|max|highest'}
+    for operation, pattern in patterns.items():
+        if re.search(pattern, question_lower):
+            for col in df.columns:
+                if col.lower() in question_lower:
+                    return 'aggregation', {'operation': operation, 'column': col}
+    list_keywords = ['show', 'show all' 'list', 'what are', 'display', 'give me', 'what is in']
+    for col in df.columns:
+        if col.lower() in question_lower and any(kw in question_lower for kw in list_keywords):
+            return 'column', col
+    return 'default', None
+
+
+def make_columns(columns):
+    kinds = ['amount', 'city', 'product', 'ratio']
+    return [f"{kinds[i % 4]}_{i}" for i in range(columns)]
+
+
+def timed(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<34} {elapsed * 1e6:10.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--columns', type=int, nargs='+', default=[50, 500, 2000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    for columns in args.columns:
+        df = pd.DataFrame(columns=make_columns(columns))
+        index = ColumnIndex(df.columns)
+        print(f"--- {columns} colonnes ({len(QUESTIONS)} questions par itération)")
+        for question in QUESTIONS:
+            print(f"    {question!r}: historique {legacy_detect(question, df)} / index {index.parse(question)}")
+        timed("historique", lambda: [legacy_detect(q, df) for q in QUESTIONS], args.repeat)
+        timed("construction de l'index", lambda: ColumnIndex(df.columns), max(args.repeat // 10, 1))
+        timed("index, analyse sans cache", lambda: [index._parse(q.lower()) for q in QUESTIONS], args.repeat)
+        timed("index, analyse en cache", lambda: [index.parse(q) for q in QUESTIONS], args.repeat)
+
+
+if __name__ == '__main__':
+    main()
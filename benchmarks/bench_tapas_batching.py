@@ -0,0 +1,84 @@
+"""Benchmark : débit (lignes/s) de l'inférence TAPAS en boucle chunk par chunk vs par mini-lots.
+
+Usage : python benchmarks/bench_tapas_batching.py --rows 2000 --batch-sizes 4 8 16 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from projet_final_data_viz.tapas_code import (  # noqa: E402
+    load_tapas_model, split_dataframe, predict_answer_coordinates, parallel_chunk_answers
+)
+
+
+def make_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'city': rng.choice(['Paris', 'London', 'Berlin', 'Madrid', 'Rome'], rows),
+        'product': rng.choice(['laptop', 'phone', 'tablet', 'screen'], rows),
+        'amount': rng.integers(10, 5000, rows),
+    })
+
+
+def legacy_loop(tokenizer, model, chunks, question):
+    """Boucle historique de process_question : un tokenizer + un forward par chunk."""
+    coordinates = []
+    for chunk in chunks:
+        inputs = tokenizer(table=chunk, queries=[question], padding='max_length', return_tensors="pt", truncation=True)
+        outputs = model(**inputs)
+        predicted, _ = tokenizer.convert_logits_to_predictions(
+            inputs, outputs.logits.detach(), outputs.logits_aggregation.detach()
+        )
+        coordinates.extend(predicted)
+    return coordinates
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {elapsed:8.2f}s  {rows / elapsed:10.1f} rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--max-rows', type=int, default=50)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[4, 8, 16])
+    parser.add_argument('--workers', type=int, nargs='*', default=[], help="tailles de pool de processus à mesurer")
+    parser.add_argument('--question', default="Which city has the highest amount?")
+    args = parser.parse_args()
+
+    tokenizer, model = load_tapas_model()
+    chunks = [chunk.astype(str) for chunk in split_dataframe(make_table(args.rows), args.max_rows)]
+    print(f"{args.rows} rows, {len(chunks)} chunks of {args.max_rows} rows, torch threads={torch.get_num_threads()}")
+
+    reference = timed("legacy loop", args.rows, lambda: legacy_loop(tokenizer, model, chunks, args.question))
+    for batch_size in args.batch_sizes:
+        result = timed(
+            f"batched (bs={batch_size})", args.rows,
+            lambda: predict_answer_coordinates(tokenizer, model, chunks, args.question, batch_size=batch_size)
+        )
+        if result != reference:
+            print("  ⚠️ coordinates differ from the legacy loop")
+
+    df_str = make_table(args.rows).astype(str)
+    for workers in args.workers:
+        # Premier appel : démarrage du pool et chargement des poids dans chaque processus
+        parallel_chunk_answers(df_str.head(args.max_rows), args.question, workers, args.max_rows)
+        timed(
+            f"pool (workers={workers})", args.rows,
+            lambda: parallel_chunk_answers(df_str, args.question, workers, args.max_rows, args.batch_sizes[0])
+        )
+
+
+if __name__ == "__main__":
+    main()
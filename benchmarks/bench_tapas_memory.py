@@ -0,0 +1,85 @@
+"""Benchmark : préparation des tables TAPAS, conversion complète en texte (historique) vs chunks à la demande.
+
+Le modèle n'est pas chargé : chaque chunk reçoit trois coordonnées de réponse factices, lues
+avec get_cell_value (historique) ou coordinate_answers (vectorisé).
+
+Usage : python benchmarks/bench_tapas_memory.py --rows 1000000 --columns 50
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from projet_final_data_viz.tapas_code import (  # noqa: E402
+    DEFAULT_BATCH_SIZE, coordinate_answers, fill_missing, get_cell_value, iter_string_chunks, split_dataframe
+)
+
+COORDINATES = [(0, 0), (1, 1), (2, 2)]
+
+
+def make_table(rows, columns, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        values = rng.random(rows) * 1000
+        values[rng.random(rows) < 0.01] = np.nan
+        data[f"x{i}"] = values
+    return pd.DataFrame(data)
+
+
+def legacy_answers(df, max_rows, batch_size):
+    """Chemin historique de process_question : copie fill_missing, tous les chunks en texte, lecture cellule par cellule."""
+    chunks = [chunk.astype(str) for chunk in split_dataframe(fill_missing(df), max_rows)]
+    return [[get_cell_value(chunk, coord) for coord in COORDINATES] for chunk in chunks]
+
+
+def lazy_answers(df, max_rows, batch_size):
+    """Nouveau chemin : un lot de chunks converti à la fois, réponses lues d'un seul take."""
+    chunks = iter_string_chunks(df, max_rows, window=batch_size)
+    results = []
+    for batch in iter(lambda: list(islice(chunks, batch_size)), []):
+        results.extend(coordinate_answers(chunk, COORDINATES) for chunk in batch)
+    return results
+
+
+def measure(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    # Une exécution tracée à part : tracemalloc ralentit fortement la création des chaînes
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    print(f"{label:<44} {elapsed:9.2f} s {peak:11.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--columns', type=int, default=50)
+    parser.add_argument('--max-rows', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--skip-legacy', action='store_true', help="le chemin historique demande ~6 GB pour 1M x 50")
+    args = parser.parse_args()
+
+    df = make_table(args.rows, args.columns)
+    print(f"{args.rows} lignes x {args.columns} colonnes, {df.memory_usage(deep=True).sum() / 1024**2:.0f} MB")
+    print(f"{'cas':<44} {'durée':>11} {'pic mémoire':>14}")
+    if not args.skip_legacy:
+        measure("historique : fill_missing + astype(str)",
+                lambda: legacy_answers(df, args.max_rows, args.batch_size), args.repeat)
+    measure("à la demande : iter_string_chunks", lambda: lazy_answers(df, args.max_rows, args.batch_size), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark : tokens d'entrée estimés des prompts Claude, avant et après le constructeur budgété.
+
+Usage : python benchmarks/prompt_tokens.py --rows 5000 --columns 10 50 200 --budget 800
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from projet_final_data_viz.agents import df_summary  # noqa: E402
+from projet_final_data_viz.prompts import (  # noqa: E402
+    PLOTLY_RULES, estimate_tokens, plotly_code_request, prompt_tokens, suggest_graphs_request
+)
+
+
+def make_table(rows, columns, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        kind = i % 4
+        if kind == 0:
+            data[f'amount_{i}'] = rng.integers(10, 5000, rows)
+        elif kind == 1:
+            data[f'ratio_{i}'] = rng.random(rows)
+        elif kind == 2:
+            data[f'city_{i}'] = rng.choice(['Paris', 'London', 'Berlin', 'Madrid', 'Rome'], rows)
+        else:
+            data[f'label_{i}'] = [f"item-{i}-{j}" for j in range(rows)]
+    return pd.DataFrame(data)
+
+
+def legacy_suggest_prompt(df):
+    """Prompt de suggestions tel qu'il était construit avant le constructeur budgété."""
+    return f"""
+    Tu es un expert en visualisation de données. Voici un échantillon de mon jeu de données :
+    {df.head(5).to_string()}
+    Voici un résumé des colonnes : {df_summary(df).to_string()}
+
+    Propose 5 types de graphiques intéressants à générer en utilisant Plotly en fonction des colonnes disponibles dans {df}.
+    Les propositions doivent être sous forme de liste numérotée et ne pas utiliser de pie charts.
+    Elles doivent être compréhensibles pour des personnes non expertes.
+    """
+
+
+def legacy_plotly_prompt(df, chart_type):
+    """Prompt de code Plotly tel qu'il était construit avant le constructeur budgété."""
+    return f"""
+    Voici un échantillon de mon dataset :
+    {df.head(5).to_string()}
+    Voici un résumé des colonnes : {df_summary(df).to_string()}
+    {PLOTLY_RULES}
+    Tu dois me donner un code Python représentant un graphique avec Plotly correspondant à "{chart_type}" sans aucune explication.
+    """
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--columns', type=int, nargs='+', default=[10, 50, 200])
+    args = parser.parse_args()
+
+    print(f"{'colonnes':>9} {'appel':>12} {'avant':>8} {'après':>8} {'réduction':>10} {'préfixe en cache':>17}")
+    for columns in args.columns:
+        df = make_table(args.rows, columns)
+        for name, legacy, params in [
+            ('suggestions', legacy_suggest_prompt(df), suggest_graphs_request(df)),
+            ('code Plotly', legacy_plotly_prompt(df, "Bar chart"), plotly_code_request(df, "Bar chart")),
+        ]:
+            before, after = estimate_tokens(legacy), prompt_tokens(params)
+            # Préfixe réellement mis en cache : seulement s'il porte un point de cache (seuil d'Anthropic atteint)
+            marked = any('cache_control' in block for block in params['system'])
+            cached = sum(estimate_tokens(block['text']) for block in params['system']) if marked else 0
+            print(f"{columns:>9} {name:>12} {before:>8} {after:>8} {1 - after / before:>9.0%} {cached:>17}")
+
+
+if __name__ == '__main__':
+    main()
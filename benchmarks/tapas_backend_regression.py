@@ -0,0 +1,75 @@
+"""Régression des backends TAPAS : mêmes coordonnées de réponse que PyTorch fp32, latence par chunk et taille des poids.
+
+Usage : python benchmarks/tapas_backend_regression.py --backends pytorch int8 onnx
+Le script retourne un code de sortie non nul si un backend diverge de la référence fp32.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from projet_final_data_viz.model_registry import model_memory_bytes  # noqa: E402
+from projet_final_data_viz.tapas_backends import BACKENDS  # noqa: E402
+from projet_final_data_viz.tapas_code import load_tapas_weights, predict_answer_coordinates  # noqa: E402
+
+REGRESSION_SET = [
+    (
+        pd.DataFrame({
+            'Actor': ['Brad Pitt', 'Leonardo Di Caprio', 'George Clooney'],
+            'Number of movies': ['87', '53', '69'],
+            'Date of birth': ['18 december 1963', '11 november 1974', '6 may 1961'],
+        }),
+        ["How many movies has George Clooney played in?", "Who was born in 1974?", "What is the date of birth of Brad Pitt?"],
+    ),
+    (
+        pd.DataFrame({
+            'City': ['Paris', 'London', 'Berlin', 'Madrid'],
+            'Country': ['France', 'United Kingdom', 'Germany', 'Spain'],
+            'Population': ['2161000', '8982000', '3645000', '3223000'],
+        }),
+        ["Which city is in Germany?", "What is the population of Madrid?", "Which country is London in?"],
+    ),
+]
+
+
+def run(tokenizer, model):
+    coordinates, elapsed, calls = [], 0.0, 0
+    for table, questions in REGRESSION_SET:
+        for question in questions:
+            start = time.perf_counter()
+            coordinates.append(predict_answer_coordinates(tokenizer, model, [table], question, batch_size=1)[0])
+            elapsed += time.perf_counter() - start
+            calls += 1
+    return coordinates, elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    args = parser.parse_args()
+
+    tokenizer, reference_model = load_tapas_weights('pytorch')
+    reference, _ = run(tokenizer, reference_model)
+    del reference_model
+
+    failures = 0
+    for backend in args.backends:
+        _, model = load_tapas_weights(backend)
+        run(tokenizer, model)  # échauffement
+        coordinates, latency = run(tokenizer, model)
+        status = "OK" if coordinates == reference else "MISMATCH"
+        failures += status != "OK"
+        print(f"{backend:<8} {latency * 1000:8.1f} ms/chunk  {model_memory_bytes(model) / 1024**2:8.1f} MB weights  {status}")
+        if status != "OK":
+            for expected, got in zip(reference, coordinates):
+                if expected != got:
+                    print(f"    expected {expected}, got {got}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import pandas as pd
+from .cache import FrameMemo
+
+# Opérations reconnues dans les questions et fonction pandas correspondante
+OPERATIONS = {'sum': 'sum', 'mean': 'mean', 'average': 'mean', 'count': 'count', 'min': 'min', 'max': 'max'}
+MONEY_HINTS = ('price', 'amount')
+
+_numeric_columns = FrameMemo()
+
+
+def numeric_column(df, column):
+    """Numeric view of ``df[column]`` (non numeric values become NaN), computed once per DataFrame and column.
+
+    Numeric columns are returned as is: neither ``df`` nor its arrays are copied or modified.
+    """
+    def coerce():
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            return values
+        return pd.to_numeric(values, errors='coerce')
+
+    return _numeric_columns.get(df, ('numeric', column), coerce)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def aggregation_label(operation, column):
+    return f"{operation} of {column}"
+
+
+def aggregate(df, aggregations, group_by=None):
+    """Compute ``[(operation, column), ...]`` over ``df``, grouped by one or several columns.
+
+    All aggregations share a single groupby pass. Returns a DataFrame indexed by the group
+    keys (one column per aggregation), or a Series of scalars without ``group_by``.
+    """
+    aggregations = [(operation, column) for operation, column in aggregations]
+    for operation, _ in aggregations:
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown aggregation: {operation}")
+    columns = list(dict.fromkeys(column for _, column in aggregations))
+    # concat(copy=False) : chaque colonne reste un bloc distinct, sans consolidation ni copie
+    measures = pd.concat([numeric_column(df, column) for column in columns], axis=1, keys=columns, copy=False)
+    keys = _as_list(group_by)
+
+    if not keys:
+        return pd.Series(
+            {aggregation_label(operation, column): getattr(measures[column], OPERATIONS[operation])()
+             for operation, column in aggregations},
+            dtype=object
+        )
+
+    named = {
+        aggregation_label(operation, column): (column, OPERATIONS[operation])
+        for operation, column in aggregations
+    }
+    grouped = measures.groupby([df[key] for key in keys], observed=True, sort=True)
+    return grouped.agg(**named)
+
+
+def format_values(values, column):
+    """Format a result column at once: decimals (and currency) for floats, plain text otherwise."""
+    if pd.api.types.is_float_dtype(values):
+        pattern = "${:,.2f}" if any(hint in column.lower() for hint in MONEY_HINTS) else "{:,.2f}"
+        return values.map(pattern.format)
+    return values.astype(str)
+
+
+def format_grouped(result, aggregations):
+    """One ``group: value`` line per group; several aggregations are separated by `` · ``."""
+    index = result.index
+    if isinstance(index, pd.MultiIndex):
+        groups = pd.Series(index.get_level_values(0).astype(str), index=index)
+        for level in range(1, index.nlevels):
+            groups = groups + " / " + index.get_level_values(level).astype(str)
+    else:
+        groups = pd.Series(index.astype(str), index=index)
+
+    lines = None
+    for operation, column in aggregations:
+        label = aggregation_label(operation, column)
+        values = format_values(result[label], column)
+        if len(aggregations) > 1:
+            values = f"{label} " + values
+        lines = values if lines is None else lines + " · " + values
+    return "\n".join(groups + ": " + lines)
+
+
+def format_scalar(df, operation, column, value):
+    """Format an ungrouped result the way the aggregation answers have always been displayed."""
+    if operation == 'sum':
+        return f"${value:,.2f}" if any(hint in column.lower() for hint in MONEY_HINTS) else f"{value:,.0f}"
+    if OPERATIONS[operation] == 'mean':
+        return f"{value:.2f}"
+    if operation == 'count':
+        return str(len(df))
+    return str(value)
+
+
+def answer_aggregation(df, aggregations, group_by=None):
+    """Text answer for ``aggregate(df, aggregations, group_by)``, formatted like the legacy answers."""
+    result = aggregate(df, aggregations, group_by)
+    if group_by:
+        return format_grouped(result, aggregations)
+    return "\n".join(
+        format_scalar(df, operation, column, value) if len(aggregations) == 1 else
+        f"{label}: {format_scalar(df, operation, column, value)}"
+        for (operation, column), (label, value) in zip(aggregations, result.items())
+    )
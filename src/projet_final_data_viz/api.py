@@ -1,14 +1,147 @@
+import datetime
+import email.utils
+import logging
 import os
+import random
+import threading
+import time
 import requests
+import streamlit as st
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
+CLAUDE_API_URL = os.getenv("CLAUDE_API_URL", "https://api.anthropic.com")
+# Délais (secondes) d'établissement de connexion et de lecture de la réponse
+CLAUDE_CONNECT_TIMEOUT = float(os.getenv("CLAUDE_CONNECT_TIMEOUT", "5"))
+CLAUDE_READ_TIMEOUT = float(os.getenv("CLAUDE_READ_TIMEOUT", "60"))
+# Nouvelles tentatives sur 429 / 5xx / erreurs réseau, avec attente exponentielle plafonnée
+CLAUDE_MAX_RETRIES = int(os.getenv("CLAUDE_MAX_RETRIES", "4"))
+CLAUDE_BACKOFF_SECONDS = float(os.getenv("CLAUDE_BACKOFF_SECONDS", "0.5"))
+CLAUDE_MAX_BACKOFF_SECONDS = 30.0
+# Débit maximal de requêtes pour tout le processus (seau à jetons) et rafale autorisée
+CLAUDE_RATE_LIMIT = float(os.getenv("CLAUDE_RATE_LIMIT", "5"))
+CLAUDE_RATE_BURST = int(os.getenv("CLAUDE_RATE_BURST", "10"))
+HTTP_POOL_SIZE = 16
+RETRY_STATUSES = frozenset([408, 429, 500, 502, 503, 504, 529])
+
+
+class TokenBucket:
+    """Limiteur de débit thread-safe : ``rate`` jetons par seconde, au plus ``capacity`` en réserve."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Prend un jeton, en attendant qu'il soit disponible ; retourne la durée d'attente."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # Jeton réservé : les appelants suivants attendent derrière celui-ci
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+def retry_after_seconds(response):
+    """Délai demandé par l'en-tête ``Retry-After`` (secondes ou date HTTP), ou None s'il est absent ou illisible."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # En-tête malformé (ex. envoyé par un proxy) : le backoff exponentiel s'applique
+        return None
+    if date is None:
+        return None
+    if date.tzinfo is None:
+        # Les dates HTTP sont en GMT : une date sans fuseau n'est pas l'heure locale
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return max(date.timestamp() - time.time(), 0.0)
+
+
+class ClaudeTransport:
+    """Transport HTTP partagé : connexions gardées ouvertes, délais, nouvelles tentatives et limite de débit.
+
+    Les réponses 429 / 5xx et les erreurs réseau sont retentées jusqu'à ``max_retries`` fois,
+    après le délai ``Retry-After`` s'il est fourni, sinon une attente exponentielle avec gigue.
+    """
+
+    def __init__(self, base_url=CLAUDE_API_URL, api_key=CLAUDE_API_KEY, timeout=(CLAUDE_CONNECT_TIMEOUT, CLAUDE_READ_TIMEOUT),
+                 max_retries=CLAUDE_MAX_RETRIES, backoff=CLAUDE_BACKOFF_SECONDS, limiter=None, sleep=time.sleep):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = limiter or TokenBucket(CLAUDE_RATE_LIMIT, CLAUDE_RATE_BURST)
+        self._sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"content-type": "application/json", "anthropic-version": "2023-06-01"})
+        if api_key:
+            self.session.headers["x-api-key"] = api_key
+        self.retries = 0
+
+    def _delay(self, attempt, response=None):
+        delay = retry_after_seconds(response) if response is not None else None
+        if delay is None:
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+        return min(delay, CLAUDE_MAX_BACKOFF_SECONDS)
+
+    def post(self, path, payload):
+        """POST JSON sur ``path`` ; retourne la dernière réponse, ou relève la dernière erreur réseau."""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._delay(attempt)
+                logger.warning("Claude request failed (%s), retrying in %.1fs", e, delay)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                delay = self._delay(attempt, response)
+                logger.warning("Claude API returned %s, retrying in %.1fs", response.status_code, delay)
+                response.close()
+            self.retries += 1
+            self._sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+
+@st.cache_resource
+def get_transport():
+    """Transport unique du processus : pool de connexions et limite de débit partagés par tous les appelants."""
+    return ClaudeTransport()
+
 
-def ask_claude(prompt):
-    url = "https://api.anthropic.com/v1/complete"
-    headers = {"x-api-key": CLAUDE_API_KEY, "Content-Type": "application/json"}
+def ask_claude(prompt, transport=None):
+    transport = transport or get_transport()
     data = {"model": "claude-2", "prompt": prompt, "max_tokens": 200}
-    
-    response = requests.post(url, headers=headers, json=data)
-    return response.json().get("completion", "Erreur API")
+    try:
+        response = transport.post("/v1/complete", data)
+        return response.json().get("completion", "Erreur API")
+    except (requests.RequestException, ValueError):
+        return "Erreur API"
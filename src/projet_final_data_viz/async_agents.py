@@ -0,0 +1,74 @@
+import asyncio
+import os
+import time
+import anthropic
+from .agents import interpretation_prompt
+from .llm_cache import get_response_cache
+from .prompts import message_params, plotly_code_request
+
+# Nombre maximal de requêtes simultanées vers l'API Claude
+MAX_CONCURRENT_REQUESTS = int(os.getenv("CLAUDE_MAX_CONCURRENCY", "4"))
+
+
+async def agenerate_plotly_code(df, chart_type, client, limiter=None):
+    """Version asynchrone de ``agents.generate_plotly_code``."""
+    response = await get_response_cache().acreate(client, limiter, **plotly_code_request(df, chart_type))
+    raw_code = response.content[0].text if response and isinstance(response.content, list) else ""
+    return f"[{raw_code}]"
+
+
+async def ainterpret_fig(fig, client, limiter=None):
+    """Version asynchrone de ``agents.interpret_fig``."""
+    try:
+        response = await get_response_cache().acreate(client, limiter, **message_params(interpretation_prompt(fig)))
+        return response.content[0].text if response and isinstance(response.content, list) else "Erreur d'interprétation."
+    except Exception as e:
+        return f"Erreur lors du traitement : {e}"
+
+
+async def chart_pipeline(df, chart_type, client, execute, limiter=None):
+    """Génère le code d'un graphique, l'exécute puis demande aussitôt son interprétation.
+
+    ``execute(code, df)`` retourne la figure ; il tourne dans un thread pour ne pas bloquer
+    les requêtes des autres graphiques. Retourne un dict ``chart_type, code, fig,
+    interpretation, error, seconds``. Un code qui ne produit pas de figure est retiré du cache
+    des réponses : le graphique suivant redemande du code à Claude.
+    """
+    start = time.perf_counter()
+    result = {'chart_type': chart_type, 'code': "", 'fig': None, 'interpretation': None, 'error': None}
+    try:
+        result['code'] = (await agenerate_plotly_code(df, chart_type, client, limiter)).strip().strip('[]')
+        if not result['code']:
+            result['error'] = "Aucun code valide retourné par Claude."
+        else:
+            result['fig'] = await asyncio.to_thread(execute, result['code'], df)
+            if result['fig'] is None:
+                result['error'] = "'fig' n'a pas été généré."
+                get_response_cache().discard(plotly_code_request(df, chart_type))
+            else:
+                result['interpretation'] = await ainterpret_fig(result['fig'], client, limiter)
+    except SyntaxError as e:
+        result['error'] = f"Erreur de syntaxe dans le code généré : {e}"
+        get_response_cache().discard(plotly_code_request(df, chart_type))
+    except Exception as e:
+        result['error'] = f"Erreur lors de l'exécution du code : {e}"
+        if result['code']:
+            get_response_cache().discard(plotly_code_request(df, chart_type))
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+async def agenerate_all_charts(df, chart_types, client, execute, max_concurrency=MAX_CONCURRENT_REQUESTS):
+    """Lance en parallèle le pipeline de chaque graphique (au plus ``max_concurrency`` requêtes à la fois)."""
+    limiter = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*(chart_pipeline(df, chart_type, client, execute, limiter) for chart_type in chart_types))
+
+
+def generate_all_charts(df, chart_types, api_key, execute, max_concurrency=MAX_CONCURRENT_REQUESTS,
+                        client_factory=anthropic.AsyncAnthropic):
+    """Point d'entrée synchrone pour Streamlit : le client asynchrone vit le temps de sa boucle d'événements."""
+    async def run():
+        async with client_factory(api_key=api_key) as client:
+            return await agenerate_all_charts(df, chart_types, client, execute, max_concurrency)
+
+    return asyncio.run(run())
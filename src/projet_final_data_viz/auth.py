@@ -1,6 +1,5 @@
 # auth.py
 import streamlit as st
-from transformers import TapasTokenizer, TapasForQuestionAnswering
 
 
 def auth_page():
@@ -13,17 +12,13 @@ def auth_page():
     if not st.session_state['authentication_status']:
         cle_api = st.text_input("Entrez votre clé API Claude :", type="password")
         if st.button("Soumettre"):
+            cle_api = cle_api.strip() if cle_api else ""
             if cle_api:
+                # Le modèle TAPAS est chargé une seule fois par processus (voir tapas_code.tapas_registry)
                 st.session_state['claude_api_key'] = cle_api
-                try:
-                    # Charger le modèle TAPAS
-                    st.session_state['tapas_tokenizer'] = TapasTokenizer.from_pretrained('google/tapas-base-finetuned-wtq')
-                    st.session_state['tapas_model'] = TapasForQuestionAnswering.from_pretrained('google/tapas-base-finetuned-wtq')
-                    st.session_state['authentication_status'] = True
-                    st.success("✅ Authentification réussie !")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Erreur lors du chargement du modèle TAPAS : {e}")
+                st.session_state['authentication_status'] = True
+                st.success("✅ Authentification réussie !")
+                st.rerun()
             else:
                 st.error("Veuillez entrer votre clé API.")
 
@@ -0,0 +1,131 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class FrameMemo:
+    """Mémoïse des valeurs calculées à partir d'un DataFrame, tant que cet objet DataFrame est vivant.
+
+    Les DataFrames ne sont pas hashables : les entrées sont indexées par ``id(df)`` et
+    libérées par un ``weakref`` lorsque le DataFrame est détruit.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _values(self, df):
+        frame_id = id(df)
+        entry = self._entries.get(frame_id)
+        if entry is None or entry[0]() is not df:
+            def _release(ref, frame_id=frame_id):
+                with self._lock:
+                    current = self._entries.get(frame_id)
+                    if current is not None and current[0] is ref:
+                        del self._entries[frame_id]
+
+            entry = (weakref.ref(df, _release), {})
+            self._entries[frame_id] = entry
+        return entry[1]
+
+    def get(self, df, key, compute):
+        """Retourne la valeur mémoïsée pour (df, key), en la calculant avec ``compute()`` si besoin."""
+        with self._lock:
+            values = self._values(df)
+            if key in values:
+                return values[key]
+        value = compute()
+        with self._lock:
+            return values.setdefault(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LRUCache:
+    """Cache LRU thread-safe, borné en nombre d'entrées et/ou en taille totale.
+
+    ``sizeof(value)`` donne la taille d'une entrée (en octets) lorsque ``max_bytes`` est fixé ;
+    ``on_evict(key, value)`` est appelé pour chaque entrée évincée.
+    """
+
+    def __init__(self, max_items=None, max_bytes=None, sizeof=None, on_evict=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._on_evict = on_evict
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Plus grand que tout le budget : on ne le garde pas
+                evicted.append((key, value))
+            else:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self._entries and (
+                    (self.max_items is not None and len(self._entries) > self.max_items)
+                    or (self.max_bytes is not None and self.bytes > self.max_bytes)
+                ):
+                    old_key, (old_value, old_size) = self._entries.popitem(last=False)
+                    self.bytes -= old_size
+                    evicted.append((old_key, old_value))
+            self.evictions += len(evicted)
+        if self._on_evict:
+            for old_key, old_value in evicted:
+                self._on_evict(old_key, old_value)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value, size = self._entries.pop(key)
+            self.bytes -= size
+            return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def items(self):
+        """Copie des paires ``(clé, valeur)``, de la moins à la plus récemment utilisée."""
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._entries), 'bytes': self.bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            }
@@ -0,0 +1,314 @@
+import atexit
+import base64
+import builtins
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import pyarrow as pa
+import streamlit as st
+from .cache import FrameMemo, LRUCache
+
+# Processus d'exécution du code généré (0 = exécution dans le processus Streamlit)
+CODE_EXEC_WORKERS = int(os.getenv("CODE_EXEC_WORKERS", "2"))
+# Limites par exécution : durée (secondes) et mémoire privée d'un processus (MB)
+CODE_EXEC_TIMEOUT = float(os.getenv("CODE_EXEC_TIMEOUT", "30"))
+CODE_EXEC_MEMORY_MB = int(os.getenv("CODE_EXEC_MEMORY_MB", "2048"))
+# Mémoire partagée occupée par les jeux de données transmis aux processus
+CODE_EXEC_SHARED_MB = int(os.getenv("CODE_EXEC_SHARED_MB", "2048"))
+STARTUP_TIMEOUT = 120
+COMPILED_CACHE_ITEMS = 256
+# Jeux de données gardés sous forme de DataFrame dans chaque processus
+WORKER_FRAMES = 2
+
+
+class CodeExecutionError(RuntimeError):
+    """Échec de l'exécution du code généré dans un processus d'exécution."""
+
+
+class CodeExecutionTimeout(CodeExecutionError):
+    """Le code généré a dépassé sa durée maximale d'exécution."""
+
+
+_compiled = LRUCache(max_items=COMPILED_CACHE_ITEMS)
+
+
+def code_hash(code):
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def compile_cached(code):
+    """Code objet de ``code``, compilé une seule fois par empreinte de code."""
+    key = code_hash(code)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = compile(code, "<code généré>", "exec")
+        _compiled.put(key, compiled)
+    return compiled
+
+
+def run_code(code, df):
+    """Exécute le code Plotly avec ``df``, ``px``, ``go``, ``pd`` et ``np`` et retourne la variable ``fig``."""
+    # Copie superficielle : le DataFrame est partagé entre exécutions (et entre sessions)
+    namespace = {"__builtins__": builtins, "df": df.copy(deep=False), "px": px, "go": go, "pd": pd, "np": np}
+    exec(compile_cached(code), namespace)
+    return namespace.get("fig")
+
+
+_dataset_keys = FrameMemo()
+
+
+def dataset_key(df):
+    """Identifiant stable d'un objet DataFrame, pour le retrouver dans les processus d'exécution."""
+    return _dataset_keys.get(df, 'executor_key', lambda: uuid.uuid4().hex)
+
+
+def share_frame(df):
+    """Copie ``df`` dans un bloc de mémoire partagée au format Arrow IPC ; retourne ``(bloc, taille)``."""
+    table = pa.Table.from_pandas(df)
+    sink = pa.MockOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    size = sink.size()
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    buffer = pa.py_buffer(shm.buf)
+    with pa.ipc.new_stream(pa.FixedSizeBufferWriter(buffer), table.schema) as writer:
+        writer.write_table(table)
+    del buffer
+    return shm, size
+
+
+def _release(shm):
+    try:
+        shm.close()
+        shm.unlink()
+    except (BufferError, FileNotFoundError):
+        pass
+
+
+def _limit_memory(memory_mb):
+    try:
+        import resource
+    except ImportError:  # Windows : pas de limite mémoire
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_DATA)
+    limit = memory_mb * 1024**2
+    resource.setrlimit(resource.RLIMIT_DATA, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+
+
+def _attach_frame(shm_name, size):
+    """DataFrame lu dans la mémoire partagée ; les colonnes numériques sans manquants ne sont pas copiées."""
+    path = os.path.join('/dev/shm', shm_name)
+    if os.path.exists(path):
+        # Linux : projection en lecture seule, libérée par Arrow avec le dernier tableau qui l'utilise
+        source = pa.memory_map(path).read_buffer(size)
+    else:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            source = pa.py_buffer(bytes(shm.buf[:size]))
+        finally:
+            shm.close()
+    return pa.ipc.open_stream(source).read_all().to_pandas(split_blocks=True)
+
+
+def _worker_main(conn, memory_mb):
+    """Boucle d'un processus d'exécution : reçoit ``(code, clé, bloc, taille)`` et renvoie la figure sérialisée."""
+    # Copy-on-write : les copies superficielles protègent le DataFrame en cache (lecture seule en mémoire partagée)
+    pd.set_option("mode.copy_on_write", True)
+    _limit_memory(memory_mb)
+    frames = OrderedDict()
+    conn.send(('ready', os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        code, key, shm_name, size = message
+        try:
+            if key not in frames:
+                frames[key] = _attach_frame(shm_name, size)
+                while len(frames) > WORKER_FRAMES:
+                    frames.popitem(last=False)
+            frames.move_to_end(key)
+            fig = run_code(code, frames[key])
+            if fig is None:
+                reply = ('ok', None)
+            elif isinstance(fig, go.Figure):
+                reply = ('ok', fig.to_dict())
+            else:
+                reply = ('error', 'TypeError', f"'fig' n'est pas une figure Plotly ({type(fig).__name__})")
+        except MemoryError:
+            frames.clear()
+            reply = ('error', 'MemoryError', f"limite mémoire de {memory_mb} MB dépassée")
+        except SyntaxError as e:
+            reply = ('error', 'SyntaxError', str(e))
+        except Exception as e:
+            reply = ('error', type(e).__name__, str(e))
+        conn.send(reply)
+
+
+def decode_arrays(obj):
+    """Remplace les tableaux typés Plotly (``{'dtype', 'bdata'}`` en base64) par des tableaux numpy."""
+    if isinstance(obj, dict):
+        if 'bdata' in obj and 'dtype' in obj:
+            values = np.frombuffer(base64.b64decode(obj['bdata']), dtype=obj['dtype'])
+            if obj.get('shape'):
+                values = values.reshape([int(n) for n in str(obj['shape']).split(',') if n.strip()])
+            return values
+        return {key: decode_arrays(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [decode_arrays(value) for value in obj]
+    return obj
+
+
+class _Worker:
+    def __init__(self, context, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self):
+        if not self.ready:
+            if not self.conn.poll(STARTUP_TIMEOUT):
+                raise CodeExecutionError("Le processus d'exécution n'a pas démarré")
+            self.conn.recv()
+            self.ready = True
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class CodeExecutor:
+    """Pool de processus pré-chauffés (pandas et Plotly déjà importés) qui exécutent le code généré.
+
+    Chaque exécution est bornée en durée (le processus est tué et remplacé au-delà de
+    ``timeout``) et en mémoire (``memory_mb`` par processus). Le DataFrame est transmis une fois
+    par jeu de données en mémoire partagée Arrow ; la figure revient sous forme de dict Plotly.
+    Isolation de processus et limites de ressources : ce n'est pas un bac à sable de sécurité.
+    """
+
+    def __init__(self, workers=CODE_EXEC_WORKERS, timeout=CODE_EXEC_TIMEOUT, memory_mb=CODE_EXEC_MEMORY_MB,
+                 shared_mb=CODE_EXEC_SHARED_MB):
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._workers = max(workers, 0)
+        for _ in range(self._workers):
+            self._idle.put(_Worker(self._context, memory_mb))
+        self._shared = LRUCache(
+            max_bytes=shared_mb * 1024**2, sizeof=lambda block: block[1], on_evict=lambda key, block: _release(block[0])
+        )
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.in_process_runs = 0
+
+    def _share(self, df):
+        key = dataset_key(df)
+        with self._lock:
+            block = self._shared.get(key)
+            if block is None:
+                block = share_frame(df)
+                self._shared.put(key, block)
+        return key, block[0].name, block[1]
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def run_in_process(self, code, df):
+        """Exécution dans le processus courant (sans limites), avec le cache de code compilé."""
+        self._count('in_process_runs')
+        return run_code(code, df)
+
+    def run(self, code, df, timeout=None):
+        """Exécute ``code`` sur ``df`` dans un processus du pool et retourne la figure (ou None)."""
+        compile_cached(code)  # Erreurs de syntaxe signalées sans aller-retour vers un processus
+        if not self._workers:
+            return self.run_in_process(code, df)
+        try:
+            key, shm_name, size = self._share(df)
+        except (pa.ArrowException, ValueError, TypeError):
+            # Colonnes non convertibles en Arrow (objets Python hétérogènes)
+            return self.run_in_process(code, df)
+
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        try:
+            worker.wait_ready()
+            worker.conn.send((code, key, shm_name, size))
+            if not worker.conn.poll(timeout):
+                worker.kill()
+                worker = _Worker(self._context, self.memory_mb)
+                self._count('timeouts')
+                raise CodeExecutionTimeout(f"Exécution interrompue après {timeout:.0f}s")
+            status, *payload = worker.conn.recv()
+            self._count('runs')
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            worker.kill()
+            worker = _Worker(self._context, self.memory_mb)
+            self._count('crashes')
+            raise CodeExecutionError("Le processus d'exécution s'est arrêté (mémoire insuffisante ?)")
+        finally:
+            self._idle.put(worker)
+
+        if status == 'error':
+            error_type, message = payload
+            if error_type == 'SyntaxError':
+                raise SyntaxError(message)
+            raise CodeExecutionError(f"{error_type}: {message}")
+        fig_dict = payload[0]
+        return go.Figure(decode_arrays(fig_dict)) if fig_dict is not None else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self._workers, 'runs': self.runs, 'timeouts': self.timeouts, 'crashes': self.crashes,
+                'in_process_runs': self.in_process_runs, 'compiled': _compiled.stats(),
+                'shared_mb': self._shared.bytes / 1024**2,
+            }
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+        with self._lock:
+            for _, (shm, _) in self._shared.items():
+                _release(shm)
+            self._shared.clear()
+
+
+@st.cache_resource
+def get_code_executor():
+    """Pool d'exécution unique pour toutes les sessions du serveur (démarré au lancement de l'application)."""
+    executor = CodeExecutor()
+    atexit.register(executor.close)
+    return executor
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+import numpy as np
+import pyarrow as pa
+import streamlit as st
+from .cache import LRUCache
+from .ingestion import load_csv
+
+DATASET_CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR", Path.home() / ".cache" / "projet_final_data_viz" / "datasets"))
+# Budget mémoire des DataFrames gardés en RAM et budget disque des fichiers Arrow projetés en mémoire
+DATASET_CACHE_MB = int(os.getenv("DATASET_CACHE_MB", "2048"))
+DATASET_DISK_CACHE_MB = int(os.getenv("DATASET_DISK_CACHE_MB", "10240"))
+HASH_BLOCK_SIZE = 1024**2
+
+
+def content_hash(file, block_size=HASH_BLOCK_SIZE):
+    """Empreinte BLAKE2b du contenu d'un fichier binaire, lue par blocs (le fichier est rembobiné)."""
+    digest = hashlib.blake2b(digest_size=20)
+    file.seek(0)
+    for block in iter(lambda: file.read(block_size), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def write_arrow(df, path):
+    """Écrit ``df`` en fichier Arrow IPC non compressé, en un seul bloc par colonne (projetable en mémoire)."""
+    table = pa.Table.from_pandas(df)
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+
+
+def map_arrow(path):
+    """DataFrame adossé au fichier Arrow ``path`` projeté en mémoire.
+
+    Les colonnes numériques et dates sans valeurs manquantes sont des vues en lecture seule
+    sur les pages du fichier, partagées par toutes les sessions et tous les processus ; les
+    textes, booléens et codes des catégories sont recopiés.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def heap_bytes(df):
+    """Mémoire de ``df`` hors colonnes projetées depuis le disque (tableaux numpy en lecture seule)."""
+    usage = df.memory_usage(deep=True, index=False)
+    mapped = [
+        isinstance(dtype, np.dtype) and not df.iloc[:, position].to_numpy().flags.writeable
+        for position, dtype in enumerate(df.dtypes)
+    ]
+    return int(usage[[not flag for flag in mapped]].sum())
+
+
+class DatasetLease:
+    """Usage d'un jeu de données par une session : l'entrée reste en mémoire tant qu'un bail est ouvert.
+
+    Le bail est rendu par ``release()`` ou automatiquement quand la session l'oublie
+    (changement de fichier, fin de session).
+    """
+
+    def __init__(self, cache, key, entry):
+        self.key = key
+        self.df = entry['df']
+        self._finalizer = weakref.finalize(self, cache._release, key)
+
+    def release(self):
+        self._finalizer()
+
+
+class DatasetCache:
+    """Cache des jeux de données indexé par empreinte de contenu, partagé par les sessions du processus.
+
+    Chaque entrée contient le DataFrame analysé, le rapport d'ingestion, le profil et les
+    suggestions de Claude. Chaque contenu est écrit une fois en fichier Arrow sur disque (LRU par
+    date d'accès, borné par ``max_disk_mb``) puis projeté en mémoire : toutes les sessions
+    partagent le même DataFrame en lecture seule (voir ``map_arrow``). Les entrées utilisées
+    par une session (``acquire``) ne sont jamais évincées ; les autres restent en RAM dans un
+    LRU borné par ``max_mb`` et sont reprojetées depuis le disque sans nouvelle analyse du CSV.
+    """
+
+    def __init__(self, directory=DATASET_CACHE_DIR, max_mb=DATASET_CACHE_MB, max_disk_mb=DATASET_DISK_CACHE_MB):
+        self.directory = Path(directory)
+        self.max_disk_bytes = max_disk_mb * 1024**2
+        self._entries = LRUCache(max_bytes=max_mb * 1024**2, sizeof=lambda entry: entry['memory_bytes'])
+        self._leased = {}
+        # Verrou global des dictionnaires et du LRU ; un verrou par contenu en cours d'analyse
+        self._lock = threading.RLock()
+        self._loading = {}
+
+    def _arrow_path(self, key):
+        return self.directory / f"{key}.arrow"
+
+    def _metadata_path(self, key):
+        return self.directory / f"{key}.json"
+
+    def _read_metadata(self, key):
+        try:
+            return json.loads(self._metadata_path(key).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_atomic(self, path, write):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=path.suffix)
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _from_disk(self, key):
+        path = self._arrow_path(key)
+        if not path.exists():
+            return None
+        start = time.perf_counter()
+        try:
+            df = map_arrow(path)
+        except Exception:
+            return None
+        os.utime(path)
+        metadata = self._read_metadata(key)
+        report = dict(metadata.get('report') or {}, engine='arrow-mmap', parse_seconds=time.perf_counter() - start)
+        return self._new_entry(df, report, metadata.get('suggestions'))
+
+    def _to_disk(self, key, entry):
+        """Écrit l'entrée sur disque et remplace son DataFrame par la version projetée en mémoire."""
+        try:
+            self._write_atomic(self._arrow_path(key), lambda tmp: write_arrow(entry['df'], tmp))
+            self._write_metadata(key, entry)
+            entry.update(self._new_entry(map_arrow(self._arrow_path(key)), entry['report'], entry['suggestions']))
+        except Exception:
+            # Colonnes non sérialisables en Arrow : le jeu de données reste en RAM seulement
+            return
+        self._trim_disk(keep=key)
+
+    def _write_metadata(self, key, entry):
+        metadata = {'report': entry['report'], 'suggestions': entry['suggestions']}
+        self._write_atomic(self._metadata_path(key), lambda tmp: Path(tmp).write_text(json.dumps(metadata)))
+
+    def _trim_disk(self, keep=None):
+        """Supprime les fichiers les moins récemment utilisés au-delà du budget, sauf ``keep`` et ceux ouverts par une session."""
+        with self._lock:
+            self._trim_files(keep)
+
+    def _trim_files(self, keep):
+        files = sorted(self.directory.glob("*.arrow"), key=lambda path: path.stat().st_mtime)
+        total = sum(path.stat().st_size for path in files)
+        for path in files:
+            if total <= self.max_disk_bytes:
+                break
+            if path.stem == keep or path.stem in self._leased:
+                continue
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            path.with_suffix('.json').unlink(missing_ok=True)
+
+    @staticmethod
+    def _new_entry(df, report, suggestions=None):
+        return {
+            'df': df,
+            'report': report,
+            'profile': None,
+            'suggestions': suggestions,
+            'memory_bytes': int(df.memory_usage(deep=True).sum()),
+            'heap_bytes': heap_bytes(df),
+        }
+
+    def _lookup(self, key):
+        leased = self._leased.get(key)
+        return leased[0] if leased is not None else self._entries.get(key)
+
+    def load(self, file, loader=load_csv, progress=None, key=None):
+        """Retourne ``(clé, entrée)`` pour le fichier, en ne l'analysant que si son contenu est inconnu."""
+        key = key or content_hash(file)
+        entry = self._lookup(key)
+        if entry is not None:
+            return key, entry
+        # Seules les sessions qui chargent le même contenu s'attendent : l'analyse se fait hors du verrou global
+        with self._lock:
+            loading = self._loading.setdefault(key, [threading.Lock(), 0])
+            loading[1] += 1
+        try:
+            with loading[0]:
+                entry = self._lookup(key)
+                if entry is None:
+                    entry = self._from_disk(key)
+                    if entry is None:
+                        df, report = loader(file, progress=progress)
+                        entry = self._new_entry(df, report)
+                        self._to_disk(key, entry)
+                    with self._lock:
+                        self._entries.put(key, entry)
+        finally:
+            with self._lock:
+                loading[1] -= 1
+                if not loading[1]:
+                    del self._loading[key]
+        return key, entry
+
+    def acquire(self, key, entry=None):
+        """Bail sur l'entrée ``key`` (``DatasetLease``, DataFrame partagé dans ``.df``) ; KeyError si elle est inconnue.
+
+        ``entry`` (retournée par ``load``) est épinglée telle quelle, même si les budgets l'ont déjà évincée.
+        """
+        with self._lock:
+            leased = self._leased.get(key)
+            if leased is None:
+                entry = self._entries.pop(key) or entry or self._from_disk(key)
+                if entry is None:
+                    raise KeyError(key)
+                leased = self._leased[key] = [entry, 0]
+            leased[1] += 1
+            return DatasetLease(self, key, leased[0])
+
+    def _release(self, key):
+        with self._lock:
+            leased = self._leased.get(key)
+            if leased is None:
+                return
+            leased[1] -= 1
+            if leased[1] == 0:
+                # Plus aucune session : l'entrée redevient évinçable
+                del self._leased[key]
+                self._entries.put(key, leased[0])
+
+    def get(self, key):
+        return self._lookup(key)
+
+    def update(self, key, **fields):
+        """Complète une entrée (ex. ``profile``, ``suggestions``) ; les suggestions sont aussi écrites sur disque."""
+        entry = self._lookup(key)
+        if entry is None:
+            return
+        entry.update(fields)
+        if 'suggestions' in fields and self._arrow_path(key).exists():
+            try:
+                self._write_metadata(key, entry)
+            except OSError:
+                pass
+
+    def stats(self):
+        stats = self._entries.stats()
+        with self._lock:
+            leased = [entry for entry, _ in self._leased.values()]
+            stats['leased'] = len(leased)
+            stats['leases'] = sum(count for _, count in self._leased.values())
+        entries = leased + [entry for _, entry in self._entries.items()]
+        stats['heap_bytes'] = sum(entry['heap_bytes'] for entry in entries)
+        return stats
+
+
+@st.cache_resource
+def get_dataset_cache():
+    """Cache de jeux de données unique pour toutes les sessions du serveur."""
+    return DatasetCache()
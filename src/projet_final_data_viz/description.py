@@ -1,40 +1,50 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
+from .profiler import profile_dataset
 
 def describe_dataset(df):
     """Génère une description du jeu de données et affiche des métriques."""
+    profil = profile_dataset(df)
     st.subheader("Aperçu du Jeu de Données")
     
     st.write("**Informations de base :**")
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Lignes", df.shape[0])
+        st.metric("Lignes", profil['rows'])
     with col2:
-        st.metric("Colonnes", df.shape[1])
+        st.metric("Colonnes", profil['columns'])
     with col3:
-        st.metric("Valeurs Manquantes", df.isna().sum().sum())
+        st.metric("Valeurs Manquantes", profil['missing'])
     with col4:
-        st.metric("Doublons", df.duplicated().sum())
+        if profil['approximate']:
+            marge = profil['estimates']['duplicates']['margin']
+            st.metric("Doublons (≈)", f"≈ {profil['duplicates']} ± {marge}",
+                      help=f"Estimation ({profil['estimates']['duplicates']['method']}), intervalle de confiance à 95 %.")
+        else:
+            st.metric("Doublons", profil['duplicates'])
     
     col5, col6, col7, col8 = st.columns(4)
     with col5:
-        st.metric("Colonnes Numériques", df.select_dtypes(include=np.number).shape[1])
+        st.metric("Colonnes Numériques", profil['numeric_columns'])
     with col6:
-        st.metric("Colonnes Catégorielles", df.select_dtypes(include=['object', 'category']).shape[1])
+        st.metric("Colonnes Catégorielles", profil['categorical_columns'])
     with col7:
-        st.metric("Colonnes de Date", df.select_dtypes(include=['datetime64']).shape[1])
+        st.metric("Colonnes de Date", profil['datetime_columns'])
     with col8:
-        utilisation_memoire = df.memory_usage(deep=True).sum() / 1024**2
-        st.metric("Mémoire (MB)", f"{utilisation_memoire:.2f}")
+        if profil['approximate']:
+            st.metric("Mémoire (MB, ≈)", f"≈ {profil['memory_mb']:.2f}",
+                      help=f"Estimation ({profil['estimates']['memory_mb']['method']}).")
+        else:
+            st.metric("Mémoire (MB)", f"{profil['memory_mb']:.2f}")
     
     st.write("\n**Types de Colonnes :**")
-    types_colonnes = pd.DataFrame({
-        'Colonne': df.columns,
-        'Type': df.dtypes,
-        'Valeurs Manquantes': df.isna().sum(),
-        'Valeurs Uniques': df.nunique(),
-    })
+    types_colonnes = profil['column_stats'][['Colonne', 'Type', 'Valeurs Manquantes', 'Valeurs Uniques']]
+    if profil['approximate']:
+        erreur = profil['estimates']['distinct']['relative_error']
+        types_colonnes = types_colonnes.rename(columns={'Valeurs Uniques': 'Valeurs Uniques (≈)'})
+        st.caption(
+            f"Jeu de données volumineux : valeurs uniques estimées par HyperLogLog (± {erreur:.1%} à 95 %), "
+            "doublons et mémoire estimés sur échantillon."
+        )
     st.dataframe(types_colonnes, use_container_width=True)
     
     st.write("\n**Un échantillon de nos Données :**")
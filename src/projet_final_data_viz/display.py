@@ -1,8 +1,12 @@
 import streamlit as st
-from src.projet_final_data_viz.agents import suggest_graphs, generate_plotly_code, interpret_fig
+from src.projet_final_data_viz.agents import (
+    suggest_graphs, generate_plotly_code, display_fig_interpretation, forget_plotly_code
+)
+from src.projet_final_data_viz.async_agents import generate_all_charts
+from src.projet_final_data_viz.code_executor import get_code_executor
+from src.projet_final_data_viz.figure_reduction import reduce_figure, reduction_caption
 import re
-import plotly.express as px
-import plotly.graph_objects as go
+import time
 
 def setup_page_config():
     st.set_page_config(
@@ -45,12 +49,50 @@ def setup_page_config():
     """, unsafe_allow_html=True)
 
 
-def display_suggestions(suggestions):
-    st.write("\n".join(suggestions))
+def extract_graph_list(suggestions):
     graph_list = re.findall(r'\d+\.\s(.*)', suggestions[0])
     return graph_list if graph_list else ["Aucune suggestion extraite."]
 
 
+def display_suggestions(suggestions):
+    st.write("\n".join(suggestions))
+    return extract_graph_list(suggestions)
+
+
+def execute_plotly_code(code_plotly, df):
+    """Exécute le code Plotly généré par Claude dans un processus isolé et retourne la figure ``fig`` (ou None)."""
+    return get_code_executor().run(code_plotly, df)
+
+
+def render_figure(fig):
+    """Affiche ``fig`` après allègement des traces trop lourdes pour le navigateur."""
+    figure_affichee, rapport = reduce_figure(fig)
+    st.plotly_chart(figure_affichee)
+    legende = reduction_caption(rapport)
+    if legende:
+        st.caption(legende)
+
+
+def display_all_charts(df):
+    """Génère, exécute et interprète tous les graphiques suggérés en parallèle."""
+    with st.spinner("Génération de tous les graphiques en cours..."):
+        start = time.perf_counter()
+        resultats = generate_all_charts(
+            df, st.session_state.graph_list, st.session_state.get('claude_api_key'), execute_plotly_code
+        )
+        st.caption(f"{len(resultats)} graphiques générés en {time.perf_counter() - start:.1f}s")
+
+    for resultat in resultats:
+        st.markdown(f"**{resultat['chart_type']}**")
+        with st.expander("Cliquez pour voir le code"):
+            st.code(resultat['code'], language="python")
+        if resultat['error']:
+            st.error(f"❌ {resultat['error']}")
+        else:
+            render_figure(resultat['fig'])
+            st.write(resultat['interpretation'])
+
+
 def graph_display(client, df):
     st.subheader("Visualisation des Données")
     graphique_selectionne = st.selectbox("Choisissez un type de graphique :", st.session_state.graph_list)
@@ -69,24 +111,27 @@ def graph_display(client, df):
         
             if code_plotly:
                 try:
-                    variables_locales = {"df": df, "go": go, "px": px}
-                    exec(code_plotly, globals(), variables_locales)
-                    fig = variables_locales.get("fig")
+                    fig = execute_plotly_code(code_plotly, df)
 
                     if fig:
-                        st.plotly_chart(fig)
-                        interpretation = interpret_fig(fig, client)
-                        st.write(interpretation)
+                        render_figure(fig)
+                        display_fig_interpretation(fig, client)
                     else:
+                        forget_plotly_code(df, graphique_selectionne)
                         st.error("❌ Erreur : 'fig' n'a pas été généré.")
 
                 except SyntaxError as e:
+                    forget_plotly_code(df, graphique_selectionne)
                     st.error(f"❌ Erreur de syntaxe dans le code généré : {e}")
                 except Exception as e:
+                    forget_plotly_code(df, graphique_selectionne)
                     st.error(f"❌ Erreur lors de l'exécution du code : {e}")
             else:
                 st.error("❌ Aucun code valide retourné par Claude.")
 
+    if st.button("Générer tous les graphiques suggérés"):
+        display_all_charts(df)
+
 
 def user_graph_display(client, df):
     st.subheader("Suggérer un Graphique :")
@@ -106,20 +151,20 @@ def user_graph_display(client, df):
         
             if code_plotly2:
                 try:
-                    variables_locales = {"df": df, "go": go, "px": px}
-                    exec(code_plotly2, globals(), variables_locales)
-                    fig = variables_locales.get("fig")
+                    fig = execute_plotly_code(code_plotly2, df)
 
                     if fig:
-                        st.plotly_chart(fig)
-                        interpretation = interpret_fig(fig, client)
-                        st.write(interpretation)
+                        render_figure(fig)
+                        display_fig_interpretation(fig, client)
                     else:
+                        forget_plotly_code(df, question)
                         st.error("❌ Erreur : 'fig' n'a pas été généré.")
 
                 except SyntaxError as e:
+                    forget_plotly_code(df, question)
                     st.error(f"❌ Erreur de syntaxe dans le code généré : {e}")
                 except Exception as e:
+                    forget_plotly_code(df, question)
                     st.error(f"❌ Erreur lors de l'exécution du code : {e}")
             else:
                 st.error("❌ Aucun code valide retourné par Claude.")
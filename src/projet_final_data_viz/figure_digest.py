@@ -0,0 +1,253 @@
+import numpy as np
+import pandas as pd
+
+TOP_K = 5
+# Au-delà, les traces suivantes sont seulement comptées
+MAX_TRACES = 10
+QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+# Une colonne texte est considérée numérique si au moins cette part de valeurs se convertit
+NUMERIC_MIN_RATIO = 0.9
+NANOSECONDS_PER_DAY = 86_400 * 10**9
+
+
+def _fmt(value):
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def as_series(values):
+    """Convertit un tableau de trace en ``(kind, valeurs)`` avec ``kind`` parmi numeric, datetime, category.
+
+    Les dates sont rendues en jours depuis l'époque (float) pour les calculs de pente.
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in 'iufb':
+        return 'numeric', array.astype(np.float64)
+    if array.dtype.kind == 'M':
+        return 'datetime', array.astype('datetime64[ns]').astype(np.int64) / NANOSECONDS_PER_DAY
+    series = pd.Series(array, dtype=object)
+    non_null = series.dropna()
+    if not len(non_null):
+        return 'category', series
+    numeric = pd.to_numeric(non_null, errors='coerce')
+    if numeric.notna().mean() >= NUMERIC_MIN_RATIO:
+        return 'numeric', pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+    if isinstance(non_null.iloc[0], (pd.Timestamp, np.datetime64)) or hasattr(non_null.iloc[0], 'isoformat'):
+        dates = pd.to_datetime(series, errors='coerce')
+        return 'datetime', dates.to_numpy(dtype='datetime64[ns]').astype(np.int64) / NANOSECONDS_PER_DAY
+    return 'category', series
+
+
+def numeric_summary(values):
+    """Nombre de points, quantiles, moyenne et écart-type (valeurs manquantes ignorées)."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {'count': 0}
+    q = np.quantile(values, QUANTILES)
+    return {
+        'count': int(len(values)), 'min': q[0], 'q1': q[1], 'median': q[2], 'q3': q[3], 'max': q[4],
+        'mean': float(values.mean()), 'std': float(values.std()),
+    }
+
+
+def trend(x, y):
+    """Pente (unités de y par unité de x) et corrélation de la régression linéaire de y sur x."""
+    mask = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[mask], y[mask]
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    dx, dy = x - x.mean(), y - y.mean()
+    slope = float((dx * dy).sum() / (dx * dx).sum())
+    denominator = np.sqrt((dx * dx).sum() * (dy * dy).sum())
+    return {'slope': slope, 'r': float((dx * dy).sum() / denominator) if denominator else 0.0}
+
+
+def top_categories(categories, weights=None, k=TOP_K):
+    """Les ``k`` catégories les plus fréquentes (ou de plus grand total de ``weights``)."""
+    categories = pd.Series(categories, dtype=object).astype(str)
+    if weights is None:
+        totals = categories.value_counts()
+    else:
+        totals = pd.Series(weights).groupby(categories.to_numpy()).sum().sort_values(ascending=False)
+    return {'distinct': int(len(totals)), 'top': [(name, _py(value)) for name, value in totals.head(k).items()]}
+
+
+def _py(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _axis_summary(kind, values):
+    if kind == 'category':
+        return dict(kind=kind, **top_categories(values))
+    summary = dict(kind=kind, **numeric_summary(values))
+    if kind == 'datetime' and summary['count']:
+        for key in ('min', 'median', 'max'):
+            summary[key] = str(pd.Timestamp(summary[key] * NANOSECONDS_PER_DAY).date())
+        for key in ('q1', 'q3', 'mean', 'std'):
+            summary.pop(key)
+    return summary
+
+
+def _cartesian(trace):
+    """Traces à axes x/y (scatter, bar, line, histogram, box...)."""
+    digest = {}
+    axes = {}
+    for axis in ('x', 'y'):
+        values = getattr(trace, axis, None)
+        if values is not None and len(values):
+            axes[axis] = as_series(values)
+            digest[axis] = _axis_summary(*axes[axis])
+    if 'x' in axes and 'y' in axes:
+        (x_kind, x), (y_kind, y) = axes['x'], axes['y']
+        digest['points'] = int(len(y))
+        if x_kind != 'category' and y_kind == 'numeric':
+            digest['trend'] = trend(np.asarray(x, dtype=np.float64), y)
+            if digest['trend']:
+                digest['trend']['per'] = 'jour' if x_kind == 'datetime' else 'unité de x'
+        elif x_kind == 'category' and y_kind == 'numeric':
+            digest['y_by_x'] = top_categories(x, y)
+        elif y_kind == 'category' and x_kind == 'numeric':
+            digest['x_by_y'] = top_categories(y, x)
+    elif axes:
+        digest['points'] = int(len(next(iter(axes.values()))[1]))
+    return digest
+
+
+def _sankey(trace):
+    """Diagramme de Sankey : nœuds, flux totaux et liens les plus importants."""
+    labels = list(trace.node.label) if trace.node.label is not None else []
+    source = np.asarray(trace.link.source if trace.link.source is not None else [], dtype=np.int64)
+    target = np.asarray(trace.link.target if trace.link.target is not None else [], dtype=np.int64)
+    value = np.asarray(trace.link.value if trace.link.value is not None else np.ones(len(source)), dtype=np.float64)
+
+    def name(index):
+        return str(labels[index]) if index < len(labels) else str(index)
+
+    order = np.argsort(-value)[:TOP_K]
+    nodes = max(len(labels), int(max(source.max(initial=-1), target.max(initial=-1)) + 1))
+    # Flux traversant un nœud : le plus grand de ses flux entrant et sortant
+    throughput = np.maximum(
+        np.bincount(source, weights=value, minlength=nodes), np.bincount(target, weights=value, minlength=nodes)
+    )
+    busiest = np.argsort(-throughput)[:TOP_K]
+    return {
+        'nodes': nodes, 'links': int(len(source)), 'total_flow': float(value.sum()),
+        'top_links': [(f"{name(source[i])} → {name(target[i])}", float(value[i])) for i in order],
+        'top_nodes': [(name(i), float(throughput[i])) for i in busiest],
+    }
+
+
+def _pie(trace):
+    """Camembert / donut : parts des plus grandes catégories."""
+    labels = trace.labels if trace.labels is not None else []
+    values = trace.values if trace.values is not None else None
+    parts = top_categories(labels, values)
+    total = float(np.nansum(np.asarray(values, dtype=np.float64))) if values is not None else float(len(labels))
+    parts['top'] = [(name, value, value / total if total else 0.0) for name, value in parts['top']]
+    return parts
+
+
+def _matrix(trace):
+    """Heatmap / contour : dimensions, statistiques de z et position du maximum."""
+    z = np.asarray(trace.z, dtype=np.float64) if trace.z is not None else np.empty((0, 0))
+    digest = {'shape': z.shape, 'z': numeric_summary(z.ravel())}
+    if z.ndim == 2 and z.size and not np.isnan(z).all():
+        row, column = np.unravel_index(np.nanargmax(z), z.shape)
+        x = trace.x[column] if trace.x is not None and column < len(trace.x) else column
+        y = trace.y[row] if trace.y is not None and row < len(trace.y) else row
+        digest['argmax'] = (_py(x), _py(y))
+    return digest
+
+
+def _generic(trace):
+    """Autres traces (cartes, 3D, polaires...) : résumé de chaque tableau de données présent."""
+    digest = {}
+    for attribute in ('x', 'y', 'z', 'values', 'r', 'theta', 'lat', 'lon', 'locations', 'labels'):
+        values = getattr(trace, attribute, None) if attribute in trace else None
+        if values is not None and np.ndim(values) == 1 and len(values):
+            digest[attribute] = _axis_summary(*as_series(values))
+    return digest
+
+
+TRACE_EXTRACTORS = {
+    'sankey': _sankey,
+    'pie': _pie,
+    'heatmap': _matrix,
+    'contour': _matrix,
+    'scatter': _cartesian,
+    'scattergl': _cartesian,
+    'bar': _cartesian,
+    'histogram': _cartesian,
+    'box': _cartesian,
+    'violin': _cartesian,
+    'funnel': _cartesian,
+}
+
+
+def digest_figure(fig, max_traces=MAX_TRACES):
+    """Résumé structuré d'une figure Plotly, calculé sur les tableaux des traces (sans sérialisation JSON)."""
+    layout = fig.layout
+    digest = {
+        'title': layout.title.text if layout.title and layout.title.text else None,
+        'x_title': layout.xaxis.title.text if 'xaxis' in layout and layout.xaxis.title else None,
+        'y_title': layout.yaxis.title.text if 'yaxis' in layout and layout.yaxis.title else None,
+        'trace_count': len(fig.data),
+        'traces': [],
+    }
+    for trace in fig.data[:max_traces]:
+        extractor = TRACE_EXTRACTORS.get(trace.type, _generic)
+        digest['traces'].append(dict(type=trace.type, name=getattr(trace, 'name', None), **extractor(trace)))
+    return digest
+
+
+def _format_axis(axis, summary):
+    if summary['kind'] == 'category':
+        top = ", ".join(f"{name} ({_fmt(count)})" for name, count in summary['top'])
+        return f"  - {axis} : catégoriel, {summary['distinct']} valeurs distinctes ; plus fréquentes : {top}"
+    if not summary['count']:
+        return f"  - {axis} : aucune valeur"
+    if summary['kind'] == 'datetime':
+        return f"  - {axis} : dates du {summary['min']} au {summary['max']} (médiane {summary['median']})"
+    return (
+        f"  - {axis} : min {_fmt(summary['min'])} · q1 {_fmt(summary['q1'])} · médiane {_fmt(summary['median'])}"
+        f" · q3 {_fmt(summary['q3'])} · max {_fmt(summary['max'])} · moyenne {_fmt(summary['mean'])}"
+        f" · écart-type {_fmt(summary['std'])}"
+    )
+
+
+def format_digest(digest):
+    """Texte compact (une ligne par information) du résumé de figure, pour un prompt."""
+    lines = [f"Titre : {digest['title'] or 'Aucun titre'}"]
+    if digest['x_title'] or digest['y_title']:
+        lines.append(f"Axe X : {digest['x_title'] or 'Inconnu'} · Axe Y : {digest['y_title'] or 'Inconnu'}")
+    for number, trace in enumerate(digest['traces'], start=1):
+        header = f"Trace {number}" + (f" « {trace['name']} »" if trace.get('name') else "") + f" ({trace['type']}"
+        lines.append(header + (f", {trace['points']} points)" if 'points' in trace else ")"))
+        for axis in ('x', 'y', 'z', 'values', 'r', 'theta', 'lat', 'lon', 'locations', 'labels'):
+            if isinstance(trace.get(axis), dict) and 'kind' in trace[axis]:
+                lines.append(_format_axis(axis, trace[axis]))
+        if trace.get('trend'):
+            lines.append(f"  - tendance : pente {_fmt(trace['trend']['slope'])} par {trace['trend']['per']}, corrélation {trace['trend']['r']:.2f}")
+        for key, label in (('y_by_x', 'y par x'), ('x_by_y', 'x par y')):
+            if key in trace:
+                top = ", ".join(f"{name} {_fmt(value)}" for name, value in trace[key]['top'])
+                lines.append(f"  - plus grands totaux de {label} : {top}")
+        if trace['type'] == 'sankey':
+            lines.append(f"  - {trace['nodes']} nœuds, {trace['links']} liens, flux total {_fmt(trace['total_flow'])}")
+            lines.append("  - liens principaux : " + ", ".join(f"{name} ({_fmt(v)})" for name, v in trace['top_links']))
+            lines.append("  - nœuds principaux : " + ", ".join(f"{name} ({_fmt(v)})" for name, v in trace['top_nodes']))
+        elif trace['type'] == 'pie':
+            lines.append(
+                f"  - {trace['distinct']} parts ; principales : "
+                + ", ".join(f"{name} {share:.0%}" for name, _, share in trace['top'])
+            )
+        elif 'shape' in trace:
+            lines.append(f"  - matrice {trace['shape'][0]}×{trace['shape'][1] if len(trace['shape']) > 1 else 1}")
+            if trace['z'].get('count'):
+                lines.append(_format_axis('z', dict(kind='numeric', **trace['z'])))
+            if 'argmax' in trace:
+                lines.append(f"  - maximum en x={trace['argmax'][0]}, y={trace['argmax'][1]}")
+    if digest['trace_count'] > len(digest['traces']):
+        lines.append(f"… et {digest['trace_count'] - len(digest['traces'])} autres traces")
+    return "\n".join(lines)
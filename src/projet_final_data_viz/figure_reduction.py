@@ -0,0 +1,275 @@
+import logging
+import os
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from .figure_digest import as_series
+
+logger = logging.getLogger(__name__)
+
+# Budget total de points envoyés au navigateur, toutes traces confondues
+FIGURE_MAX_POINTS = int(os.getenv("FIGURE_MAX_POINTS", "50000"))
+# Au-delà de ce nombre de points, une trace scatter est rendue en WebGL (Scattergl)
+WEBGL_MIN_POINTS = int(os.getenv("FIGURE_WEBGL_MIN_POINTS", "5000"))
+# Méthode de réduction des courbes : "lttb" (forme préservée) ou "minmax" (extrêmes préservés)
+LINE_DOWNSAMPLING = os.getenv("FIGURE_LINE_DOWNSAMPLING", "lttb")
+MIN_TRACE_POINTS = 100
+# Une courbe n'a pas besoin de plus de points que de pixels en largeur
+MAX_LINE_POINTS = 4000
+MAX_HISTOGRAM_BINS = 200
+# Attributs par point qui doivent suivre la sélection des points
+PER_POINT_ATTRIBUTES = ('x', 'y', 'text', 'hovertext', 'customdata', 'ids')
+PER_POINT_MARKER_ATTRIBUTES = ('color', 'size', 'symbol', 'opacity')
+SCATTERGL_PROPS = frozenset(go.Scattergl()._valid_props)
+BAR_MARKER_PROPS = frozenset(go.bar.Marker()._valid_props)
+# Formes de ligne rendues à l'identique par Scattergl (pas de « spline »)
+WEBGL_LINE_SHAPES = (None, 'linear', 'hv')
+
+
+def lttb_indices(x, y, n_out):
+    """Indices retenus par Largest-Triangle-Three-Buckets (``x`` croissant, premiers et derniers points gardés)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x, next_y = x[end:edges[bucket + 2]].mean(), y[end:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        ax, ay = x[previous], y[previous]
+        areas = np.abs((ax - next_x) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y - ay))
+        areas[np.isnan(areas)] = -1.0
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Indices des minimum et maximum de ``n_out / 2`` seaux consécutifs (valeurs manquantes ignorées)."""
+    valid = np.flatnonzero(~np.isnan(y))
+    if n_out >= len(valid):
+        return valid
+    buckets = max(n_out // 2, 1)
+    groups = pd.Series(y[valid]).groupby(np.arange(len(valid)) * buckets // len(valid))
+    return valid[np.union1d(groups.idxmin().to_numpy(), groups.idxmax().to_numpy())]
+
+
+def grid_bin_indices(x, y, n_out):
+    """Un point représentatif par case d'une grille d'environ ``n_out`` cases, et le nombre de points par case."""
+    valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    bins = max(int(np.sqrt(n_out)), 1)
+    cells = np.zeros(len(valid), dtype=np.int64)
+    for values in (x[valid], y[valid]):
+        low, span = values.min(), np.ptp(values) or 1.0
+        cells = cells * bins + np.minimum(((values - low) / span * bins).astype(np.int64), bins - 1)
+    _, first, counts = np.unique(cells, return_index=True, return_counts=True)
+    return valid[first], counts
+
+
+def _positions(values):
+    """Valeurs d'axe en flottants ; les catégories sont remplacées par leur code."""
+    kind, converted = as_series(values)
+    if kind == 'category':
+        return pd.factorize(converted)[0].astype(np.float64)
+    return np.asarray(converted, dtype=np.float64)
+
+
+def _subset(props, indices, n):
+    """Restreint aux ``indices`` tous les tableaux par point de la trace."""
+    for name in PER_POINT_ATTRIBUTES:
+        if props.get(name) is not None and np.ndim(props[name]) >= 1 and len(props[name]) == n:
+            props[name] = np.asarray(props[name])[indices]
+    marker = props.get('marker') or {}
+    for name in PER_POINT_MARKER_ATTRIBUTES:
+        if marker.get(name) is not None and np.ndim(marker[name]) == 1 and len(marker[name]) == n:
+            marker[name] = np.asarray(marker[name])[indices]
+    return props
+
+
+def _as_webgl(props):
+    return go.Scattergl(**{name: value for name, value in props.items() if name in SCATTERGL_PROPS})
+
+
+def _needs_svg(props):
+    """Vrai si Scattergl ne sait pas rendre la trace : aires empilées (``stackgroup``), ``fill='tonext*'``, splines."""
+    return bool(props.get('stackgroup')) or str(props.get('fill') or '').startswith('tonext') \
+        or (props.get('line') or {}).get('shape') not in WEBGL_LINE_SHAPES
+
+
+def _point_count(trace):
+    for name in ('x', 'y'):
+        values = getattr(trace, name, None)
+        if values is not None:
+            return len(values)
+    return 0
+
+
+def _reduce_scatter(trace, target, line_method):
+    n = _point_count(trace)
+    props = trace.to_plotly_json()
+    props.pop('type', None)
+    svg = _needs_svg(props)
+    if n <= target:
+        return (None, None) if svg else (_as_webgl(props), 'webgl')
+    x = _positions(trace.x) if trace.x is not None else np.arange(n, dtype=np.float64)
+    y = _positions(trace.y) if trace.y is not None else np.arange(n, dtype=np.float64)
+    mode = trace.mode or ('lines' if n > 20 else 'lines+markers')
+    if 'lines' in mode:
+        target = min(target, MAX_LINE_POINTS)
+        if props.get('stackgroup'):
+            # Mêmes indices pour toutes les aires d'un empilement : elles restent alignées sur x
+            indices = np.unique(np.linspace(0, n - 1, target).astype(np.int64))
+            return go.Scatter(**_subset(props, indices, n)), 'stride'
+        if line_method == 'minmax':
+            indices, method = minmax_indices(y, target), 'minmax'
+        else:
+            indices, method = lttb_indices(x, y, target), 'lttb'
+        props = _subset(props, indices, n)
+        return (go.Scatter(**props) if svg else _as_webgl(props)), method
+    indices, counts = grid_bin_indices(x, y, target)
+    props = _subset(props, indices, n)
+    if props.get('hovertext') is None and props.get('text') is None:
+        props['hovertext'] = [f"{count} point(s) dans cette zone" for count in counts]
+    return (go.Scatter(**props) if svg else _as_webgl(props)), 'grid-binning'
+
+
+def _histogram_values(trace):
+    """Valeurs numériques d'un histogramme de comptage vertical, ou ``None`` s'il ne peut être calculé côté serveur."""
+    if trace.y is not None or trace.histfunc not in (None, 'count') or trace.histnorm:
+        return None
+    if trace.cumulative.enabled and trace.cumulative.currentbin not in (None, 'include'):
+        return None
+    kind, values = as_series(trace.x)
+    if kind != 'numeric':
+        return None
+    return values[~np.isnan(values)]
+
+
+def _histogram_edges(traces, values):
+    """Bornes communes aux histogrammes d'un même groupe de barres (``xbins`` explicites, sinon ``nbinsx``)."""
+    settings = {(trace.xbins.start, trace.xbins.end, trace.xbins.size) for trace in traces}
+    settings.discard((None, None, None))
+    if settings:
+        if len(settings) > 1:
+            return None
+        start, end, size = settings.pop()
+        # Bornes partielles ou en unités de dates (« M1 ») : plotly les calcule mieux que nous
+        if not all(isinstance(bound, (int, float)) for bound in (start, end, size)) or size <= 0 or end <= start:
+            return None
+        count = int(np.ceil((end - start) / size))
+        if count > MAX_HISTOGRAM_BINS * 10:
+            return None
+        return start + size * np.arange(count + 1)
+    bins = min(max(trace.nbinsx or 0 for trace in traces) or MAX_HISTOGRAM_BINS, MAX_HISTOGRAM_BINS)
+    values = np.concatenate(values)
+    return np.histogram_bin_edges(values, bins=bins if len(values) else 1)
+
+
+def _reduce_histograms(traces):
+    """Barres calculées côté serveur pour des histogrammes qui partagent leurs classes, ou ``None``.
+
+    Toutes les traces du groupe sont comptées sur les mêmes bornes, comme le fait plotly pour
+    les histogrammes empilés ou superposés d'un même axe, avec ``cumulative`` respecté.
+    """
+    values = [_histogram_values(trace) for trace in traces]
+    if any(trace_values is None for trace_values in values):
+        return None
+    edges = _histogram_edges(traces, values)
+    if edges is None:
+        return None
+    bars = []
+    for trace, trace_values in zip(traces, values):
+        counts, _ = np.histogram(trace_values, bins=edges)
+        if trace.cumulative.enabled:
+            counts = counts[::-1].cumsum()[::-1] if trace.cumulative.direction == 'decreasing' else counts.cumsum()
+        bars.append(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name=trace.name,
+            marker={name: value for name, value in trace.marker.to_plotly_json().items() if name in BAR_MARKER_PROPS},
+            offsetgroup=trace.offsetgroup, alignmentgroup=trace.alignmentgroup, opacity=trace.opacity,
+            showlegend=trace.showlegend, legendgroup=trace.legendgroup, xaxis=trace.xaxis, yaxis=trace.yaxis,
+        ))
+    return bars
+
+
+def reduce_figure(fig, max_points=FIGURE_MAX_POINTS, webgl_min_points=WEBGL_MIN_POINTS, line_method=LINE_DOWNSAMPLING):
+    """Retourne ``(figure allégée, rapport)`` pour l'affichage dans le navigateur.
+
+    Les traces scatter trop lourdes passent en WebGL et, au-delà du budget ``max_points``
+    (réparti entre traces au prorata de leur taille), sont réduites par LTTB / min-max
+    (courbes) ou par une grille de cases (nuages de points). Les histogrammes sont calculés
+    côté serveur. Les aires empilées, remplissages ``tonext*`` et splines restent en SVG (réduits
+    quand même). La figure d'origine n'est pas modifiée ; sans réduction, ou si la réduction
+    échoue, elle est rendue telle quelle.
+    """
+    try:
+        return _reduce_figure(fig, max_points, webgl_min_points, line_method)
+    except Exception:
+        logger.exception("Réduction de la figure impossible, affichage de la figure d'origine")
+        total = sum(_point_count(trace) for trace in fig.data)
+        return fig, {'points_before': total, 'points_after': total, 'payload_bytes': None, 'actions': []}
+
+
+def _reduce_figure(fig, max_points, webgl_min_points, line_method):
+    counts = [_point_count(trace) for trace in fig.data]
+    total = sum(counts)
+    report = {'points_before': total, 'points_after': total, 'payload_bytes': None, 'actions': []}
+    if total <= webgl_min_points:
+        return fig, report
+
+    targets = [n if total <= max_points else max(int(max_points * n / total), MIN_TRACE_POINTS) for n in counts]
+    # Les histogrammes d'un même axe (ou bingroup) partagent leurs classes : ils sont réduits ensemble ou pas du tout
+    groups = {}
+    for index, trace in enumerate(fig.data):
+        if trace.type == 'histogram':
+            groups.setdefault(trace.bingroup or trace.xaxis or 'x', []).append(index)
+    histograms = {}
+    for indices in groups.values():
+        if any(counts[index] > targets[index] for index in indices):
+            bars = _reduce_histograms([fig.data[index] for index in indices])
+            histograms.update(zip(indices, bars or []))
+
+    traces, changed = [], False
+    for index, (trace, n, target) in enumerate(zip(fig.data, counts, targets)):
+        reduced, method = None, None
+        if trace.type == 'scatter' and (n > target or n > webgl_min_points):
+            reduced, method = _reduce_scatter(trace, target, line_method)
+        elif trace.type == 'scattergl' and n > target:
+            reduced, method = _reduce_scatter(trace, target, line_method)
+        elif index in histograms:
+            reduced, method = histograms[index], 'server-histogram'
+        if reduced is None:
+            traces.append(trace)
+            continue
+        changed = True
+        traces.append(reduced)
+        report['actions'].append({
+            'trace': index, 'name': trace.name, 'type': trace.type, 'method': method,
+            'points_before': n, 'points_after': _point_count(reduced),
+        })
+    if not changed:
+        return fig, report
+
+    reduced_fig = go.Figure(data=traces, layout=fig.layout)
+    report['points_after'] = sum(_point_count(trace) for trace in reduced_fig.data)
+    report['payload_bytes'] = len(reduced_fig.to_json())
+    return reduced_fig, report
+
+
+def _thousands(n):
+    return f"{n:,}".replace(",", " ")
+
+
+def reduction_caption(report):
+    """Légende résumant les réductions appliquées, ou ``None`` si la figure est intacte."""
+    if not report['actions']:
+        return None
+    methods = ", ".join(sorted({action['method'] for action in report['actions']}))
+    return (
+        f"Graphique allégé pour l'affichage : {_thousands(report['points_before'])} → "
+        f"{_thousands(report['points_after'])} points ({methods}, {report['payload_bytes'] / 1024:.0f} KB)"
+    )
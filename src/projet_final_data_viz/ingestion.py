@@ -0,0 +1,183 @@
+import io
+import re
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+# Au-delà de cette taille, le fichier est lu en flux (par blocs) avec suivi de progression
+LARGE_FILE_BYTES = 50 * 1024**2
+DEFAULT_BLOCK_SIZE = 8 * 1024**2
+# Une colonne texte devient catégorielle si (valeurs distinctes / valeurs non manquantes) <= ce ratio
+CATEGORY_MAX_RATIO = 0.5
+DATE_SAMPLE_SIZE = 1000
+DATE_MIN_PARSED_RATIO = 0.95
+DATE_PATTERN = re.compile(r"^\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}")
+# Formats essayés dans l'ordre, un seul par colonne : jour avant mois d'abord (fichiers français),
+# puis ISO 8601 ; le format mois/jour n'est retenu que si le format jour/mois échoue
+DATE_FORMATS = (
+    '%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y', 'ISO8601',
+    '%Y/%m/%d', '%d/%m/%y', '%m/%d/%Y', '%m/%d/%Y %H:%M', '%m/%d/%Y %H:%M:%S',
+)
+# Taille minimale des entiers : int8/int16 débordent en silence dans les calculs (ex. df.qty * df.price)
+MIN_INT_BYTES = 4
+
+
+class _ProgressReader(io.RawIOBase):
+    """Enveloppe un fichier binaire et signale la fraction d'octets lus."""
+
+    def __init__(self, raw, total_bytes, progress):
+        self._raw = raw
+        self._total = max(total_bytes, 1)
+        self._progress = progress
+        self._read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._raw.read(len(buffer))
+        buffer[:len(data)] = data
+        self._read += len(data)
+        self._progress(min(self._read / self._total, 1.0))
+        return len(data)
+
+
+def _file_size(file):
+    size = getattr(file, 'size', None)
+    if size is None:
+        position = file.tell()
+        size = file.seek(0, io.SEEK_END)
+        file.seek(position)
+    return size
+
+
+def _memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+def _parse_dates(values, date_format):
+    return pd.to_datetime(values.astype(str).str.strip(), errors='coerce', format=date_format)
+
+
+def _date_format(values):
+    """Format unique des dates de la colonne, déduit d'un échantillon, ou ``None`` si ce ne sont pas des dates."""
+    sample = values.dropna()
+    sample = sample.sample(min(len(sample), DATE_SAMPLE_SIZE), random_state=0) if len(sample) else sample
+    if not len(sample) or not sample.astype(str).str.match(DATE_PATTERN).all():
+        return None
+    for date_format in DATE_FORMATS:
+        if _parse_dates(sample, date_format).notna().mean() >= DATE_MIN_PARSED_RATIO:
+            return date_format
+    return None
+
+
+def _to_dates(values):
+    """``values`` converties en dates avec un seul format pour toute la colonne, ``None`` si trop de valeurs échouent."""
+    date_format = _date_format(values)
+    if date_format is None:
+        return None
+    parsed = _parse_dates(values, date_format)
+    if parsed.notna().sum() < DATE_MIN_PARSED_RATIO * values.notna().sum():
+        return None
+    return parsed
+
+
+def _downcast_integers(values):
+    downcast = pd.to_numeric(values, downcast='integer')
+    if downcast.dtype.itemsize >= MIN_INT_BYTES:
+        return downcast
+    return downcast.astype(np.int32 if isinstance(downcast.dtype, np.dtype) else 'Int32')
+
+
+def optimize_dtypes(df, max_category_ratio=CATEGORY_MAX_RATIO):
+    """Retourne une copie de ``df`` avec des types compacts.
+
+    - textes ressemblant à des dates -> ``datetime64``, avec un seul format par colonne (jour avant
+      mois si ambigu) et seulement si au moins 95 % des valeurs le respectent ;
+    - textes peu variés -> ``category`` ;
+    - entiers réduits à ``int32`` si possible (jamais moins) ; les flottants restent en ``float64`` : en
+      ``float32`` les sommes et moyennes de millions de valeurs perdent leurs décimales.
+    """
+    if not len(df.columns):
+        return df.copy()
+    columns = {}
+    for position, column in enumerate(df.columns):
+        values = df.iloc[:, position]
+        if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+            non_null = values.notna().sum()
+            dates = _to_dates(values) if non_null else None
+            if dates is not None:
+                values = dates
+            elif non_null and values.nunique() / non_null <= max_category_ratio:
+                values = values.astype('category')
+        elif pd.api.types.is_integer_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            values = _downcast_integers(values)
+        columns[position] = values
+    optimized = pd.concat(columns, axis=1)
+    optimized.columns = df.columns
+    return optimized
+
+
+def _open_stream(file, block_size, progress):
+    source = _ProgressReader(file, _file_size(file), progress) if progress else file
+    return pa_csv.open_csv(source, read_options=pa_csv.ReadOptions(block_size=block_size))
+
+
+def iter_csv_chunks(file, block_size=DEFAULT_BLOCK_SIZE, progress=None):
+    """Lit un CSV en flux avec pyarrow et produit un DataFrame par bloc de ``block_size`` octets.
+
+    Les types sont inférés sur le premier bloc ; ``pyarrow.ArrowInvalid`` est levée si un bloc
+    suivant ne les respecte pas.
+    """
+    for batch in _open_stream(file, block_size, progress):
+        yield batch.to_pandas()
+
+
+def load_csv(file, progress=None, block_size=DEFAULT_BLOCK_SIZE, optimize=True, large_file_bytes=LARGE_FILE_BYTES):
+    """Charge un CSV (chemin ou fichier binaire, ex. ``UploadedFile``) et retourne ``(df, rapport)``.
+
+    Les gros fichiers sont lus en flux avec ``progress(fraction)`` ; les autres avec le moteur
+    pyarrow de pandas. En cas d'échec de pyarrow, la lecture repart avec le moteur C de pandas.
+    Le rapport donne les durées de lecture/optimisation et la mémoire économisée.
+    """
+    if isinstance(file, (str, bytes)) or hasattr(file, '__fspath__'):
+        with open(file, 'rb') as f:
+            return load_csv(f, progress, block_size, optimize, large_file_bytes)
+
+    start = time.perf_counter()
+    size = _file_size(file)
+    engine = 'pyarrow-stream' if size >= large_file_bytes else 'pyarrow'
+    try:
+        if engine == 'pyarrow-stream':
+            df = _open_stream(file, block_size, progress).read_all().to_pandas()
+        else:
+            df = pd.read_csv(file, engine='pyarrow')
+    except (pa.ArrowInvalid, ValueError):
+        # Types incohérents entre blocs, encodage ou séparateur exotique : lecture classique
+        file.seek(0)
+        engine = 'c'
+        df = pd.read_csv(file)
+    parse_seconds = time.perf_counter() - start
+    if progress:
+        progress(1.0)
+
+    memory_before = _memory_mb(df)
+    start = time.perf_counter()
+    if optimize:
+        df = optimize_dtypes(df)
+    memory_after = _memory_mb(df)
+
+    report = {
+        'engine': engine,
+        'rows': df.shape[0],
+        'columns': df.shape[1],
+        'file_mb': size / 1024**2,
+        'parse_seconds': parse_seconds,
+        'optimize_seconds': time.perf_counter() - start,
+        'memory_before_mb': memory_before,
+        'memory_after_mb': memory_after,
+        'memory_saved_mb': memory_before - memory_after,
+    }
+    return df, report
@@ -0,0 +1,317 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import streamlit as st
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CLAUDE_CACHE_PATH = Path(os.getenv(
+    "CLAUDE_CACHE_PATH", Path.home() / ".cache" / "projet_final_data_viz" / "claude_responses.sqlite"
+))
+# Durée de validité d'une réponse (secondes) et nombre de réponses gardées en RAM
+CLAUDE_CACHE_TTL = float(os.getenv("CLAUDE_CACHE_TTL", str(7 * 24 * 3600)))
+CLAUDE_CACHE_ITEMS = int(os.getenv("CLAUDE_CACHE_ITEMS", "256"))
+
+
+class TextBlock:
+    """Bloc de texte d'une réponse mise en cache (même interface que ``anthropic.types.TextBlock``)."""
+
+    type = "text"
+
+    def __init__(self, text):
+        self.text = text
+
+
+class CachedMessage:
+    """Réponse relue depuis le cache : seul ``content`` (liste de blocs texte) est conservé."""
+
+    def __init__(self, texts):
+        self.content = [TextBlock(text) for text in texts]
+
+
+def request_key(params):
+    """Empreinte d'une requête : modèle, paramètres et messages, sérialisés de façon canonique."""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def response_texts(response):
+    """Textes des blocs d'une réponse Claude, ou ``None`` si la réponse n'est pas exploitable."""
+    content = getattr(response, "content", None)
+    if not isinstance(content, list):
+        return None
+    return [block.text for block in content if getattr(block, "text", None) is not None]
+
+
+class Flight:
+    """Appel Claude en cours, attendu par les requêtes identiques arrivées entre-temps."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.texts = None
+        self.error = None
+
+
+class ResponseCache:
+    """Cache des réponses de Claude : LRU en mémoire devant une base SQLite sur disque.
+
+    Les réponses sont indexées par ``request_key(params)`` et expirent après ``ttl`` secondes.
+    ``path=None`` désactive le niveau disque. Les requêtes identiques simultanées (plusieurs
+    sessions sur le même fichier) attendent l'appel déjà en cours au lieu d'en lancer un autre.
+    """
+
+    def __init__(self, path=CLAUDE_CACHE_PATH, ttl=CLAUDE_CACHE_TTL, max_items=CLAUDE_CACHE_ITEMS):
+        self.path = Path(path) if path is not None else None
+        self.ttl = ttl
+        self._memory = LRUCache(max_items=max_items)
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        if self.path is not None:
+            try:
+                self._init_db()
+            except sqlite3.Error:
+                # Disque en lecture seule ou base corrompue : cache en mémoire seulement
+                self.path = None
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _init_db(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, model TEXT, created REAL, texts TEXT)"
+            )
+            conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+
+    def _expired(self, created):
+        return time.time() - created > self.ttl
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, params):
+        """Textes de la réponse en cache pour ``params``, ou ``None``."""
+        key = request_key(params)
+        entry = self._memory.get(key)
+        if entry is not None and not self._expired(entry[0]):
+            self._count("memory_hits")
+            return entry[1]
+        if self.path is not None:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute("SELECT created, texts FROM responses WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is not None and not self._expired(row[0]):
+                texts = json.loads(row[1])
+                self._memory.put(key, (row[0], texts))
+                self._count("disk_hits")
+                return texts
+        self._memory.pop(key)
+        self._count("misses")
+        return None
+
+    def put(self, params, texts):
+        key, created = request_key(params), time.time()
+        self._memory.put(key, (created, texts))
+        if self.path is not None:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                        (key, params.get("model"), created, json.dumps(texts, ensure_ascii=False)),
+                    )
+            except sqlite3.Error:
+                pass
+
+    def discard(self, params):
+        """Oublie la réponse en cache pour ``params`` (ex. code généré qui ne s'exécute pas)."""
+        key = request_key(params)
+        self._memory.pop(key)
+        if self.path is not None:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            except sqlite3.Error:
+                pass
+
+    def _join(self, params):
+        """``(flight, leader)`` : l'appel en cours pour ``params``, ou un nouveau dont l'appelant est responsable."""
+        key = request_key(params)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                # Compté comme requête partagée plutôt que comme appel à l'API
+                self.misses -= 1
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+        # L'appel précédent a pu se terminer entre la lecture du cache et l'inscription
+        entry = self._memory.get(key)
+        if entry is not None and not self._expired(entry[0]):
+            self._land(params, flight, entry[1])
+            return flight, False
+        return flight, True
+
+    def _land(self, params, flight, texts=None, error=None):
+        """Publie le résultat de l'appel ``flight`` (texte, ou erreur à relever) à ceux qui l'attendent."""
+        flight.texts, flight.error = texts, error
+        with self._lock:
+            self._flights.pop(request_key(params), None)
+        flight.done.set()
+
+    @staticmethod
+    def _shared(flight):
+        """Réponse d'un appel partagé ; ``None`` s'il n'a rien donné d'exploitable (il faut rappeler l'API)."""
+        if flight.error is not None:
+            raise flight.error
+        return CachedMessage(flight.texts) if flight.texts else None
+
+    def create(self, client, **params):
+        """``client.messages.create(**params)`` en passant par le cache ; les réponses vides ne sont pas gardées."""
+        texts = self.get(params)
+        if texts is not None:
+            return CachedMessage(texts)
+        flight, leader = self._join(params)
+        if not leader:
+            flight.done.wait()
+            shared = self._shared(flight)
+            return shared if shared is not None else client.messages.create(**params)
+        try:
+            response = client.messages.create(**params)
+        except BaseException as e:
+            self._land(params, flight, error=e)
+            raise
+        texts = response_texts(response)
+        if texts:
+            self.put(params, texts)
+        self._land(params, flight, texts)
+        return response
+
+    async def acreate(self, client, limiter=None, **params):
+        """Version asynchrone de ``create`` pour ``anthropic.AsyncAnthropic``.
+
+        ``limiter`` (ex. ``asyncio.Semaphore``) borne les appels réseau simultanés ; les réponses
+        déjà en cache, ou attendues d'un appel identique en cours, sont rendues sans l'attendre.
+        """
+        texts = self.get(params)
+        if texts is not None:
+            return CachedMessage(texts)
+        flight, leader = self._join(params)
+        if not leader:
+            # L'appel partagé peut tourner dans la boucle d'événements d'une autre session
+            await asyncio.to_thread(flight.done.wait)
+            shared = self._shared(flight)
+            if shared is not None:
+                return shared
+        try:
+            async with limiter or contextlib.nullcontext():
+                response = await client.messages.create(**params)
+        except BaseException as e:
+            if leader:
+                self._land(params, flight, error=e)
+            raise
+        texts = response_texts(response)
+        if texts:
+            self.put(params, texts)
+        if leader:
+            self._land(params, flight, texts)
+        return response
+
+    def stream(self, client, metrics=None, **params):
+        """Produit le texte de la réponse au fil de l'eau (``client.messages.stream``), pour ``st.write_stream``.
+
+        Le texte complet est mis en cache à la fin du flux ; une réponse déjà en cache est
+        rendue d'un bloc, de même que celle d'un flux identique déjà en cours (``coalesced``).
+        ``metrics`` reçoit ``cached``, ``coalesced``, ``ttft_seconds`` (premier fragment) et
+        ``total_seconds``.
+        """
+        metrics = metrics if metrics is not None else {}
+        start = time.perf_counter()
+        texts = self.get(params)
+        if texts is not None:
+            metrics.update(cached=True, coalesced=False, ttft_seconds=time.perf_counter() - start)
+            yield from texts
+            metrics['total_seconds'] = time.perf_counter() - start
+            return
+
+        flight, leader = self._join(params)
+        if not leader:
+            flight.done.wait()
+            shared = self._shared(flight)
+            if shared is not None:
+                metrics.update(cached=False, coalesced=True, ttft_seconds=time.perf_counter() - start)
+                yield from (block.text for block in shared.content)
+                metrics['total_seconds'] = time.perf_counter() - start
+                return
+
+        metrics.update(cached=False, coalesced=False, ttft_seconds=None)
+        chunks, error = [], None
+        try:
+            with client.messages.stream(**params) as stream:
+                for text in stream.text_stream:
+                    if metrics['ttft_seconds'] is None:
+                        metrics['ttft_seconds'] = time.perf_counter() - start
+                    chunks.append(text)
+                    yield text
+            if chunks:
+                self.put(params, ["".join(chunks)])
+        except GeneratorExit:
+            # Flux abandonné (nouvelle exécution du script) : les autres sessions rappellent l'API
+            chunks = []
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if leader:
+                self._land(params, flight, ["".join(chunks)] if chunks else None, error)
+        metrics['total_seconds'] = time.perf_counter() - start
+        logger.info(
+            "Claude stream %s: first token %.2fs, total %.2fs",
+            params.get('model'), metrics['ttft_seconds'] or 0.0, metrics['total_seconds'],
+        )
+
+    def clear(self):
+        self._memory.clear()
+        if self.path is not None:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM responses")
+            except sqlite3.Error:
+                pass
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': (hits + self.coalesced) / (hits + self.coalesced + self.misses)
+                if hits + self.coalesced + self.misses else 0.0,
+                'memory_items': len(self._memory),
+            }
+
+
+@st.cache_resource
+def get_response_cache():
+    """Cache de réponses unique pour toutes les sessions du serveur."""
+    return ResponseCache()
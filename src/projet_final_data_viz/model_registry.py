@@ -0,0 +1,124 @@
+import threading
+import time
+import torch
+
+NOT_LOADED = 'not_loaded'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+# Délai (secondes) avant qu'un ``preload`` relance un chargement échoué (pas de téléchargement à chaque rerun)
+RETRY_SECONDS = 300
+
+
+def model_memory_bytes(model):
+    """Mémoire des poids d'un modèle PyTorch (tenseurs int8 compris) et des graphes ONNX qu'il embarque."""
+    total = 0
+    for value in model.state_dict().values():
+        for tensor in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(tensor, torch.Tensor):
+                total += tensor.numel() * tensor.element_size()
+    total += sum(getattr(module, 'onnx_bytes', 0) for module in model.modules())
+    return total
+
+
+class ModelRegistry:
+    """Registre des modèles du processus : un seul chargement par clé, partagé par toutes les sessions.
+
+    ``loader(key)`` retourne un tuple ``(tokenizer, model)``. Le chargement est paresseux
+    (premier ``get``) ou lancé en tâche de fond avec ``preload``. Après un échec, ``get`` (une
+    question posée) réessaie aussitôt, ``preload`` seulement après ``retry_seconds`` ou avec ``force``.
+    """
+
+    def __init__(self, loader, retry_seconds=RETRY_SECONDS, clock=time.monotonic):
+        self._loader = loader
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {'state': NOT_LOADED, 'value': None, 'error': None, 'seconds': None, 'failed_at': None,
+                     'done': threading.Event()}
+            self._entries[key] = entry
+        return entry
+
+    def _claim(self, key, retry_failed=True):
+        """Passe l'entrée en LOADING si personne ne la charge ; retourne (entry, à_charger)."""
+        with self._lock:
+            entry = self._entry(key)
+            if entry['state'] == FAILED and not retry_failed:
+                return entry, False
+            if entry['state'] in (NOT_LOADED, FAILED):
+                entry.update(state=LOADING, error=None)
+                entry['done'].clear()
+                return entry, True
+            return entry, False
+
+    def _load(self, key, entry):
+        start = time.perf_counter()
+        try:
+            value = self._loader(key)
+        except Exception as e:
+            with self._lock:
+                entry.update(state=FAILED, error=e, seconds=time.perf_counter() - start, failed_at=self._clock())
+        else:
+            with self._lock:
+                entry.update(state=READY, value=value, seconds=time.perf_counter() - start)
+        finally:
+            entry['done'].set()
+
+    def get(self, key):
+        """Retourne le modèle de ``key``, en le chargeant ou en attendant le chargement en cours.
+
+        Relève l'exception du loader si le chargement a échoué.
+        """
+        entry, should_load = self._claim(key)
+        if should_load:
+            self._load(key, entry)
+        entry['done'].wait()
+        if entry['state'] == FAILED:
+            raise entry['error']
+        return entry['value']
+
+    def preload(self, key, force=False):
+        """Lance le chargement de ``key`` dans un thread de fond (sans effet s'il est déjà lancé).
+
+        Un chargement échoué n'est relancé qu'après ``retry_seconds``, ou tout de suite avec ``force``.
+        """
+        with self._lock:
+            failed_at = self._entries[key]['failed_at'] if key in self._entries else None
+        retry = force or failed_at is None or self._clock() - failed_at >= self.retry_seconds
+        entry, should_load = self._claim(key, retry_failed=retry)
+        if should_load:
+            threading.Thread(target=self._load, args=(key, entry), name=f"model-preload-{key}", daemon=True).start()
+        return entry['state']
+
+    def state(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry['state'] if entry else NOT_LOADED
+
+    def status(self):
+        """État de chaque modèle : statut, durée de chargement, mémoire des poids et erreur éventuelle."""
+        with self._lock:
+            entries = list(self._entries.items())
+        report = []
+        for key, entry in entries:
+            memory = model_memory_bytes(entry['value'][1]) if entry['state'] == READY else None
+            report.append({
+                'key': key,
+                'state': entry['state'],
+                'load_seconds': entry['seconds'],
+                'memory_mb': memory / 1024**2 if memory is not None else None,
+                'error': str(entry['error']) if entry['error'] else None,
+            })
+        return report
+
+    def unload(self, key):
+        """Oublie le modèle de ``key`` (il sera rechargé au prochain ``get``)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['state'] != LOADING:
+                del self._entries[key]
@@ -0,0 +1,189 @@
+import math
+import os
+import numpy as np
+import pandas as pd
+from .cache import FrameMemo
+
+N_EXAMPLES = 5
+# Les exemples de valeurs sont cherchés dans les premières lignes avant de parcourir toute la colonne
+EXAMPLE_SCAN_ROWS = 1000
+
+# Profilage approché : activé automatiquement au-delà de ce nombre de lignes
+APPROX_ROW_THRESHOLD = int(os.getenv("PROFILE_APPROX_ROWS", "1000000"))
+# HyperLogLog : 2**14 registres, erreur relative type 1.04 / sqrt(2**14) ≈ 0.8 %
+HLL_PRECISION = 14
+# Doublons : seules les lignes dont l'empreinte vaut 0 modulo ce facteur sont examinées
+DUPLICATE_SAMPLING_FACTOR = 16
+MEMORY_SAMPLE_ROWS = 100_000
+RESERVOIR_CHUNK_ROWS = 1_000_000
+Z_95 = 1.96
+
+_profiles = FrameMemo()
+
+
+def _column_hashes(values):
+    """Empreintes 64 bits de toutes les valeurs d'une colonne (sans factorisation préalable)."""
+    return pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy()
+
+
+def combine_row_hashes(column_hashes):
+    """Combine les empreintes de colonnes en une empreinte par ligne (arithmétique 64 bits modulaire)."""
+    rows = np.zeros(len(column_hashes[0]) if column_hashes else 0, dtype=np.uint64)
+    for hashes in column_hashes:
+        rows = rows * np.uint64(0x100000001B3) ^ hashes
+    return rows
+
+
+def hyperloglog_count(hashes, precision=HLL_PRECISION):
+    """Estime le nombre de valeurs distinctes à partir de leurs empreintes 64 bits (HyperLogLog)."""
+    if not len(hashes):
+        return 0
+    m = 1 << precision
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    registers_index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+    remaining = hashes & np.uint64((1 << (64 - precision)) - 1)
+    # Rang du premier bit à 1 dans les 64 - p bits restants (exact : 50 bits tiennent dans un float64)
+    bit_length = np.frexp(remaining.astype(np.float64))[1]
+    rank = (64 - precision - bit_length + 1).astype(np.uint8)
+    registers = np.zeros(m, dtype=np.uint8)
+    np.maximum.at(registers, registers_index, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+def hyperloglog_error(precision=HLL_PRECISION):
+    """Borne d'erreur relative à 95 % de ``hyperloglog_count``."""
+    return Z_95 * 1.04 / math.sqrt(1 << precision)
+
+
+def estimate_duplicates(row_hashes, factor=DUPLICATE_SAMPLING_FACTOR):
+    """Estime le nombre de lignes dupliquées sur un échantillon choisi par empreinte de ligne.
+
+    Toutes les copies d'une ligne ont la même empreinte : elles sont échantillonnées ensemble,
+    et le nombre de doublons de l'échantillon multiplié par ``factor`` est sans biais.
+    Retourne ``(estimation, marge d'erreur à 95 %)``.
+    """
+    sample = row_hashes[row_hashes % np.uint64(factor) == 0]
+    copies = pd.Series(sample).value_counts().to_numpy()
+    extra_copies = copies[copies > 1] - 1
+    estimate = int(extra_copies.sum()) * factor
+    margin = Z_95 * math.sqrt(factor * (factor - 1) * float(np.sum(extra_copies.astype(np.float64) ** 2)))
+    return estimate, int(math.ceil(margin))
+
+
+def reservoir_sample(values, k, rng, mask=None, chunk_rows=RESERVOIR_CHUNK_ROWS):
+    """Échantillon uniforme de ``k`` valeurs non manquantes, lu en flux par blocs.
+
+    Réservoir à clés aléatoires : chaque valeur reçoit une clé uniforme et seules les ``k``
+    plus petites clés sont conservées d'un bloc à l'autre.
+    """
+    if mask is None:
+        mask = values.notna().to_numpy()
+    best_keys, best_positions = np.empty(0), np.empty(0, dtype=np.intp)
+    for start in range(0, len(values), chunk_rows):
+        positions = np.flatnonzero(mask[start:start + chunk_rows]) + start
+        keys = rng.random(len(positions))
+        keys, positions = np.concatenate([best_keys, keys]), np.concatenate([best_positions, positions])
+        if len(keys) > k:
+            keep = np.argpartition(keys, k)[:k]
+            keys, positions = keys[keep], positions[keep]
+        best_keys, best_positions = keys, positions
+    return values.iloc[best_positions[np.argsort(best_keys)]].tolist()
+
+
+def _examples(df, isna, n_examples):
+    """Premières valeurs non manquantes de chaque colonne, en ne lisant que le début de la table."""
+    head, head_isna = df.iloc[:EXAMPLE_SCAN_ROWS], isna.iloc[:EXAMPLE_SCAN_ROWS]
+    examples = []
+    for position in range(df.shape[1]):
+        values = head.iloc[:, position][~head_isna.iloc[:, position].to_numpy()]
+        if len(values) < n_examples and len(df) > EXAMPLE_SCAN_ROWS:
+            values = df.iloc[:, position].dropna()
+        examples.append([str(v) for v in values.iloc[:n_examples].tolist()])
+    return examples
+
+
+def _table_profile(df, missing, n_unique, examples, duplicates, memory_mb):
+    columns = pd.DataFrame({
+        'Colonne': df.columns,
+        'Type': [str(dtype) for dtype in df.dtypes],
+        'Valeurs Manquantes': missing,
+        'Valeurs Non Manquantes': len(df) - missing,
+        'Valeurs Uniques': n_unique,
+        'Exemples': examples,
+    })
+    return {
+        'rows': df.shape[0],
+        'columns': df.shape[1],
+        'missing': int(missing.sum()),
+        'duplicates': duplicates,
+        'numeric_columns': df.select_dtypes(include=np.number).shape[1],
+        'categorical_columns': df.select_dtypes(include=['object', 'category']).shape[1],
+        'datetime_columns': df.select_dtypes(include=['datetime64']).shape[1],
+        'memory_mb': memory_mb,
+        'column_stats': columns,
+        'approximate': False,
+        'estimates': {},
+    }
+
+
+def compute_profile(df, n_examples=N_EXAMPLES):
+    """Calcule en une passe vectorisée toutes les statistiques de table et de colonnes de ``df``."""
+    isna = df.isna()
+    return _table_profile(
+        df,
+        missing=isna.sum().to_numpy(),
+        n_unique=df.nunique().to_numpy(),
+        examples=_examples(df, isna, n_examples),
+        duplicates=int(df.duplicated().sum()),
+        memory_mb=df.memory_usage(deep=True, index=True).sum() / 1024**2,
+    )
+
+
+def compute_approximate_profile(df, n_examples=N_EXAMPLES, seed=0):
+    """Profil approché pour les très grandes tables.
+
+    Valeurs distinctes par HyperLogLog, doublons estimés sur un échantillon par empreinte,
+    exemples tirés par réservoir et mémoire extrapolée d'un échantillon de lignes. Chaque
+    estimation est décrite dans ``profile['estimates']`` avec sa borne d'erreur à 95 %.
+    """
+    rng = np.random.default_rng(seed)
+    notna = df.notna()
+    missing = len(df) - notna.sum().to_numpy()
+    column_hashes, n_unique, examples = [], [], []
+    for position in range(df.shape[1]):
+        values, mask = df.iloc[:, position], notna.iloc[:, position].to_numpy()
+        hashes = _column_hashes(values)
+        column_hashes.append(hashes)
+        n_unique.append(hyperloglog_count(hashes[mask]))
+        examples.append([str(v) for v in reservoir_sample(values, n_examples, rng, mask)])
+    # Les empreintes de colonnes servent aussi à l'estimation des doublons
+    duplicates, duplicates_margin = estimate_duplicates(combine_row_hashes(column_hashes))
+    sample = df.sample(n=min(len(df), MEMORY_SAMPLE_ROWS), random_state=seed)
+    memory_mb = sample.memory_usage(deep=True, index=True).sum() * len(df) / max(len(sample), 1) / 1024**2
+
+    profile = _table_profile(df, missing, np.array(n_unique), examples, duplicates, memory_mb)
+    profile['approximate'] = True
+    profile['estimates'] = {
+        'distinct': {'method': 'HyperLogLog', 'relative_error': hyperloglog_error()},
+        'duplicates': {'method': f"échantillon 1/{DUPLICATE_SAMPLING_FACTOR} par empreinte", 'margin': duplicates_margin},
+        'examples': {'method': 'réservoir'},
+        'memory_mb': {'method': f"extrapolation de {len(sample)} lignes"},
+    }
+    return profile
+
+
+def profile_dataset(df, n_examples=N_EXAMPLES, approximate=None):
+    """Profil de ``df``, calculé une seule fois par DataFrame.
+
+    ``approximate=None`` choisit le profil approché au-delà de ``APPROX_ROW_THRESHOLD`` lignes.
+    """
+    if approximate is None:
+        approximate = len(df) > APPROX_ROW_THRESHOLD
+    compute = compute_approximate_profile if approximate else compute_profile
+    return _profiles.get(df, ('profile', n_examples, approximate), lambda: compute(df, n_examples))
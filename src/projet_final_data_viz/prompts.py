@@ -0,0 +1,207 @@
+import logging
+import os
+import pandas as pd
+from .cache import FrameMemo
+from .profiler import profile_dataset
+
+logger = logging.getLogger(__name__)
+
+CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
+MAX_TOKENS = 500
+# Budget (en tokens estimés) de la description du jeu de données envoyée à Claude
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "800"))
+# Préfixe minimal mis en cache par Anthropic (Sonnet) : en dessous, ``cache_control`` est sans effet
+PROMPT_CACHE_MIN_TOKENS = 1024
+# Environ 4 caractères par token pour du texte latin : estimation sans appel réseau
+CHARS_PER_TOKEN = 4
+SAMPLE_ROWS = 3
+MAX_VALUE_CHARS = 30
+N_EXAMPLES = 3
+# Colonnes avec au plus ce nombre de valeurs distinctes : candidates pour un regroupement
+GROUPING_MAX_DISTINCT = 50
+NAMES_BUDGET_SHARE = 0.2
+
+SYSTEM_ROLE = "Tu es un expert en visualisation de données."
+
+SUGGESTION_INSTRUCTIONS = """Propose 5 types de graphiques intéressants à générer en utilisant Plotly en fonction des colonnes disponibles.
+Les propositions doivent être sous forme de liste numérotée et ne pas utiliser de pie charts.
+Elles doivent être compréhensibles pour des personnes non expertes."""
+
+PLOTLY_RULES = """Tu devras respecter les bonnes pratiques de la data vizualisation :
+Évitez toute redondance dans la visualisation des bar charts :
+-Soit affichez l'axe des y avec des repères indiquant la position des barres
+-soit optez pour un étiquetage direct en supprimant l'axe des y.
+Par ailleurs, il peut être judicieux de distinguer la barre la plus élevée en lui attribuant une couleur différente,
+Ordonner les barres de manière décroissante lorsque l'ordre de l'axe des x n'est pas indispensable.
+Supprimez également les cadres ou bordures inutiles qui nuisent à l'esthétique.
+Évitez d'utiliser des bar charts dans des contextes trop complexes.
+
+Retourne uniquement le code Python de la figure, sans texte supplémentaire sachant que ta dataframe s'appelle df.
+Ne donne que du code brut, prêt à l'utilisation, sans explication !!!
+Entoure le code de crochets !
+N'oublies pas d'eviter ces erreur :
+-❌ Error executing the code: 'Figure' object has no attribute 'update_xaxis'
+-❌ Error executing the code: 'Figure' object has no attribute 'update_yaxis
+Exemple : [ sales_by_category = df.groupby('x')['y'].sum().reset_index()
+
+fig = px.bar(sales_by_category, x='x', y='y',
+         title="Somme des Valeurs par Catégorie")]"""
+
+_contexts = FrameMemo()
+
+
+def estimate_tokens(text):
+    """Nombre de tokens estimé d'un texte."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _short(value, max_chars=MAX_VALUE_CHARS):
+    value = str(value).replace("\n", " ")
+    return value if len(value) <= max_chars else value[:max_chars - 1] + "…"
+
+
+def column_relevance(stats, rows):
+    """Score de pertinence d'une colonne pour la visualisation (plus haut = plus utile).
+
+    Colonnes complètes favorisées, de même que les dates et les colonnes peu variées (bonnes
+    candidates pour un regroupement) ; colonnes constantes et identifiants pénalisés.
+    """
+    non_missing = stats['Valeurs Non Manquantes']
+    completeness = non_missing / rows if rows else 1.0
+    distinct = stats['Valeurs Uniques']
+    dtype = stats['Type']
+    if distinct <= 1:
+        return 0.1 * completeness
+    if dtype in ('object', 'string') and rows > 1 and distinct >= non_missing:
+        return 0.3 * completeness
+    if dtype.startswith('datetime') or dtype == 'category' or distinct <= GROUPING_MAX_DISTINCT:
+        return 1.2 * completeness
+    return completeness
+
+
+def _column_line(stats, rows, value_range=None):
+    missing = stats['Valeurs Manquantes'] / rows * 100 if rows else 0.0
+    if value_range is not None:
+        values = f"de {value_range[0]:.4g} à {value_range[1]:.4g}"
+    else:
+        values = "ex. : " + ", ".join(_short(value) for value in stats['Exemples'][:N_EXAMPLES])
+    return (
+        f"- {stats['Colonne']} ({stats['Type']}) · {stats['Valeurs Uniques']} distinctes"
+        f" · {missing:.0f}% manquantes · {values}"
+    )
+
+
+def _numeric_ranges(df):
+    ranges = {}
+    for position in range(df.shape[1]):
+        values = df.iloc[:, position]
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype) and values.notna().any():
+            ranges[position] = (values.min(), values.max())
+    return ranges
+
+
+def build_dataset_context(df, budget=PROMPT_TOKEN_BUDGET):
+    """Description compacte du jeu de données (schéma + quelques lignes) tenant dans ``budget`` tokens.
+
+    Les colonnes sont retenues par ordre de pertinence puis affichées dans leur ordre d'origine ;
+    les colonnes non détaillées sont seulement nommées, tant que le budget le permet.
+    """
+    profile = profile_dataset(df)
+    rows = profile['rows']
+    header = f"Jeu de données : {rows} lignes, {profile['columns']} colonnes.\nColonnes :"
+    used = estimate_tokens(header)
+
+    stats = profile['column_stats'].to_dict('records')
+    ranges = _numeric_ranges(df)
+    order = sorted(range(len(stats)), key=lambda i: -column_relevance(stats[i], rows))
+    candidates = {i: _column_line(stats[i], rows, ranges.get(i)) for i in order}
+    costs = {i: estimate_tokens(line) + 1 for i, line in candidates.items()}
+    # Si tout ne tient pas, une part du budget est gardée pour nommer les colonnes non détaillées
+    detail_budget = budget if used + sum(costs.values()) <= budget else int(budget * (1 - NAMES_BUDGET_SHARE))
+    lines, kept = {}, []
+    for i in order:
+        if used + costs[i] > detail_budget:
+            continue
+        lines[i] = candidates[i]
+        kept.append(i)
+        used += costs[i]
+    kept.sort()
+    parts = [header] + [lines[i] for i in kept]
+
+    omitted = [str(stats[i]['Colonne']) for i in range(len(stats)) if i not in lines]
+    if omitted:
+        names = []
+        for name in omitted:
+            cost = estimate_tokens(name) + 1
+            if used + cost > budget - 10:
+                break
+            names.append(name)
+            used += cost
+        rest = len(omitted) - len(names)
+        line = "Autres colonnes : " + ", ".join(names) if names else "Autres colonnes :"
+        parts.append(line + (f" (+{rest} non listées)" if rest else ""))
+
+    if kept:
+        sample = df.iloc[:SAMPLE_ROWS, kept].map(_short).to_csv(index=False)
+        if used + estimate_tokens(sample) <= budget:
+            parts.append("Premières lignes (CSV) :\n" + sample.rstrip())
+    return "\n".join(parts)
+
+
+def dataset_context(df, budget=PROMPT_TOKEN_BUDGET):
+    """``build_dataset_context`` calculé une seule fois par DataFrame."""
+    return _contexts.get(df, ('context', budget), lambda: build_dataset_context(df, budget))
+
+
+def message_params(prompt, max_tokens=MAX_TOKENS, system=None):
+    """Paramètres de ``messages.create`` pour un prompt utilisateur unique (et un système optionnel)."""
+    params = {
+        'model': CLAUDE_MODEL,
+        'max_tokens': max_tokens,
+        'messages': [{"role": "user", "content": prompt}],
+    }
+    if system:
+        params['system'] = system
+    return params
+
+
+def cached_block(text):
+    """Bloc système marqué pour le cache de prompt d'Anthropic (préfixe réutilisé d'un appel à l'autre)."""
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+
+
+def dataset_system(df, *instructions):
+    """Blocs système : rôle + description du jeu de données (préfixe commun à tous les appels), puis consignes.
+
+    Un seul point de cache, sur le dernier bloc : le préfixe mis en cache couvre tout le système,
+    et il n'est marqué que s'il atteint ``PROMPT_CACHE_MIN_TOKENS`` (sinon Anthropic l'ignore).
+    """
+    texts = [f"{SYSTEM_ROLE}\n\n{dataset_context(df)}", *instructions]
+    blocks = [{"type": "text", "text": text} for text in texts]
+    if sum(estimate_tokens(text) for text in texts) >= PROMPT_CACHE_MIN_TOKENS:
+        blocks[-1] = cached_block(texts[-1])
+    return blocks
+
+
+def prompt_tokens(params):
+    """Tokens d'entrée estimés d'une requête (système + messages)."""
+    system = params.get('system') or []
+    texts = [system] if isinstance(system, str) else [block['text'] for block in system]
+    texts += [message['content'] for message in params['messages']]
+    return sum(estimate_tokens(text) for text in texts)
+
+
+def _log_request(name, params):
+    logger.info("Prompt %s: ~%d input tokens", name, prompt_tokens(params))
+    return params
+
+
+def suggest_graphs_request(df):
+    """Requête de 5 suggestions de graphiques pour ``df``."""
+    return _log_request('suggest_graphs', message_params(SUGGESTION_INSTRUCTIONS, system=dataset_system(df)))
+
+
+def plotly_code_request(df, chart_type):
+    """Requête du code Plotly du graphique ``chart_type`` ; seul le message utilisateur change d'un graphique à l'autre."""
+    prompt = f'Tu dois me donner un code Python représentant un graphique avec Plotly correspondant à "{chart_type}" sans aucune explication.'
+    return _log_request('plotly_code', message_params(prompt, system=dataset_system(df, PLOTLY_RULES)))
@@ -0,0 +1,76 @@
+import os
+import pickle
+import zlib
+import streamlit as st
+from .cache import LRUCache
+
+# Réponses aux questions sur les données gardées en RAM (toutes sessions confondues)
+QUERY_CACHE_ITEMS = int(os.getenv("QUERY_CACHE_ITEMS", "2048"))
+QUERY_CACHE_MB = int(os.getenv("QUERY_CACHE_MB", "64"))
+
+
+def normalize_question(question):
+    """Question en minuscules, espaces superflus supprimés (le moteur de questions ignore la casse)."""
+    return " ".join(question.lower().split())
+
+
+def query_key(dataset_key, question, engine):
+    return (dataset_key, normalize_question(question), engine)
+
+
+def pack(result):
+    """Résultat sérialisé et compressé, tel qu'il est gardé en cache."""
+    return zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def unpack(blob):
+    return pickle.loads(zlib.decompress(blob))
+
+
+class Uncached:
+    """Résultat à renvoyer sans le mettre en cache : réponse dégradée (modèle absent, chunks non évalués)."""
+
+    __slots__ = ('result',)
+
+    def __init__(self, result):
+        self.result = result
+
+
+class QueryCache:
+    """Cache LRU des réponses aux questions, indexé par (empreinte du jeu de données, question, moteur).
+
+    ``engine`` identifie tout ce qui influence la réponse (version du moteur, modèle, options) :
+    le changer suffit à invalider les réponses précédentes. Les réponses sont stockées
+    compressées ; chaque lecture renvoie une copie indépendante.
+    """
+
+    def __init__(self, max_items=QUERY_CACHE_ITEMS, max_mb=QUERY_CACHE_MB):
+        self._entries = LRUCache(max_items=max_items, max_bytes=max_mb * 1024**2, sizeof=len)
+
+    def answer(self, question, df, dataset_key, compute, engine):
+        """Réponse en cache à ``question`` sur ``df``, sinon ``compute(question, df)``.
+
+        Le résultat est mis en cache sauf s'il est None ou enveloppé dans ``Uncached``.
+        """
+        key = query_key(dataset_key, question, engine)
+        blob = self._entries.get(key)
+        if blob is not None:
+            return unpack(blob)
+        result = compute(question, df)
+        if isinstance(result, Uncached):
+            return result.result
+        if result is not None:
+            self._entries.put(key, pack(result))
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return self._entries.stats()
+
+
+@st.cache_resource
+def get_query_cache():
+    """Cache de réponses unique pour toutes les sessions du serveur."""
+    return QueryCache()
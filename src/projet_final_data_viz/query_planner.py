@@ -0,0 +1,452 @@
+import logging
+import re
+import threading
+import numpy as np
+import pandas as pd
+from .aggregation import aggregate, aggregation_label, answer_aggregation, format_grouped, format_values, numeric_column
+from .cache import FrameMemo
+from .question_parser import AGGREGATION_PATTERNS, LIST_PATTERN, column_tokens, get_column_index, plural_forms
+
+logger = logging.getLogger(__name__)
+
+# Colonnes texte dont les valeurs sont reconnues dans les questions (au-delà : trop de valeurs distinctes)
+VALUE_INDEX_MAX_DISTINCT = 5000
+VALUE_SAMPLE_ROWS = 20000
+MAX_VALUE_TOKENS = 4
+# Une valeur d'un seul mot plus courte n'est reconnue que précédée du nom de sa colonne (« category a »)
+MIN_VALUE_CHARS = 3
+
+STOP_WORDS = frozenset("""
+a an the of by in on at to for from with and or is are was were be what which who how many much
+show list display give me all each every per rows records entries total sum average mean count
+number min max top bottom first last highest lowest most least distinct unique
+""".split())
+# Mots tolérés entre un nom de colonne et la comparaison ou la valeur qui le suit
+LINK_WORDS = frozenset(['is', 'are', 'was', 'were', 'of', 'equals', 'equal', 'to', 'with', 'where', 'whose', 'having', 'has'])
+# Autres mots des formes de question reconnues : un mot ni ici, ni dans STOP_WORDS, ni dans un nom de colonne
+# (« how many apples were sold ») n'est pas compris par le plan et la question part à TAPAS
+PLAN_WORDS = LINK_WORDS | frozenset("""
+have had sold got largest biggest greatest smallest fewest avg minimum maximum different terms according grouped
+across do does did there please tell find get return value values lines orders transactions times
+""".split())
+
+OPERATION_WORDS = {
+    'sum': 'sum', 'total': 'sum', 'average': 'mean', 'mean': 'mean', 'avg': 'mean', 'count': 'count',
+    'number': 'count', 'min': 'min', 'minimum': 'min', 'max': 'max', 'maximum': 'max',
+}
+DESCENDING_WORDS = frozenset(['top', 'highest', 'largest', 'biggest', 'greatest', 'most', 'first'])
+# « which product has the highest price » : valeur maximale du groupe ; « most » / « least » gardent la somme (ou le compte)
+SUPERLATIVE_OPERATIONS = {
+    'highest': 'max', 'largest': 'max', 'biggest': 'max', 'greatest': 'max', 'lowest': 'min', 'smallest': 'min',
+}
+
+NUMBER = r'-?\d+(?:\.\d+)?'
+DATE = r'(\d{4}-\d{1,2}-\d{1,2}|\d{4}/\d{1,2}/\d{1,2}|\d{4}-\d{1,2}|(?:19|20)\d{2})'
+# (motif, bornes) : chaque borne est (indice du groupe, 'start' ou 'end' de la période, comparaison)
+DATE_PATTERNS = [
+    (re.compile(rf'\b(?:between|from) {DATE} (?:and|to|until) {DATE}\b'), [(1, 'start', 'ge'), (2, 'end', 'le')]),
+    (re.compile(rf'\bafter {DATE}\b'), [(1, 'end', 'gt')]),
+    (re.compile(rf'\b(?:since|from|starting) {DATE}\b'), [(1, 'start', 'ge')]),
+    (re.compile(rf'\bbefore {DATE}\b'), [(1, 'start', 'lt')]),
+    (re.compile(rf'\b(?:until|through) {DATE}\b'), [(1, 'end', 'le')]),
+    (re.compile(rf'\b(?:in|during) {DATE}\b'), [(1, 'start', 'ge'), (1, 'end', 'le')]),
+]
+COMPARISON_OPERATORS = {
+    'greater than or equal to': 'ge', 'at least': 'ge', 'no less than': 'ge', '>=': 'ge',
+    'less than or equal to': 'le', 'at most': 'le', 'no more than': 'le', '<=': 'le',
+    'greater than': 'gt', 'more than': 'gt', 'higher than': 'gt', 'above': 'gt', 'over': 'gt', 'exceeding': 'gt', '>': 'gt',
+    'less than': 'lt', 'lower than': 'lt', 'below': 'lt', 'under': 'lt', '<': 'lt',
+    'equal to': 'eq', 'equals': 'eq', 'is': 'eq', '==': 'eq', '=': 'eq',
+}
+_operators = "|".join(
+    rf'\b{re.escape(word)}\b' if word[0].isalpha() else re.escape(word)
+    for word in sorted(COMPARISON_OPERATORS, key=len, reverse=True)
+)
+COMPARISON_PATTERN = re.compile(rf'(?P<op>{_operators})\s*(?P<number>{NUMBER})(?![\w.])')
+NUMERIC_BETWEEN_PATTERN = re.compile(rf'\bbetween (?P<low>{NUMBER}) and (?P<high>{NUMBER})(?![\w.])')
+
+DISTINCT_PATTERN = re.compile(
+    r'\b(?:(?:how many|number of|count(?: of)?) (?:distinct|unique|different)|(?:distinct|unique) count of) (.+)'
+)
+TOP_PATTERN = re.compile(
+    r'\b(top|bottom|highest|lowest|largest|smallest|biggest|first|last) (\d+)\b ?(.*?) ?\b(?:by|in terms of|according to) (.+)'
+)
+TOP_SUFFIX_PATTERN = re.compile(r'\b(\d+) (highest|largest|biggest|top|lowest|smallest|bottom) (.+)')
+WHICH_PATTERN = re.compile(
+    r'\b(?:which|what(?: is| was| are)?(?: the)?) (.+?) (?:has|have|had|with|sold|got) (?:the )?(highest|most|largest|biggest|greatest|lowest|least|smallest|fewest)\b ?(.*)'
+)
+GROUP_PATTERN = re.compile(
+    r'\b(sum|total|average|mean|avg|count|number|min|minimum|max|maximum)\b(?: of)? ?(.*?) ?\b(?:by|per|for each|for every|across|grouped by) (.+)'
+)
+COUNT_ROWS_PATTERN = re.compile(r'\b(how many|number of|count)\b')
+
+
+def _is_measure(df, column):
+    dtype = df.dtypes[column]
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _phrase_pattern(column):
+    *head, last = column_tokens(column)
+    last = "|".join(map(re.escape, [last, *plural_forms(last)]))
+    return re.compile(r'\b' + "".join(re.escape(token) + r'[\W_]+' for token in head) + rf'(?:{last})\b')
+
+
+def build_value_index(df):
+    """Map of value tokens -> ``[(column, value), ...]`` for the text columns with few distinct values."""
+    index = {}
+    for column, dtype in df.dtypes.items():
+        values = df[column]
+        if isinstance(dtype, pd.CategoricalDtype):
+            uniques = dtype.categories
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            # Les colonnes de type identifiant sont écartées sur un échantillon, sans parcourir toute la table
+            if len(pd.unique(values.iloc[:VALUE_SAMPLE_ROWS])) > VALUE_INDEX_MAX_DISTINCT // 2:
+                continue
+            uniques = pd.unique(values)
+        else:
+            continue
+        if len(uniques) > VALUE_INDEX_MAX_DISTINCT:
+            continue
+        for value in uniques:
+            if isinstance(value, str):
+                tokens = column_tokens(value)
+                if 0 < len(tokens) <= MAX_VALUE_TOKENS:
+                    index.setdefault(tokens, []).append((column, value))
+    return index
+
+
+_value_indexes = FrameMemo()
+
+
+def get_value_index(df):
+    return _value_indexes.get(df, 'value_index', lambda: build_value_index(df))
+
+
+def _extract_dates(text, df, index, filters):
+    date_columns = [column for column, dtype in df.dtypes.items() if pd.api.types.is_datetime64_any_dtype(dtype)]
+    if not date_columns:
+        return text
+    mentioned = [column for _, _, column in index.find_all(column_tokens(text)) if column in date_columns]
+    column = mentioned[0] if mentioned else date_columns[0]
+    for pattern, bounds in DATE_PATTERNS:
+        match = pattern.search(text)
+        if match is None:
+            continue
+        try:
+            periods = {group: pd.Period(match.group(group).replace('/', '-')) for group, _, _ in bounds}
+        except ValueError:
+            continue
+        for group, side, operator in bounds:
+            period = periods[group]
+            filters.append((column, operator, period.start_time if side == 'start' else period.end_time))
+        text = text[:match.start()] + " " + text[match.end():]
+        if mentioned:
+            text = _phrase_pattern(column).sub(" ", text)
+    return text
+
+
+def _comparison_column(text, end, df, index):
+    """Numeric column named just before ``text[end]`` and the position where its name starts."""
+    tokens = list(column_tokens(text[:end]))
+    while tokens and tokens[-1] in LINK_WORDS:
+        tokens.pop()
+    found = index.find_at_end(tokens) if tokens else None
+    # Les dates sont comparées par DATE_PATTERNS, et un nombre n'a pas de sens face à une colonne texte
+    if found is None or not _is_measure(df, found[1]):
+        return None, None
+    matches = list(_phrase_pattern(found[1]).finditer(text[:end]))
+    return (found[1], matches[-1].start()) if matches else (None, None)
+
+
+def _extract_comparisons(text, df, index, filters):
+    for pattern in (NUMERIC_BETWEEN_PATTERN, COMPARISON_PATTERN):
+        replacements = []
+        for match in pattern.finditer(text):
+            column, start = _comparison_column(text, match.start(), df, index)
+            if column is None:
+                continue
+            if pattern is NUMERIC_BETWEEN_PATTERN:
+                filters.extend([(column, 'ge', float(match['low'])), (column, 'le', float(match['high']))])
+            else:
+                filters.append((column, COMPARISON_OPERATORS[match['op']], float(match['number'])))
+            replacements.append((start, match.end()))
+        for start, end in reversed(replacements):
+            text = text[:start] + " " + text[end:]
+    return text
+
+
+def _extract_values(tokens, df, index, filters):
+    """Replace the column values cited in ``tokens`` by ``('in', values)`` filters; returns the other tokens."""
+    values = get_value_index(df)
+    column_positions = {position for start, stop, _ in index.find_all(tokens) for position in range(start, stop)}
+    consumed = [False] * len(tokens)
+    selected = {}
+    for size in range(min(MAX_VALUE_TOKENS, len(tokens)), 0, -1):
+        for start in range(len(tokens) - size + 1):
+            entries = values.get(tuple(tokens[start:start + size]))
+            if not entries or any(consumed[start:start + size]):
+                continue
+            # Nom de colonne juste avant la valeur (« city paris », « city is paris ») : il lève l'ambiguïté
+            head, first = list(tokens[:start]), start
+            while head and head[-1] in LINK_WORDS and not consumed[len(head) - 1]:
+                head.pop()
+            named = index.find_at_end(head) if head else None
+            if named is not None and any(column == named[1] for column, _ in entries) \
+                    and not any(consumed[len(head) - named[0]:len(head)]):
+                column, first = named[1], len(head) - named[0]
+            elif all(position in column_positions for position in range(start, start + size)):
+                continue
+            elif size == 1 and (len(tokens[start]) < MIN_VALUE_CHARS or tokens[start] in STOP_WORDS):
+                continue
+            else:
+                column = entries[0][0]
+            selected.setdefault(column, []).extend(value for name, value in entries if name == column)
+            consumed[first:start + size] = [True] * (start + size - first)
+    for column, column_values in selected.items():
+        filters.append((column, 'in', list(dict.fromkeys(column_values))))
+    return [token for token, used in zip(tokens, consumed) if not used]
+
+
+def _columns(words, df, index):
+    return [column for _, _, column in index.find_all(column_tokens(words))]
+
+
+def _measure(words, df, index, default='sum'):
+    """``(operation, column)`` named in ``words``: first numeric column (else first column) and operation word."""
+    columns = _columns(words, df, index)
+    measures = [column for column in columns if _is_measure(df, column)]
+    operation = next((OPERATION_WORDS[word] for word in column_tokens(words) if word in OPERATION_WORDS), default)
+    return operation, (measures or columns or [None])[0]
+
+
+def _counted(operation, column, df):
+    """``(operation, column)`` to run: a count of a text column counts the rows; None for another operation on text."""
+    if column is None or _is_measure(df, column):
+        return operation, column
+    return ('count', None) if operation == 'count' else None
+
+
+def _unknown_words(words, index):
+    """Words of ``words`` that are neither stop words nor part of a column name."""
+    tokens = column_tokens(words)
+    named = {position for start, stop, _ in index.find_all(tokens) for position in range(start, stop)}
+    return [token for position, token in enumerate(tokens) if position not in named and token not in STOP_WORDS]
+
+
+def _plan_form(tokens, df, index):
+    """Plan for the question words left once the constraints are extracted, and the numbers it uses."""
+    rest = " ".join(tokens)
+
+    match = DISTINCT_PATTERN.search(rest)
+    if match:
+        columns = _columns(match.group(1), df, index)
+        return ({'kind': 'distinct_count', 'column': columns[0]}, ()) if columns else (None, ())
+
+    match = TOP_PATTERN.search(rest)
+    if match:
+        word, limit, subject, measure_words = match.groups()
+        if _unknown_words(subject, index):
+            # « top 2 countries by sales » sans colonne country : ce ne sont pas des lignes
+            return None, ()
+        operation, column = _measure(measure_words, df, index)
+        group_by = [name for name in _columns(subject, df, index) if name != column]
+        measure = _counted(operation, column, df)
+        if measure is None:
+            return None, ()
+        operation, column = measure
+        if group_by:
+            return {
+                'kind': 'top_groups', 'group_by': group_by, 'operation': operation if column else 'count',
+                'column': column, 'limit': int(limit), 'descending': word in DESCENDING_WORDS,
+            }, (limit,)
+        if column is not None:
+            return {'kind': 'top_rows', 'column': column, 'limit': int(limit), 'descending': word in DESCENDING_WORDS}, (limit,)
+        return None, ()
+
+    match = TOP_SUFFIX_PATTERN.search(rest)
+    if match:
+        limit, word, measure_words = match.groups()
+        _, column = _measure(measure_words, df, index)
+        if column is not None and _is_measure(df, column):
+            return {'kind': 'top_rows', 'column': column, 'limit': int(limit), 'descending': word in DESCENDING_WORDS}, (limit,)
+
+    match = WHICH_PATTERN.search(rest)
+    if match and not OPERATION_WORDS.keys() & set(column_tokens(match.group(1))):
+        subject, word, measure_words = match.groups()
+        if _unknown_words(subject, index):
+            return None, ()
+        group_by = _columns(subject, df, index)
+        operation, column = _measure(measure_words, df, index, default=None)
+        if operation is None:
+            numeric = column is not None and _is_measure(df, column)
+            operation = SUPERLATIVE_OPERATIONS.get(word, 'sum') if numeric else 'count'
+        measure = _counted(operation, column, df)
+        if measure is None:
+            return None, ()
+        operation, column = measure
+        if group_by:
+            return {
+                'kind': 'top_groups', 'group_by': group_by, 'operation': operation if column else 'count',
+                'column': column, 'limit': 1, 'descending': word in DESCENDING_WORDS,
+            }, ()
+
+    match = GROUP_PATTERN.search(rest)
+    if match:
+        word, measure_words, group_words = match.groups()
+        _, column = _measure(measure_words, df, index)
+        group_by = [name for name in _columns(group_words, df, index) if name != column]
+        measure = _counted(OPERATION_WORDS[word], column, df)
+        if measure is None:
+            return None, ()
+        operation, column = measure
+        if group_by and (column is not None or operation == 'count'):
+            return {'kind': 'aggregate', 'operation': operation, 'column': column, 'group_by': group_by}, ()
+
+    if COUNT_ROWS_PATTERN.search(rest):
+        return {'kind': 'aggregate', 'operation': 'count', 'column': None, 'group_by': None}, ()
+
+    for operation, pattern in AGGREGATION_PATTERNS.items():
+        if pattern.search(rest):
+            _, column = _measure(rest, df, index)
+            if column is not None:
+                measure = _counted(operation, column, df)
+                if measure is None:
+                    return None, ()
+                operation, column = measure
+                return {'kind': 'aggregate', 'operation': operation, 'column': column, 'group_by': None}, ()
+
+    columns = _columns(rest, df, index)
+    if columns and LIST_PATTERN.search(rest):
+        return {'kind': 'values', 'column': columns[0]}, ()
+    return None, ()
+
+
+def plan_question(question, df):
+    """Compile ``question`` into a pandas plan (dict), or return None when no rule applies.
+
+    Constraints are extracted first: date ranges on a datetime column, numeric comparisons
+    (``sales over 100``, ``between 10 and 20``) and column values (``in Paris``). The remaining
+    words select the plan: distinct count, top-k rows or groups, aggregation over one or several
+    group keys, row count or listing of a column. A number or a word the plan does not explain
+    means the question was not understood: None is returned and the question goes to TAPAS.
+    """
+    index = get_column_index(df)
+    filters = []
+    text = " ".join(question.lower().split())
+    text = _extract_dates(text, df, index, filters)
+    text = _extract_comparisons(text, df, index, filters)
+    tokens = _extract_values(list(column_tokens(text)), df, index, filters)
+    plan, numbers = _plan_form(tokens, df, index)
+    if plan is None:
+        return None
+    column_positions = {position for start, stop, _ in index.find_all(tokens) for position in range(start, stop)}
+    unexplained = [
+        token for position, token in enumerate(tokens) if position not in column_positions and (
+            token not in numbers if token.isdigit() else token not in STOP_WORDS and token not in PLAN_WORDS
+        )
+    ]
+    if unexplained:
+        return None
+    plan['filters'] = filters
+    return plan
+
+
+def filter_mask(df, filters):
+    """Boolean numpy mask of the rows matching every filter, or None without filters."""
+    mask = None
+    for column, operator, value in filters:
+        if operator == 'in':
+            selected = df[column].isin(value).to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(df.dtypes[column]):
+            values = df[column]
+            if values.dt.tz is not None:
+                value = value.tz_localize(values.dt.tz)
+            selected = getattr(values, operator)(value).to_numpy()
+        else:
+            values = numeric_column(df, column).to_numpy(dtype=np.float64, na_value=np.nan)
+            with np.errstate(invalid='ignore'):
+                selected = getattr(np, {'ge': 'greater_equal', 'gt': 'greater', 'le': 'less_equal',
+                                        'lt': 'less', 'eq': 'equal'}[operator])(values, value)
+        mask = selected if mask is None else mask & selected
+    return mask
+
+
+def _label_column(df, measure):
+    """Text column naming the rows: an identifier, else the text column with the most distinct values."""
+    distinct = {}
+    for entries in get_value_index(df).values():
+        for column, _ in entries:
+            distinct[column] = distinct.get(column, 0) + 1
+    text_columns = [
+        column for column, dtype in df.dtypes.items() if column != measure and (
+            pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+            or isinstance(dtype, pd.CategoricalDtype)
+        )
+    ]
+    # Colonne absente de l'index de valeurs : trop de valeurs distinctes, donc un identifiant
+    return max(text_columns, key=lambda column: distinct.get(column, float('inf')), default=None)
+
+
+def _group_counts(frame, group_by):
+    counts = frame.groupby([frame[key] for key in group_by], observed=True, sort=True).size()
+    return counts.to_frame(aggregation_label('count', 'rows'))
+
+
+def execute_plan(plan, df):
+    """Run a plan from ``plan_question``: text answer, or list of values to format (``format_answers``)."""
+    mask = filter_mask(df, plan['filters'])
+    frame = df if mask is None else df[mask]
+    kind = plan['kind']
+
+    if kind == 'distinct_count':
+        return str(frame[plan['column']].nunique())
+    if kind == 'values':
+        return frame[plan['column']].dropna().unique().tolist()
+    if kind == 'aggregate':
+        if plan['column'] is None:
+            return str(len(frame)) if not plan['group_by'] else \
+                format_grouped(_group_counts(frame, plan['group_by']), [('count', 'rows')])
+        return answer_aggregation(frame, [(plan['operation'], plan['column'])], plan['group_by'])
+    if kind == 'top_groups':
+        aggregation = (plan['operation'], plan['column'] or 'rows')
+        if plan['column'] is None:
+            result = _group_counts(frame, plan['group_by'])
+        else:
+            result = aggregate(frame, [aggregation], plan['group_by'])
+        result = result.sort_values(aggregation_label(*aggregation), ascending=not plan['descending'], kind='stable')
+        return format_grouped(result.head(plan['limit']), [aggregation])
+    if kind == 'top_rows':
+        values = numeric_column(df, plan['column']).to_numpy(dtype=np.float64, na_value=np.nan)
+        positions = np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+        candidates = pd.Series(values[positions])
+        best = candidates.nlargest(plan['limit']) if plan['descending'] else candidates.nsmallest(plan['limit'])
+        rows = positions[best.index.to_numpy()]
+        label_column = _label_column(df, plan['column'])
+        labels = df[label_column].iloc[rows].astype(str) if label_column else pd.Series(df.index[rows].astype(str))
+        formatted = format_values(pd.Series(best.to_numpy()), plan['column'])
+        return (labels.reset_index(drop=True) + ": " + formatted).tolist()
+    raise ValueError(f"Unknown plan: {kind}")
+
+
+_answer_paths = {}
+_answer_paths_lock = threading.Lock()
+
+
+def record_answer_path(path, seconds):
+    """Count a question answered by ``path`` ('planner', 'rules', 'tapas' or 'busy') and log latency and hit rate."""
+    with _answer_paths_lock:
+        count, total = _answer_paths.get(path, (0, 0.0))
+        _answer_paths[path] = (count + 1, total + seconds)
+        questions = sum(count for count, _ in _answer_paths.values())
+        planned = _answer_paths.get('planner', (0, 0.0))[0]
+    logger.info(
+        "Question answered by %s in %.1f ms (planner hit rate %.0f%% over %d questions)",
+        path, seconds * 1000, 100 * planned / questions, questions
+    )
+
+
+def answer_path_stats():
+    """Questions and mean latency (ms) per answering path since the server started."""
+    with _answer_paths_lock:
+        return {path: {'questions': count, 'mean_ms': 1000 * total / count} for path, (count, total) in _answer_paths.items()}
@@ -0,0 +1,147 @@
+import difflib
+import re
+from .cache import FrameMemo, LRUCache
+
+# Motifs compilés une seule fois ; les limites de mots évitent « count » dans « country », « min » dans « minutes »
+GROUP_AGGREGATION_PATTERN = re.compile(r'\b(average|mean|sum|count|min|max) of (\w+) by (\w+)')
+AGGREGATION_PATTERNS = {
+    'sum': re.compile(r'\b(sum of|total|sum)\b'),
+    'mean': re.compile(r'\b(average|mean|avg)\b'),
+    'count': re.compile(r'\b(count|how many|number of)\b'),
+    'min': re.compile(r'\b(minimum|min|lowest)\b'),
+    'max': re.compile(r'\b(maximum|max|highest)\b'),
+}
+LIST_PATTERN = re.compile(r'\b(show|list|what are|display|give me|what is in)\b')
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+DIGITS_PATTERN = re.compile(r'\d+')
+# Similarité minimale (difflib) pour rapprocher un mot de la question d'un nom de colonne
+FUZZY_CUTOFF = 0.8
+FUZZY_AFFIX = 3
+PARSE_CACHE_ITEMS = 1024
+
+
+def plural_forms(word):
+    """English plurals of a column word: ``products``, ``countries``, ``boxes`` (``address`` -> ``addresses``)."""
+    forms = [word + 's']
+    if len(word) > 1 and word.endswith('y') and word[-2] not in 'aeiou':
+        forms.append(word[:-1] + 'ies')
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        forms.append(word + 'es')
+    return forms
+
+
+def column_tokens(name):
+    """Lowercase word tokens of a column name or question (``unit_price`` and ``Unit Price`` give the same tokens)."""
+    return tuple(TOKEN_PATTERN.findall(str(name).lower()))
+
+
+class ColumnIndex:
+    """Normalized column names of a dataset, built once, with cached question parses.
+
+    Names are indexed by their token sequence: a column matches a question when all of
+    its tokens appear consecutively in the question, the longest match winning.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._by_tokens = {}
+        self._by_key = {}
+        for column in self.columns:
+            tokens = column_tokens(column)
+            if tokens:
+                self._by_tokens.setdefault(tokens, column)
+                self._by_key.setdefault("".join(tokens), column)
+        # Pluriels (« products », « countries », « boxes ») : un vrai nom de colonne reste prioritaire
+        for tokens, column in list(self._by_tokens.items()):
+            for plural in plural_forms(tokens[-1]):
+                self._by_tokens.setdefault(tokens[:-1] + (plural,), column)
+        self._max_tokens = max((len(tokens) for tokens in self._by_tokens), default=0)
+        # Candidats du rapprochement approché : mêmes nombres, et même début ou même fin de nom
+        self._by_affix = {}
+        for key in sorted(self._by_key):
+            digits = tuple(DIGITS_PATTERN.findall(key))
+            for affix in {('^', key[:FUZZY_AFFIX]), ('$', key[-FUZZY_AFFIX:])}:
+                self._by_affix.setdefault((digits, affix), []).append(key)
+        self._parses = LRUCache(max_items=PARSE_CACHE_ITEMS)
+
+    def find_in(self, tokens):
+        """Column whose name occurs in ``tokens`` (longest name first, then leftmost), or None."""
+        for size in range(min(self._max_tokens, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                column = self._by_tokens.get(tuple(tokens[start:start + size]))
+                if column is not None:
+                    return column
+        return None
+
+    def find_all(self, tokens):
+        """``(start, stop, column)`` of every column named in ``tokens``, left to right, longest name first."""
+        found, start = [], 0
+        while start < len(tokens):
+            for size in range(min(self._max_tokens, len(tokens) - start), 0, -1):
+                column = self._by_tokens.get(tuple(tokens[start:start + size]))
+                if column is not None:
+                    found.append((start, start + size, column))
+                    start += size
+                    break
+            else:
+                start += 1
+        return found
+
+    def find_at_end(self, tokens):
+        """``(size, column)`` of the longest column name ending ``tokens``, or None."""
+        for size in range(min(self._max_tokens, len(tokens)), 0, -1):
+            column = self._by_tokens.get(tuple(tokens[-size:]))
+            if column is not None:
+                return size, column
+        return None
+
+    def match(self, word):
+        """Column designated by a single question word: exact normalized name, else closest name."""
+        key = "".join(column_tokens(word))
+        if key in self._by_key:
+            return self._by_key[key]
+        if (key,) in self._by_tokens:
+            return self._by_tokens[(key,)]
+        # « amount1 » ne doit pas désigner « amount16 » : les nombres doivent être identiques
+        digits = tuple(DIGITS_PATTERN.findall(key))
+        candidates = sorted(set(self._by_affix.get((digits, ('^', key[:FUZZY_AFFIX])), []) +
+                                self._by_affix.get((digits, ('$', key[-FUZZY_AFFIX:])), [])))
+        close = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        return self._by_key[close[0]] if close else None
+
+    def parse(self, question):
+        """``(question_type, info)`` for ``question``; see ``detect_question_type``."""
+        question_lower = " ".join(question.lower().split())
+        parsed = self._parses.get(question_lower)
+        if parsed is None:
+            parsed = self._parse(question_lower)
+            self._parses.put(question_lower, parsed)
+        question_type, info = parsed
+        return question_type, dict(info) if isinstance(info, dict) else info
+
+    def _parse(self, question_lower):
+        group_match = GROUP_AGGREGATION_PATTERN.search(question_lower)
+        if group_match:
+            operation, measure_word, group_word = group_match.groups()
+            measure_col, group_col = self.match(measure_word), self.match(group_word)
+            if measure_col is not None and group_col is not None:
+                return 'group_aggregation', {'operation': operation, 'column': measure_col, 'group_by': group_col}
+
+        tokens = column_tokens(question_lower)
+        column = self.find_in(tokens)
+        if column is None:
+            return 'default', None
+        for operation, pattern in AGGREGATION_PATTERNS.items():
+            if pattern.search(question_lower):
+                return 'aggregation', {'operation': operation, 'column': column}
+        if LIST_PATTERN.search(question_lower):
+            return 'column', column
+        return 'default', None
+
+
+_column_indexes = FrameMemo()
+
+
+def get_column_index(df):
+    """Column index of ``df``, built once per DataFrame object."""
+    return _column_indexes.get(df, 'column_index', lambda: ColumnIndex(df.columns))
@@ -0,0 +1,78 @@
+import math
+import re
+import numpy as np
+import pandas as pd
+from .cache import FrameMemo
+
+DEFAULT_TOP_K_CHUNKS = 16
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'did', 'do', 'does', 'for', 'from', 'has', 'have',
+    'how', 'in', 'is', 'it', 'its', 'me', 'many', 'much', 'of', 'on', 'or', 'show', 'tell', 'that', 'the',
+    'their', 'there', 'to', 'was', 'were', 'what', 'when', 'where', 'which', 'who', 'whom', 'whose', 'why',
+    'with', 'give', 'list', 'find', 'all', 'any', 'rows', 'row', 'value', 'values',
+}
+
+_chunk_indexes = FrameMemo()
+
+
+def tokenize(text):
+    """Découpe un texte en tokens alphanumériques en minuscules."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class ChunkIndex:
+    """Index inversé des tokens de cellules vers les chunks de ``max_rows`` lignes d'un DataFrame.
+
+    Les chunks sont ceux produits par ``tapas_code.split_dataframe`` avec le même ``max_rows``.
+    """
+
+    def __init__(self, df, max_rows=50):
+        self.max_rows = max_rows
+        self.n_chunks = max(1, math.ceil(len(df) / max_rows))
+        chunk_ids = np.arange(len(df)) // max_rows
+        postings = {}
+
+        for column in df.columns:
+            codes, uniques = pd.factorize(df[column])
+            valid = codes >= 0
+            # Paires (valeur distincte, chunk) uniques, triées par valeur
+            pairs = np.unique(codes[valid].astype(np.int64) * self.n_chunks + chunk_ids[valid])
+            value_codes, value_chunks = np.divmod(pairs, self.n_chunks)
+            boundaries = np.flatnonzero(np.diff(value_codes)) + 1
+            for codes_group, chunks_group in zip(np.split(value_codes, boundaries), np.split(value_chunks, boundaries)):
+                if not len(codes_group):
+                    continue
+                for token in set(tokenize(uniques[codes_group[0]])):
+                    postings.setdefault(token, []).append(chunks_group)
+
+        self.postings = {token: np.unique(np.concatenate(groups)) for token, groups in postings.items()}
+
+    def score(self, question):
+        """Score de chaque chunk pour la question : somme des IDF des termes présents dans ses cellules."""
+        scores = np.zeros(self.n_chunks)
+        for term in set(tokenize(question)) - STOPWORDS:
+            chunks = self.postings.get(term)
+            if chunks is None:
+                continue
+            scores[chunks] += math.log((self.n_chunks + 1) / (len(chunks) + 0.5))
+        return scores
+
+    def candidate_chunks(self, question, top_k=DEFAULT_TOP_K_CHUNKS):
+        """Retourne les ``top_k`` chunks les plus pertinents, dans l'ordre de la table.
+
+        Retourne ``None`` quand aucun terme de la question n'apparaît dans les cellules :
+        l'appelant doit alors analyser toute la table.
+        """
+        scores = self.score(question)
+        matching = np.flatnonzero(scores > 0)
+        if not len(matching):
+            return None
+        best = matching[np.argsort(-scores[matching], kind='stable')[:top_k]]
+        return sorted(best.tolist())
+
+
+def get_chunk_index(df, max_rows=50):
+    """Retourne l'index inversé de ``df``, construit une seule fois par DataFrame."""
+    return _chunk_indexes.get(df, ('chunk_index', max_rows), lambda: ChunkIndex(df, max_rows))
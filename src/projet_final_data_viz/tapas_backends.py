@@ -0,0 +1,132 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+import torch
+from transformers.modeling_outputs import BaseModelOutputWithPooling
+from transformers.models.tapas.modeling_tapas import IndexMap, ProductIndexMap, gather, reduce_min
+
+BACKENDS = ('pytorch', 'int8', 'onnx')
+DEFAULT_BACKEND = os.getenv("TAPAS_BACKEND", "pytorch")
+ONNX_CACHE_DIR = Path(os.getenv("TAPAS_ONNX_CACHE", Path.home() / ".cache" / "projet_final_data_viz" / "onnx"))
+ENCODER_INPUTS = ['input_ids', 'attention_mask', 'token_type_ids', 'position_ids']
+ENCODER_OUTPUTS = ['last_hidden_state', 'pooler_output']
+
+
+def position_ids_for(token_type_ids, config):
+    """Calcule les position ids de TapasEmbeddings (relatives à chaque cellule si le modèle l'exige).
+
+    Ce calcul utilise un ``scatter_reduce`` que l'export ONNX ne supporte pas : il reste en PyTorch.
+    """
+    batch_size, seq_length = token_type_ids.shape[:2]
+    position = torch.arange(seq_length, dtype=torch.long).unsqueeze(0)
+    position_ids = position.expand(batch_size, seq_length)
+    if not config.reset_position_index_per_cell:
+        return position_ids
+    col_index = IndexMap(token_type_ids[:, :, 1], config.type_vocab_sizes[1], batch_dims=1)
+    row_index = IndexMap(token_type_ids[:, :, 2], config.type_vocab_sizes[2], batch_dims=1)
+    full_index = ProductIndexMap(col_index, row_index)
+    first_position = gather(reduce_min(position_ids, full_index)[0], full_index)
+    return torch.min(torch.as_tensor(config.max_position_embeddings - 1), position - first_position)
+
+
+class _EncoderForExport(torch.nn.Module):
+    """Encodeur TAPAS avec des entrées/sorties positionnelles, pour ``torch.onnx.export``."""
+
+    def __init__(self, encoder):
+        super().__init__()
+        self.encoder = encoder
+
+    def forward(self, input_ids, attention_mask, token_type_ids, position_ids):
+        outputs = self.encoder(
+            input_ids=input_ids, attention_mask=attention_mask,
+            token_type_ids=token_type_ids, position_ids=position_ids
+        )
+        return outputs.last_hidden_state, outputs.pooler_output
+
+
+class OnnxTapasEncoder(torch.nn.Module):
+    """Remplace ``model.tapas`` : l'encodeur tourne dans ONNX Runtime, les têtes TAPAS restent en PyTorch."""
+
+    def __init__(self, onnx_path, config):
+        super().__init__()
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The 'onnx' TAPAS backend requires onnxruntime (pip install onnxruntime).") from e
+        self.config = config
+        self.session = onnxruntime.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+        # Taille des poids chargés par ONNX Runtime, pour le suivi mémoire du registre des modèles
+        self.onnx_bytes = os.path.getsize(onnx_path)
+
+    def forward(self, input_ids=None, attention_mask=None, token_type_ids=None, position_ids=None, **kwargs):
+        if position_ids is None:
+            position_ids = position_ids_for(token_type_ids, self.config)
+        feeds = {
+            'input_ids': input_ids, 'attention_mask': attention_mask,
+            'token_type_ids': token_type_ids, 'position_ids': position_ids,
+        }
+        last_hidden_state, pooler_output = self.session.run(
+            ENCODER_OUTPUTS, {name: tensor.cpu().numpy() for name, tensor in feeds.items()}
+        )
+        return BaseModelOutputWithPooling(
+            last_hidden_state=torch.from_numpy(last_hidden_state),
+            pooler_output=torch.from_numpy(pooler_output)
+        )
+
+
+def onnx_export_path(model, cache_dir=None):
+    """Chemin du fichier ONNX en cache : nom du modèle + empreinte de sa configuration."""
+    name = (model.config.name_or_path or "tapas").replace('/', '--')
+    fingerprint = hashlib.sha1(model.config.to_json_string().encode()).hexdigest()[:12]
+    return Path(cache_dir or ONNX_CACHE_DIR) / f"{name}-{fingerprint}.onnx"
+
+
+def export_encoder_onnx(model, path, opset_version=17):
+    """Exporte l'encodeur de ``model`` en ONNX (axe batch dynamique), de manière atomique."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    seq_length = 512
+    dummy_types = torch.zeros((1, seq_length, len(model.config.type_vocab_sizes)), dtype=torch.long)
+    dummy_inputs = (
+        torch.zeros((1, seq_length), dtype=torch.long),
+        torch.ones((1, seq_length), dtype=torch.long),
+        dummy_types,
+        position_ids_for(dummy_types, model.config),
+    )
+    fd, tmp_path = tempfile.mkstemp(suffix='.onnx', dir=path.parent)
+    os.close(fd)
+    try:
+        torch.onnx.export(
+            _EncoderForExport(model.tapas).eval(), dummy_inputs, tmp_path,
+            input_names=ENCODER_INPUTS, output_names=ENCODER_OUTPUTS,
+            dynamic_axes={name: {0: 'batch'} for name in ENCODER_INPUTS + ENCODER_OUTPUTS},
+            opset_version=opset_version
+        )
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    model.eval()
+    return path
+
+
+def apply_backend(model, backend=DEFAULT_BACKEND, cache_dir=None):
+    """Convertit un ``TapasForQuestionAnswering`` fp32 vers le backend d'inférence demandé.
+
+    - ``pytorch`` : modèle fp32 inchangé ;
+    - ``int8`` : quantification dynamique int8 des couches linéaires (CPU) ;
+    - ``onnx`` : encodeur exporté une fois sur disque et exécuté par ONNX Runtime.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown TAPAS backend '{backend}', expected one of {BACKENDS}")
+    model.eval()
+    if backend == 'int8':
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == 'onnx':
+        path = onnx_export_path(model, cache_dir)
+        if not path.exists():
+            export_encoder_onnx(model, path)
+        # Les poids PyTorch de l'encodeur sont libérés : seules les têtes restent en mémoire
+        model.tapas = OnnxTapasEncoder(path, model.config)
+    return model
@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+from multiprocessing.connection import Client
+import pyarrow as pa
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Adresse du service TAPAS (``hôte:port`` ou chemin de socket Unix) ; vide = inférence dans le processus Streamlit
+TAPAS_SERVICE_ADDRESS = os.getenv("TAPAS_SERVICE_ADDRESS", "")
+# Clé secrète partagée entre le service et les clients, obligatoire : les messages reçus sont désérialisés (pickle)
+TAPAS_SERVICE_AUTHKEY = os.getenv("TAPAS_SERVICE_AUTHKEY", "").encode()
+# Attente maximale (secondes) d'une réponse du service avant de répondre dans le processus
+TAPAS_SERVICE_TIMEOUT = float(os.getenv("TAPAS_SERVICE_TIMEOUT", "120"))
+IDLE_CONNECTIONS = 8
+
+
+class TapasServiceUnavailable(OSError):
+    """Le service TAPAS est injoignable, a expiré ou a échoué : l'inférence se fait dans le processus."""
+
+
+class TapasServiceBusy(TapasServiceUnavailable):
+    """La file du service TAPAS est pleine : la question est refusée plutôt que mise en attente."""
+
+
+def parse_address(address):
+    """``("hôte", port)`` pour ``hôte:port``, sinon le chemin de socket Unix tel quel."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+def table_bytes(df_str):
+    """Flux Arrow IPC de la table déjà convertie en chaînes (envoyé en un seul message)."""
+    table = pa.Table.from_pandas(df_str.rename(columns=str), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+class TapasClient:
+    """Client léger du service TAPAS (``python -m projet_final_data_viz.tapas_server``).
+
+    Les connexions sont réutilisées d'une question à l'autre ; une connexion en erreur est
+    fermée et ``TapasServiceUnavailable`` est relevée pour que l'appelant réponde lui-même.
+    """
+
+    def __init__(self, address, authkey=TAPAS_SERVICE_AUTHKEY, timeout=TAPAS_SERVICE_TIMEOUT):
+        if not authkey:
+            raise ValueError("TAPAS service clients need a secret TAPAS_SERVICE_AUTHKEY")
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return Client(self.address, authkey=self.authkey)
+        except (OSError, EOFError) as e:
+            raise TapasServiceUnavailable(f"TAPAS service unreachable at {self.address}: {e}") from e
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < IDLE_CONNECTIONS:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _call(self, message, payload=None):
+        conn = self._connection()
+        try:
+            conn.send(message)
+            if payload is not None:
+                conn.send_bytes(payload)
+            if not conn.poll(self.timeout):
+                raise TapasServiceUnavailable(f"TAPAS service did not answer within {self.timeout:.0f}s")
+            status, result = conn.recv()
+        except TapasServiceUnavailable:
+            conn.close()
+            raise
+        except (OSError, EOFError) as e:
+            conn.close()
+            raise TapasServiceUnavailable(f"TAPAS service connection lost: {e}") from e
+        self._release(conn)
+        if status == 'busy':
+            raise TapasServiceBusy(result)
+        if status != 'ok':
+            raise TapasServiceUnavailable(f"TAPAS service error: {result}")
+        return result
+
+    def chunk_answers(self, df_str, question, max_rows=50, batch_size=8, backend=None):
+        """Comme ``tapas_code.chunk_answers`` sur les chunks de ``max_rows`` lignes de ``df_str``, côté service."""
+        bounds = [(start, min(start + max_rows, len(df_str))) for start in range(0, len(df_str), max_rows)]
+        message = {'op': 'answer', 'question': question, 'bounds': bounds, 'batch_size': batch_size, 'backend': backend}
+        return self._call(message, table_bytes(df_str))
+
+    def stats(self):
+        """Compteurs du service (requêtes, lots, refus), ou ``None`` s'il est injoignable."""
+        try:
+            return self._call({'op': 'stats'})
+        except TapasServiceUnavailable:
+            return None
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+@st.cache_resource
+def get_tapas_client():
+    """Client unique du processus, ou ``None`` si aucun service TAPAS n'est configuré (adresse et clé)."""
+    if not TAPAS_SERVICE_ADDRESS:
+        return None
+    if not TAPAS_SERVICE_AUTHKEY:
+        logger.warning("TAPAS_SERVICE_ADDRESS is set without TAPAS_SERVICE_AUTHKEY: using in-process inference")
+        return None
+    return TapasClient(TAPAS_SERVICE_ADDRESS)
@@ -1,22 +1,68 @@
-import re
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from multiprocessing import shared_memory
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
+import torch
 from transformers import TapasTokenizer, TapasForQuestionAnswering
 from collections import OrderedDict
+from .aggregation import answer_aggregation
+from .model_registry import ModelRegistry
+from .query_cache import Uncached, get_query_cache
+from .query_planner import execute_plan, plan_question, record_answer_path
+from .question_parser import get_column_index
+from .retrieval import DEFAULT_TOP_K_CHUNKS, get_chunk_index
+from .tapas_backends import DEFAULT_BACKEND, apply_backend
+from .tapas_client import TapasServiceBusy, TapasServiceUnavailable, get_tapas_client
 
+logger = logging.getLogger(__name__)
+
+TAPAS_MODEL_NAME = 'google/tapas-base-finetuned-wtq'
+DEFAULT_BATCH_SIZE = 8
+MAX_BATCH_SIZE = 64
+# Pic mémoire approximatif d'une séquence TAPAS-base de 512 tokens sous inference_mode
+BYTES_PER_SEQUENCE = 32 * 1024**2
+# Nombre de processus TAPAS (0 ou 1 = inférence dans le processus Streamlit)
+DEFAULT_WORKERS = int(os.getenv("TAPAS_WORKERS", "0"))
+# Chunks convertis en texte et envoyés ensemble au service ou au pool de processus (un message par fenêtre)
+WINDOW_CHUNKS = 64
+# À incrémenter quand la logique de réponse change : invalide les réponses en cache
+ANSWER_ENGINE_VERSION = 4
+
+
+def load_tapas_weights(backend=DEFAULT_BACKEND):
+    """Load the TAPAS tokenizer and model for the given inference backend (no Streamlit caching)."""
+    tokenizer = TapasTokenizer.from_pretrained(TAPAS_MODEL_NAME)
+    model = TapasForQuestionAnswering.from_pretrained(TAPAS_MODEL_NAME)
+    return tokenizer, apply_backend(model, backend)
+
+
+# Registre unique du processus : un seul exemplaire des poids par backend, partagé par toutes les sessions
+tapas_registry = ModelRegistry(load_tapas_weights)
 
 
 @st.cache_resource
-def load_tapas_model():
-    """Load and cache the TAPAS tokenizer and model."""
+def preload_tapas_model(backend=DEFAULT_BACKEND):
+    """Start loading the TAPAS weights in the background, once per process (not on every rerun)."""
+    return tapas_registry.preload(backend)
+
+
+def load_tapas_model(backend=DEFAULT_BACKEND):
+    """Load and cache the TAPAS tokenizer and model.
+
+    ``backend`` is one of ``tapas_backends.BACKENDS`` ('pytorch', 'int8', 'onnx'),
+    defaulting to the TAPAS_BACKEND environment variable. The weights are held by
+    ``tapas_registry``; call ``tapas_registry.preload(backend)`` to load them in the background.
+    """
     try:
-        tokenizer = TapasTokenizer.from_pretrained(
-            'google/tapas-base-finetuned-wtq'
-        )
-        model = TapasForQuestionAnswering.from_pretrained(
-            'google/tapas-base-finetuned-wtq'
-        )
-        return tokenizer, model
+        return tapas_registry.get(backend)
     except Exception as e:
         st.error(f"Error loading TAPAS model: {e}")
         return None, None
@@ -35,17 +81,232 @@ def get_cell_value(df, coord):
 
 
 def split_dataframe(df, max_rows=50):
-    """Split the DataFrame into chunks of a specified maximum size."""
+    """Split the DataFrame into chunks of a specified maximum size.
+
+    Each chunk gets a fresh 0-based index: the TAPAS tokenizer addresses rows by label with ``iloc``.
+    """
     try:
         if len(df) <= max_rows:
-            return [df]
-        chunks = [df.iloc[i:i + max_rows].copy() for i in range(0, len(df), max_rows)]
+            return [df.reset_index(drop=True)]
+        chunks = [df.iloc[i:i + max_rows].reset_index(drop=True) for i in range(0, len(df), max_rows)]
         return chunks
     except Exception as e:
         st.error(f"Error splitting DataFrame: {e}")
         return [df]
 
 
+def render_cells(df):
+    """2-D object array of the cells of ``df`` as TAPAS reads them: ``str`` of each value, '' for missing ones."""
+    cells = np.empty(df.shape, dtype=object)
+    for position in range(df.shape[1]):
+        values = df.iloc[:, position]
+        if isinstance(values.dtype, np.dtype) and (values.dtype.kind in 'biu' or values.dtype == np.float64):
+            # str() des scalaires Python : même texte que astype(str) (pas en float32), deux fois plus rapide
+            cells[:, position] = list(map(str, values.tolist()))
+        else:
+            cells[:, position] = values.astype(str).to_numpy()
+        missing = values.isna().to_numpy()
+        if missing.any():
+            cells[missing, position] = ''
+    return cells
+
+
+def render_chunk(chunk):
+    """Render a chunk as the string table given to TAPAS: missing cells become '', fresh 0-based index.
+
+    The frame wraps a single 2-D object array, so answer coordinates are resolved with one
+    take (see ``coordinate_answers``).
+    """
+    return pd.DataFrame(render_cells(chunk), columns=chunk.columns)
+
+
+def iter_string_windows(df, max_rows=50, window=WINDOW_CHUNKS):
+    """Yield ``df`` rendered as strings ``window`` chunks (``window * max_rows`` rows) at a time.
+
+    Windows start on chunk boundaries, so splitting a window in ``max_rows`` rows gives back
+    the chunks of ``split_dataframe(df, max_rows)``.
+    """
+    step = max_rows * max(1, window)
+    for start in range(0, len(df), step):
+        yield render_chunk(df.iloc[start:start + step])
+
+
+def iter_string_chunks(df, max_rows=50, window=1):
+    """Yield the chunks of ``split_dataframe(df, max_rows)`` rendered as strings, one at a time.
+
+    ``window`` chunks are converted together (one conversion per column and per window),
+    so that at most one window of the table exists as text. Chunks are not cut to the rows
+    the tokenizer keeps: TAPAS ranks the numeric values of each column over the whole
+    table before truncating it, so every row matters.
+    """
+    for table in iter_string_windows(df, max_rows, window):
+        cells = table.to_numpy()
+        for start in range(0, len(cells), max_rows):
+            yield pd.DataFrame(cells[start:start + max_rows], columns=df.columns)
+
+
+def memory_capped_batch_size(batch_size, memory_fraction=0.25):
+    """Cap the batch size so that one batch fits in a fraction of the available memory."""
+    limit = MAX_BATCH_SIZE
+    try:
+        available = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        limit = min(limit, max(1, int(available * memory_fraction // BYTES_PER_SEQUENCE)))
+    except (AttributeError, ValueError, OSError):
+        pass
+    return max(1, min(int(batch_size), limit))
+
+
+def predict_pair_coordinates(tokenizer, model, pairs, batch_size=DEFAULT_BATCH_SIZE):
+    """Run TAPAS on ``(table, question)`` pairs in padded mini-batches and return the answer coordinates of each pair.
+
+    Pairs may come from different questions: every sequence is padded to the same length.
+    A pair that cannot be scored (model not loaded, tokenization error...) gets ``None``.
+    """
+    batch_size = memory_capped_batch_size(batch_size)
+    coordinates = []
+    for start in range(0, len(pairs), batch_size):
+        batch_pairs = pairs[start:start + batch_size]
+        try:
+            encodings = [
+                tokenizer(table=table, queries=[question], padding='max_length', return_tensors="pt", truncation=True)
+                for table, question in batch_pairs
+            ]
+            inputs = {key: torch.cat([encoding[key] for encoding in encodings]) for key in encodings[0]}
+            with torch.inference_mode():
+                outputs = model(**inputs)
+            predicted_answer_coords, _ = tokenizer.convert_logits_to_predictions(
+                inputs,
+                outputs.logits,
+                outputs.logits_aggregation
+            )
+            coordinates.extend(predicted_answer_coords)
+        except Exception:
+            if len(batch_pairs) == 1:
+                coordinates.append(None)
+            else:
+                # Rejouer le lot table par table pour ne perdre que les chunks en erreur
+                for pair in batch_pairs:
+                    coordinates.extend(predict_pair_coordinates(tokenizer, model, [pair], batch_size=1))
+    return coordinates
+
+
+def predict_answer_coordinates(tokenizer, model, tables, question, batch_size=DEFAULT_BATCH_SIZE):
+    """Run TAPAS on several tables in padded mini-batches and return the answer coordinates of each table."""
+    return predict_pair_coordinates(tokenizer, model, [(table, question) for table in tables], batch_size)
+
+
+def coordinate_answers(chunk_str, coords):
+    """Non-empty cell values of ``chunk_str`` at the TAPAS answer coordinates, read with a single take.
+
+    ``None`` coordinates (chunk not scored) give ``None``.
+    """
+    if coords is None:
+        return None
+    if not len(coords):
+        return []
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+    rows, cols = coords[:, 0], coords[:, 1]
+    inside = (rows >= 0) & (rows < chunk_str.shape[0]) & (cols >= 0) & (cols < chunk_str.shape[1])
+    cells = chunk_str.to_numpy()[rows[inside], cols[inside]]
+    texts = (str(value).strip() for value, missing in zip(cells, pd.isna(cells)) if not missing)
+    return [text for text in texts if text]
+
+
+def chunk_answers(tokenizer, model, chunks, question, batch_size=DEFAULT_BATCH_SIZE):
+    """Return, for each string chunk, the non-empty cell values selected by TAPAS (``None`` if it was not scored)."""
+    predictions = predict_answer_coordinates(tokenizer, model, chunks, question, batch_size=batch_size)
+    return [coordinate_answers(chunk_str, coords) for chunk_str, coords in zip(chunks, predictions)]
+
+
+# --- Exécution multi-processus ---------------------------------------------------------------
+
+_worker_tokenizer = None
+_worker_model = None
+_process_pools = {}
+
+
+def _init_tapas_worker(loader, loader_args, num_threads):
+    """Initializer of a pool process: load the TAPAS weights once per worker."""
+    global _worker_tokenizer, _worker_model
+    torch.set_num_threads(num_threads)
+    _worker_tokenizer, _worker_model = loader(*loader_args)
+
+
+def _worker_chunk_answers(shm_name, size, bounds, question, batch_size):
+    """Read the shared Arrow table, rebuild the requested chunks and score them."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(shm.buf[:size])).read_all()
+        chunks = [table.slice(start, stop - start).to_pandas() for start, stop in bounds]
+        del table
+        return chunk_answers(_worker_tokenizer, _worker_model, chunks, question, batch_size=batch_size)
+    finally:
+        shm.close()
+
+
+def get_process_pool(workers, loader=load_tapas_weights, loader_args=()):
+    """Return a process pool of ``workers`` TAPAS workers, kept alive across questions."""
+    key = (workers, loader, loader_args)
+    pool = _process_pools.get(key)
+    if pool is None:
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_tapas_worker,
+            initargs=(loader, loader_args, num_threads)
+        )
+        _process_pools[key] = pool
+    return pool
+
+
+def _share_table(df_str):
+    """Copy the stringified table into a shared memory block as an Arrow IPC stream."""
+    table = pa.Table.from_pandas(df_str.rename(columns=str), preserve_index=False)
+    sink = pa.MockOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    size = sink.size()
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    buffer = pa.py_buffer(shm.buf)
+    with pa.ipc.new_stream(pa.FixedSizeBufferWriter(buffer), table.schema) as writer:
+        writer.write_table(table)
+    del buffer
+    return shm, size
+
+
+def parallel_chunk_answers(df_str, question, workers, max_rows=50, batch_size=DEFAULT_BATCH_SIZE,
+                           loader=load_tapas_weights, loader_args=()):
+    """Score the chunks of ``df_str`` in a process pool and merge the answers in chunk order.
+
+    The table is shared once through shared memory; each task only receives chunk boundaries.
+    """
+    bounds = [(start, min(start + max_rows, len(df_str))) for start in range(0, len(df_str), max_rows)]
+    tasks = [bounds[i:i + batch_size] for i in range(0, len(bounds), batch_size)]
+    pool = get_process_pool(workers, loader, loader_args)
+    shm, size = _share_table(df_str)
+    try:
+        results = pool.map(
+            _worker_chunk_answers,
+            [shm.name] * len(tasks), [size] * len(tasks), tasks,
+            [question] * len(tasks), [batch_size] * len(tasks)
+        )
+        # pool.map conserve l'ordre des tâches : la déduplication de format_answers reste déterministe
+        return [answers for task_answers in results for answers in task_answers]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def fill_missing(df):
+    """Replace missing values with empty strings, categorical columns included."""
+    df = df.copy(deep=False)
+    for position, dtype in enumerate(df.dtypes):
+        if isinstance(dtype, pd.CategoricalDtype) and '' not in dtype.categories:
+            df.isetitem(position, df.iloc[:, position].cat.add_categories(''))
+    return df.fillna('')
+
+
 def validate_question(question):
     """Validate if the question is non-empty."""
     if not question or not question.strip():
@@ -55,106 +316,25 @@ def validate_question(question):
 
 
 def process_aggregation(df, operation, column, group_by=None):
-    """Handle both simple and grouped aggregation operations."""
-    try:
-        # Convertir la colonne en numérique, en forçant la conversion des valeurs non numériques en NaN
-        df[column] = pd.to_numeric(df[column], errors='coerce')
-
-        if group_by:
-            # Appliquer l'opération d'agrégation
-            if operation == 'sum':
-                result = df.groupby(group_by)[column].sum()
-            elif operation in ['mean', 'average']:
-                result = df.groupby(group_by)[column].mean()
-            elif operation == 'count':
-                result = df.groupby(group_by)[column].count()
-            elif operation == 'min':
-                result = df.groupby(group_by)[column].min()
-            elif operation == 'max':
-                result = df.groupby(group_by)[column].max()
-
-            # Formatage des résultats d'agrégation groupée
-            formatted_results = []
-            for group, value in result.items():
-                try:
-                    if isinstance(value, (int, float)):
-                        if 'price' in column.lower() or 'amount' in column.lower():
-                            formatted_value = f"${value:,.2f}"  # Format monétaire
-                        else:
-                            formatted_value = f"{value:,.2f}"  # Format standard
-                    else:
-                        formatted_value = str(value)
-
-                except Exception as e:
-                    formatted_value = f"Error formatting {value}: {e}"
-
-                formatted_results.append(f"{group}: {formatted_value}")
-
-            return "\n".join(formatted_results)
-
-        else:
-            # Agrégation sans group_by
-            if operation == 'sum':
-                result = df[column].sum()
-                return f"${result:,.2f}" if 'amount' in column.lower() or 'price' in column.lower() else f"{result:,.0f}"
-            elif operation in ['mean', 'average']:
-                result = df[column].mean()
-                return f"{result:.2f}"
-            elif operation == 'count':
-                return str(len(df))
-            elif operation == 'min':
-                return str(df[column].min())
-            elif operation == 'max':
-                return str(df[column].max())
+    """Handle both simple and grouped aggregation operations.
 
+    ``operation`` and ``group_by`` may be lists: every operation is computed in a single
+    groupby pass over the group keys (see ``aggregate``). ``df`` is never copied nor modified.
+    """
+    operations = [operation] if isinstance(operation, str) else list(operation)
+    try:
+        return answer_aggregation(df, [(name, column) for name in operations], group_by)
     except Exception as e:
         return f"Error in aggregation: {str(e)}"
 
 
-
-
 def detect_question_type(question, df):
-    """Detect the type of question based on keywords and patterns."""
-    question_lower = question.lower()
-
-    # Check for grouped aggregation pattern
-    group_agg_pattern = r'(average|mean|sum|count|min|max) of (\w+) by (\w+)'
-    group_match = re.search(group_agg_pattern, question_lower)
-    if group_match:
-        operation, measure_col, group_col = group_match.groups()
-        # Match column names more flexibly
-        measure_col = next((col for col in df.columns if col.lower().replace('_', '') in measure_col.replace('_', '')), None)
-        group_col = next((col for col in df.columns if col.lower().replace('_', '') in group_col.replace('_', '')), None)
-        if measure_col and group_col:
-            return 'group_aggregation', {
-                'operation': operation,
-                'column': measure_col,
-                'group_by': group_col
-            }
-
-    # Regular aggregation patterns
-    agg_patterns = {
-        'sum': r'sum of|total|sum',
-        'mean': r'average|mean|avg',
-        'count': r'count|how many|number of',
-        'min': r'minimum|min|lowest',
-        'max': r'maximum|max|highest'
-    }
-
-    # Check for regular aggregation
-    for operation, pattern in agg_patterns.items():
-        if re.search(pattern, question_lower):
-            for col in df.columns:
-                if col.lower() in question_lower:
-                    return 'aggregation', {'operation': operation, 'column': col}
-
-    # Check for column listing
-    list_keywords = ['show','show all' 'list', 'what are', 'display', 'give me', 'what is in']
-    for col in df.columns:
-        if col.lower() in question_lower and any(kw in question_lower for kw in list_keywords):
-            return 'column', col
-
-    return 'default', None
+    """Detect the type of question based on keywords and patterns.
+
+    Column names are matched through an index built once per DataFrame, and parses are
+    cached per question (see ``ColumnIndex``).
+    """
+    return get_column_index(df).parse(question)
 
 
 def format_answers(answers, max_display=50):
@@ -185,61 +365,148 @@ def format_answers(answers, max_display=50):
         }
 
 
-def process_question(question, df, max_rows=50):
-    """Process the question and return the answer."""
+def prune_chunks(df, source_df, question, max_rows=50, top_k_chunks=DEFAULT_TOP_K_CHUNKS):
+    """Keep only the ``max_rows`` chunks whose cells match the question terms.
+
+    The inverted index is built once per ``source_df``. Returns ``df`` unchanged
+    (full scan) when no chunk matches or ``top_k_chunks`` is falsy.
+    """
+    if not top_k_chunks or len(df) <= max_rows:
+        return df
+    chunk_ids = get_chunk_index(source_df, max_rows).candidate_chunks(question, top_k_chunks)
+    if chunk_ids is None:
+        return df
+    # Les chunks retenus sont pleins (sauf le dernier de la table) : les re-découper redonne les mêmes chunks
+    return pd.concat([df.iloc[i * max_rows:(i + 1) * max_rows] for i in chunk_ids])
+
+
+def process_question(question, df, max_rows=50, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                     top_k_chunks=DEFAULT_TOP_K_CHUNKS, backend=DEFAULT_BACKEND):
+    """Process the question and return the answer.
+
+    Questions the rule-based planner can compile (filters, date ranges, top-k, group-bys,
+    distinct counts, see ``plan_question``) are answered with vectorized pandas; TAPAS only
+    runs when no plan applies. The path taken and its latency are logged.
+
+    The TAPAS fallback scores the ``max_rows`` chunks in mini-batches of ``batch_size``
+    tables, capped by the available memory (see ``memory_capped_batch_size``).
+    When ``TAPAS_SERVICE_ADDRESS`` is set, the chunks are scored by the TAPAS service
+    (see ``tapas_server``), batched with the other users' questions; an unreachable service
+    falls back to local inference, a full service queue returns None with a warning.
+    With ``workers`` > 1 the chunks are spread over a pool of TAPAS processes.
+    Only the ``top_k_chunks`` chunks matching the question terms are scored (see ``prune_chunks``).
+    ``backend`` selects the TAPAS inference backend (see ``load_tapas_model``).
+    """
+    return _process_question(question, df, max_rows, batch_size, workers, top_k_chunks, backend)[0]
+
+
+def _process_question(question, df, max_rows=50, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                      top_k_chunks=DEFAULT_TOP_K_CHUNKS, backend=DEFAULT_BACKEND):
+    """``(answer, complete)`` of ``process_question``; ``complete`` is False when TAPAS chunks were not scored."""
     if not validate_question(question):
-        return None
-    tokenizer, model = load_tapas_model()
-    df = df.fillna('')
+        return None, True
+    start = time.perf_counter()
+    path, answer, complete = _route_question(question, df, max_rows, batch_size, workers, top_k_chunks, backend)
+    record_answer_path(path, time.perf_counter() - start)
+    return answer, complete
+
+
+def _route_question(question, df, max_rows, batch_size, workers, top_k_chunks, backend):
+    """``(path, answer, complete)``: planner, legacy rules or TAPAS, in that order."""
+    plan = plan_question(question, df)
+    if plan is not None:
+        try:
+            return 'planner', format_answers(execute_plan(plan, df)), True
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Query plan %s failed, falling back: %s", plan['kind'], e)
+
+    source_df = df
     question_type, info = detect_question_type(question, df)
 
     # Handle group aggregation
     if question_type == 'group_aggregation':
-        return process_aggregation(df, info['operation'], info['column'], info['group_by'])
+        return 'rules', process_aggregation(df, info['operation'], info['column'], info['group_by']), True
 
     # Handle regular aggregation
     if question_type == 'aggregation':
-        return process_aggregation(df, info['operation'], info['column'])
+        return 'rules', process_aggregation(df, info['operation'], info['column']), True
 
     # Handle column listing
     if question_type == 'column' and info in df.columns:
         unique_values = df[info].dropna().unique().tolist()
-        return format_answers(unique_values)
+        return 'rules', format_answers(unique_values), True
 
     # Default TAPAS processing for other questions
-    df_chunks = split_dataframe(df, max_rows)
-    all_answers = []
-
-    for chunk in df_chunks:
+    # Seuls les chunks retenus (toute la table si aucun ne correspond) sont convertis en texte, fenêtre par fenêtre
+    df = prune_chunks(df, source_df, question, max_rows, top_k_chunks)
+    chunk_results = None
+    client = get_tapas_client()
+    if client is not None:
         try:
-            chunk_str = chunk.astype(str)
-            inputs = tokenizer(
-                table=chunk_str,
-                queries=[question],
-                padding='max_length',
-                return_tensors="pt",
-                truncation=True
-            )
+            # Une fenêtre par message : la table n'est jamais entièrement convertie en texte
+            chunk_results = []
+            for window in iter_string_windows(df, max_rows, WINDOW_CHUNKS):
+                chunk_results.extend(client.chunk_answers(window, question, max_rows, batch_size, backend))
+        except TapasServiceBusy as e:
+            # Contre-pression : la question n'est ni mise en attente ni calculée ici
+            logger.warning("%s", e)
+            st.warning("The question engine is busy, please try again in a moment.")
+            return 'busy', None, True
+        except TapasServiceUnavailable as e:
+            logger.warning("%s, falling back to in-process inference", e)
+            chunk_results = None
+
+    if chunk_results is None and workers and workers > 1:
+        try:
+            # Fenêtres assez grandes pour occuper tous les processus, partagées une à une
+            chunk_results = []
+            for window in iter_string_windows(df, max_rows, max(WINDOW_CHUNKS, workers * batch_size)):
+                chunk_results.extend(parallel_chunk_answers(
+                    window, question, workers, max_rows, batch_size, loader_args=(backend,)
+                ))
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning("TAPAS process pool unavailable, falling back to in-process inference: %s", e)
+            _process_pools.clear()
+            chunk_results = None
+
+    if chunk_results is None:
+        tokenizer, model = load_tapas_model(backend)
+        # Un lot de chunks converti à la fois : la table n'est jamais entièrement en texte
+        chunks = iter_string_chunks(df, max_rows, window=batch_size)
+        chunk_results = []
+        for batch in iter(lambda: list(islice(chunks, batch_size)), []):
+            chunk_results.extend(chunk_answers(tokenizer, model, batch, question, batch_size=batch_size))
+
+    # Chunks non évalués (modèle absent, erreur d'inférence) : la réponse est incomplète
+    complete = all(answers is not None for answers in chunk_results)
+    if not complete:
+        logger.warning("TAPAS could not score every chunk, the answer will not be cached")
+    all_answers = [answer for answers in chunk_results if answers for answer in answers]
 
-            outputs = model(**inputs)
-            predicted_answer_coords = tokenizer.convert_logits_to_predictions(
-                inputs,
-                outputs.logits.detach(),
-                outputs.logits_aggregation.detach()
-            )
+    if not all_answers:
+        return 'tapas', "Could not find an answer in the table.", complete
 
-            if predicted_answer_coords[0]:
-                cell_values = [get_cell_value(chunk_str, coord) for coord in predicted_answer_coords[0]]
-                clean_values = [val.strip() for val in cell_values if val.strip()]
-                all_answers.extend(clean_values)
+    return 'tapas', format_answers(all_answers), complete
 
-        except Exception:
-            continue
 
-    if not all_answers:
-        return "Could not find an answer in the table."
+def answer_engine(backend=DEFAULT_BACKEND, **options):
+    """Identifiant de tout ce qui détermine une réponse : version du moteur, modèle et options."""
+    return (ANSWER_ENGINE_VERSION, TAPAS_MODEL_NAME, backend, tuple(sorted(options.items())))
+
+
+def answer_question(question, df, dataset_key, cache=None, **options):
+    """``process_question`` avec cache des réponses par jeu de données (``dataset_key``) et question.
+
+    Une question déjà posée sur le même contenu, par n'importe quelle session, est servie
+    depuis le cache sans nouvelle agrégation ni inférence TAPAS. Une réponse dégradée (chunks
+    que TAPAS n'a pas pu évaluer) est renvoyée sans être mise en cache.
+    """
+    def compute(question, df):
+        answer, complete = _process_question(question, df, **options)
+        return answer if complete else Uncached(answer)
 
-    return format_answers(all_answers)
+    cache = get_query_cache() if cache is None else cache
+    return cache.answer(question, df, dataset_key, compute, answer_engine(**options))
 
 
 def show_tapas_ui(df):
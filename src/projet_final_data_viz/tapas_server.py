@@ -0,0 +1,208 @@
+"""Service TAPAS local : un processus durable qui garde le modèle chargé et répond à tous les serveurs Streamlit.
+
+Usage : TAPAS_SERVICE_AUTHKEY=<secret> PYTHONPATH=src python -m projet_final_data_viz.tapas_server --address 127.0.0.1:8765
+puis TAPAS_SERVICE_AUTHKEY=<secret> TAPAS_SERVICE_ADDRESS=127.0.0.1:8765 streamlit run app.py
+
+Les messages reçus sont désérialisés avec pickle : la clé doit rester secrète, sans quoi
+quiconque atteint l'adresse du service peut exécuter du code dans ce processus.
+"""
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Listener
+import pyarrow as pa
+from .model_registry import ModelRegistry
+from .tapas_backends import BACKENDS, DEFAULT_BACKEND
+from .tapas_client import TAPAS_SERVICE_AUTHKEY, parse_address
+from .tapas_code import DEFAULT_BATCH_SIZE, coordinate_answers, load_tapas_weights, predict_pair_coordinates
+
+logger = logging.getLogger(__name__)
+
+# Questions en attente au-delà desquelles le service refuse les nouvelles (contre-pression)
+TAPAS_SERVICE_QUEUE = int(os.getenv("TAPAS_SERVICE_QUEUE", "32"))
+# Nombre maximal de chunks par passe du modèle, toutes questions confondues, et attente pour compléter un lot
+TAPAS_SERVICE_MAX_BATCH = int(os.getenv("TAPAS_SERVICE_MAX_BATCH", "32"))
+TAPAS_SERVICE_BATCH_WAIT_MS = float(os.getenv("TAPAS_SERVICE_BATCH_WAIT_MS", "10"))
+
+
+class PendingQuestion:
+    """Question reçue d'un client, en attente de son passage dans un lot."""
+
+    def __init__(self, question, chunks, batch_size, backend):
+        self.question = question
+        self.chunks = chunks
+        self.batch_size = batch_size
+        self.backend = backend
+        self.answers = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class TapasService:
+    """Serveur d'inférence TAPAS : une file bornée et un thread qui regroupe les questions en lots.
+
+    Chaque connexion cliente est servie par un thread qui décode la table et met la question
+    en file ; si la file est pleine, le client reçoit ``busy`` immédiatement. Le thread
+    d'inférence regroupe les chunks de plusieurs questions (jusqu'à ``max_batch``, en attendant
+    au plus ``batch_wait`` secondes) dans les mêmes passes du modèle.
+    """
+
+    def __init__(self, address=("127.0.0.1", 8765), authkey=TAPAS_SERVICE_AUTHKEY, loader=load_tapas_weights,
+                 backend=DEFAULT_BACKEND, max_queue=TAPAS_SERVICE_QUEUE, max_batch=TAPAS_SERVICE_MAX_BATCH,
+                 batch_wait=TAPAS_SERVICE_BATCH_WAIT_MS / 1000):
+        if not authkey:
+            raise ValueError("the TAPAS service needs a secret TAPAS_SERVICE_AUTHKEY")
+        self.registry = ModelRegistry(loader)
+        self.backend = backend
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Socket Unix créée en 0600 : seul l'utilisateur du service peut s'y connecter
+        umask = os.umask(0o177) if isinstance(address, str) else None
+        try:
+            self._listener = Listener(address, authkey=authkey)
+        finally:
+            if umask is not None:
+                os.umask(umask)
+        self.address = self._listener.address
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.counters = {'questions': 0, 'rejected': 0, 'batches': 0, 'chunks': 0, 'errors': 0}
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats['queued'] = self._queue.qsize()
+        stats['chunks_per_batch'] = stats['chunks'] / stats['batches'] if stats['batches'] else 0.0
+        stats['models'] = self.registry.status()
+        return stats
+
+    def serve_forever(self):
+        """Charge le modèle par défaut en tâche de fond et sert les clients jusqu'à ``shutdown``."""
+        self.registry.preload(self.backend)
+        threading.Thread(target=self._inference_loop, name="tapas-inference", daemon=True).start()
+        logger.info("TAPAS service listening on %s", self.address)
+        while not self._stopping.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._stopping.is_set():
+                    break
+                logger.warning("TAPAS service: rejected connection", exc_info=True)
+                continue
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def shutdown(self):
+        self._stopping.set()
+        self._listener.close()
+        self._queue.put(None)
+
+    def _serve_client(self, conn):
+        with conn:
+            while not self._stopping.is_set():
+                try:
+                    message = conn.recv()
+                    if message.get('op') == 'stats':
+                        conn.send(('ok', self.stats()))
+                    elif message.get('op') == 'answer':
+                        conn.send(self._answer(message, conn.recv_bytes()))
+                    else:
+                        conn.send(('error', f"unknown operation {message.get('op')!r}"))
+                except (EOFError, OSError):
+                    return
+
+    def _answer(self, message, payload):
+        table = pa.ipc.open_stream(payload).read_all()
+        chunks = [table.slice(start, stop - start).to_pandas() for start, stop in message['bounds']]
+        del table
+        pending = PendingQuestion(message['question'], chunks, message.get('batch_size') or DEFAULT_BATCH_SIZE,
+                                  message.get('backend') or self.backend)
+        if pending.backend not in BACKENDS:
+            return 'error', f"unknown backend {pending.backend!r}"
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            self._count(rejected=1)
+            return 'busy', f"TAPAS service queue is full ({self._queue.maxsize} questions)"
+        self._count(questions=1)
+        pending.done.wait()
+        if pending.error is not None:
+            return 'error', pending.error
+        return 'ok', pending.answers
+
+    def _next_batch(self):
+        """Questions de la prochaine passe : la plus ancienne, plus celles qui arrivent pendant ``batch_wait``."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch, size = [first], len(first.chunks)
+        deadline = time.monotonic() + self.batch_wait
+        while size < self.max_batch:
+            try:
+                pending = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if pending is None:
+                self._queue.put(None)
+                break
+            batch.append(pending)
+            size += len(pending.chunks)
+        return batch
+
+    def _inference_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            for backend in dict.fromkeys(pending.backend for pending in batch):
+                self._run_batch(backend, [pending for pending in batch if pending.backend == backend])
+
+    def _run_batch(self, backend, batch):
+        try:
+            tokenizer, model = self.registry.get(backend)
+            pairs = [(chunk, pending.question) for pending in batch for chunk in pending.chunks]
+            predictions = iter(predict_pair_coordinates(
+                tokenizer, model, pairs, batch_size=max(pending.batch_size for pending in batch)
+            ))
+            for pending in batch:
+                pending.answers = [coordinate_answers(chunk, next(predictions)) for chunk in pending.chunks]
+            self._count(batches=1, chunks=len(pairs))
+        except Exception as e:
+            logger.exception("TAPAS service batch failed")
+            self._count(errors=1)
+            for pending in batch:
+                pending.error = f"{type(e).__name__}: {e}"
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--address', default=os.getenv("TAPAS_SERVICE_ADDRESS") or "127.0.0.1:8765")
+    parser.add_argument('--backend', default=DEFAULT_BACKEND, choices=BACKENDS)
+    parser.add_argument('--max-queue', type=int, default=TAPAS_SERVICE_QUEUE)
+    parser.add_argument('--max-batch', type=int, default=TAPAS_SERVICE_MAX_BATCH)
+    parser.add_argument('--batch-wait-ms', type=float, default=TAPAS_SERVICE_BATCH_WAIT_MS)
+    args = parser.parse_args(argv)
+    if not TAPAS_SERVICE_AUTHKEY:
+        parser.error("TAPAS_SERVICE_AUTHKEY must be set to a secret shared with the Streamlit servers")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    service = TapasService(parse_address(args.address), backend=args.backend, max_queue=args.max_queue,
+                           max_batch=args.max_batch, batch_wait=args.batch_wait_ms / 1000)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
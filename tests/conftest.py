@@ -0,0 +1,33 @@
+import tempfile
+import pytest
+import torch
+from transformers import TapasTokenizer, TapasConfig, TapasForQuestionAnswering
+
+TINY_VOCAB = [
+    "[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "[EMPTY]",
+    "what", "is", "the", "name", "city", "paris", "london", "berlin", "a", "b", "c", "1", "2", "3",
+]
+
+
+def load_tiny_tapas(directory=None):
+    """ Petit tokenizer/modèle TAPAS aléatoire, sans téléchargement, qui sélectionne toujours des cellules """
+    directory = directory or tempfile.mkdtemp()
+    vocab_file = f"{directory}/vocab.txt"
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(TINY_VOCAB))
+    tokenizer = TapasTokenizer(vocab_file)
+
+    torch.manual_seed(0)
+    config = TapasConfig(
+        vocab_size=len(TINY_VOCAB), hidden_size=16, num_hidden_layers=1,
+        num_attention_heads=2, intermediate_size=16, num_aggregation_labels=4
+    )
+    model = TapasForQuestionAnswering(config).eval()
+    with torch.no_grad():
+        model.output_bias.fill_(10.0)
+    return tokenizer, model
+
+
+@pytest.fixture
+def tiny_tapas(tmp_path):
+    return load_tiny_tapas(tmp_path)
@@ -0,0 +1,54 @@
+import pandas as pd
+from projet_final_data_viz.aggregation import aggregate, numeric_column
+from projet_final_data_viz.tapas_code import process_aggregation, process_question
+
+
+def sales():
+    return pd.DataFrame({
+        'Category': ['A', 'A', 'B', 'B'],
+        'Region': ['N', 'S', 'N', 'N'],
+        'Amount': ['100', '200', 'n/a', '250'],
+        'Units': [1, 2, 3, 4],
+    })
+
+
+def test_numeric_coercion_is_cached_and_leaves_the_frame_untouched():
+    df = sales()
+
+    amounts = numeric_column(df, 'Amount')
+
+    assert numeric_column(df, 'Amount') is amounts
+    assert amounts.isna().sum() == 1
+    assert df['Amount'].dtype == object
+    assert numeric_column(df, 'Units') is df['Units']
+
+
+def test_several_aggregations_and_group_keys_in_one_pass():
+    df = sales()
+
+    result = aggregate(df, [('sum', 'Units'), ('max', 'Amount'), ('count', 'Amount')], ['Category', 'Region'])
+
+    assert result.loc[('B', 'N')].tolist() == [7, 250.0, 1]
+    assert list(result.columns) == ['sum of Units', 'max of Amount', 'count of Amount']
+    assert df.equals(sales())
+
+
+def test_grouped_answers_are_formatted_per_column():
+    df = sales()
+
+    assert process_aggregation(df, 'mean', 'Amount', 'Category') == "A: $150.00\nB: $250.00"
+    assert process_aggregation(df, 'sum', 'Units', 'Category') == "A: 3\nB: 7"
+    assert process_aggregation(df, ['min', 'max'], 'Units', ['Category', 'Region']) == (
+        "A / N: min of Units 1 · max of Units 1\n"
+        "A / S: min of Units 2 · max of Units 2\n"
+        "B / N: min of Units 3 · max of Units 4"
+    )
+    assert process_aggregation(df, 'median', 'Units') == "Error in aggregation: Unknown aggregation: median"
+
+
+def test_aggregation_questions_do_not_copy_the_table():
+    df = sales()
+    df.loc[1, 'Units'] = None
+
+    assert process_question("What is the sum of Units?", df) == "8"
+    assert df['Units'].isna().sum() == 1
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from projet_final_data_viz.api import ClaudeTransport, TokenBucket, ask_claude, retry_after_seconds
+
+
+class StubClaude(BaseHTTPRequestHandler):
+    """Faux serveur ``/v1/complete`` : rejoue ``server.replies`` puis répond 200."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["content-length"]))
+        self.server.requests.append(self.client_address)
+        status, headers, body = self.server.replies.pop(0) if self.server.replies else (200, {}, {"completion": "ok"})
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubClaude)
+    server.requests, server.replies = [], []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def transport_for(server, **options):
+    options.setdefault("limiter", TokenBucket(rate=1000, capacity=1000))
+    return ClaudeTransport(base_url=f"http://127.0.0.1:{server.server_port}", api_key="test", **options)
+
+
+def test_retries_honor_retry_after_and_reuse_the_connection(stub):
+    stub.replies = [(429, {"retry-after": "0"}, {"error": "rate_limited"}), (503, {}, {"error": "overloaded"})]
+    delays = []
+    transport = transport_for(stub, backoff=0.01, sleep=delays.append)
+
+    assert ask_claude("Bonjour", transport) == "ok"
+    assert ask_claude("Encore", transport) == "ok"
+
+    assert delays[0] == 0 and 0 < delays[1] <= 0.02
+    assert transport.retries == 2
+    # Quatre requêtes, une seule connexion TCP (keep-alive)
+    assert len(stub.requests) == 4 and len(set(stub.requests)) == 1
+
+
+def test_malformed_retry_after_falls_back_to_backoff(stub):
+    stub.replies = [(503, {"retry-after": "abc"}, {"error": "overloaded"})]
+    delays = []
+    transport = transport_for(stub, backoff=0.01, sleep=delays.append)
+
+    assert ask_claude("Bonjour", transport) == "ok"
+    assert len(delays) == 1 and 0 < delays[0] <= 0.02
+
+
+def test_retry_after_dates_without_timezone_are_utc():
+    in_a_minute = time.strftime("%a, %d %b %Y %H:%M:%S", time.gmtime(time.time() + 60))
+    response = SimpleNamespace(headers={"retry-after": in_a_minute})
+
+    assert 55 <= retry_after_seconds(response) <= 61
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.replies = [(500, {}, {"error": "boom"})] * 3
+    transport = transport_for(stub, max_retries=2, sleep=lambda delay: None)
+
+    assert transport.post("/v1/complete", {}).status_code == 500
+    assert len(stub.requests) == 3
+
+
+def test_network_errors_end_with_an_api_error():
+    transport = ClaudeTransport(base_url="http://127.0.0.1:9", timeout=(0.2, 0.2), max_retries=1,
+                                limiter=TokenBucket(rate=1000, capacity=1000), sleep=lambda delay: None)
+
+    assert ask_claude("Bonjour", transport) == "Erreur API"
+    assert transport.retries == 1
+
+
+def test_token_bucket_spaces_requests_beyond_the_burst():
+    now, waits = [0.0], []
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=waits.append)
+
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    now[0] = 10.0
+    assert bucket.acquire() == 0.0
+    assert waits == [0.5, 1.0]
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from projet_final_data_viz import async_agents
+from projet_final_data_viz.llm_cache import ResponseCache
+
+LATENCY = 0.2
+
+
+class FakeAsyncClient:
+    """ Client Claude asynchrone : chaque appel dure LATENCY secondes """
+
+    def __init__(self, api_key=None):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, **params):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(LATENCY)
+        self.in_flight -= 1
+        return SimpleNamespace(content=[SimpleNamespace(text="fig = go.Figure(go.Bar(x=[1, 2], y=[3, 4]))")])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def execute(code, df):
+    return go.Figure(go.Bar(x=[1, 2], y=[3, 4]))
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    cache = ResponseCache(path=None)
+    monkeypatch.setattr(async_agents, 'get_response_cache', lambda: cache)
+    return cache
+
+
+def test_generate_all_charts_runs_concurrently():
+    df = pd.DataFrame({'a': [1, 2], 'b': [3, 4]})
+    chart_types = [f"Graphique {i}" for i in range(5)]
+    clients = []
+
+    def factory(api_key):
+        clients.append(FakeAsyncClient(api_key))
+        return clients[0]
+
+    start = time.perf_counter()
+    results = async_agents.generate_all_charts(df, chart_types, "key", execute, max_concurrency=5, client_factory=factory)
+    elapsed = time.perf_counter() - start
+
+    # 5 codes puis 5 interprétations de la même figure, partagées en un seul appel : deux "vagues" successives
+    assert [r['chart_type'] for r in results] == chart_types
+    assert all(r['error'] is None and r['interpretation'] for r in results)
+    assert clients[0].calls == 6
+    assert elapsed < 5 * LATENCY
+
+
+def test_concurrency_limit_is_respected():
+    client = FakeAsyncClient()
+    df = pd.DataFrame({'a': [1, 2]})
+    results = asyncio.run(async_agents.agenerate_all_charts(
+        df, [f"Graphique {i}" for i in range(4)], client, execute, max_concurrency=2
+    ))
+    assert len(results) == 4
+    assert client.max_in_flight == 2
+
+
+def test_chart_pipeline_reports_execution_errors():
+    def broken(code, df):
+        raise ValueError("colonne inconnue")
+
+    result = asyncio.run(async_agents.chart_pipeline(pd.DataFrame(), "Barres", FakeAsyncClient(), broken))
+    assert result['fig'] is None
+    assert "colonne inconnue" in result['error']
+
+
+def test_chart_pipeline_regenerates_code_that_failed():
+    def broken(code, df):
+        raise SyntaxError("invalid syntax")
+
+    client, df = FakeAsyncClient(), pd.DataFrame({'a': [1, 2]})
+    for _ in range(2):
+        result = asyncio.run(async_agents.chart_pipeline(df, "Barres", client, broken))
+        assert "syntaxe" in result['error']
+    assert client.calls == 2
@@ -0,0 +1,46 @@
+import pandas as pd
+from projet_final_data_viz.cache import FrameMemo, LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    evicted = []
+    cache = LRUCache(max_bytes=10, sizeof=len, on_evict=lambda key, value: evicted.append(key))
+    cache.put('a', 'xxxx')
+    cache.put('b', 'xxxx')
+    assert cache.get('a') == 'xxxx'
+
+    cache.put('c', 'xxxx')
+
+    assert evicted == ['b']
+    assert 'a' in cache and 'c' in cache
+    assert cache.get('b') is None
+    assert cache.stats() == {'items': 2, 'bytes': 8, 'hits': 1, 'misses': 1, 'evictions': 1}
+
+
+def test_lru_cache_rejects_oversized_entries():
+    cache = LRUCache(max_items=2, max_bytes=3, sizeof=len)
+    cache.put('big', 'xxxx')
+    cache.put('a', 'x')
+    cache.put('b', 'x')
+    cache.put('c', 'x')
+
+    assert 'big' not in cache
+    assert list(key for key in 'abc' if key in cache) == ['b', 'c']
+
+
+def test_frame_memo_is_keyed_by_object():
+    memo = FrameMemo()
+    df = pd.DataFrame({'a': [1, 2]})
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return df['a'].sum()
+
+    assert memo.get(df, 'sum', compute) == 3
+    assert memo.get(df, 'sum', compute) == 3
+    assert memo.get(df.copy(), 'sum', compute) == 3
+    assert len(calls) == 2
+
+    del df
+    assert len(memo) == 0
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from projet_final_data_viz.code_executor import (
+    CodeExecutionError, CodeExecutionTimeout, CodeExecutor, compile_cached
+)
+
+BAR_CODE = """
+agg = df.groupby('ville', observed=True)['ventes'].sum().reset_index()
+fig = px.bar(agg, x='ville', y='ventes')
+"""
+
+
+@pytest.fixture(scope='module')
+def executor():
+    executor = CodeExecutor(workers=1, timeout=20, memory_mb=1024, shared_mb=64)
+    yield executor
+    executor.close()
+
+
+@pytest.fixture
+def sales():
+    return pd.DataFrame({'ville': ['Paris', 'Lyon', 'Paris', 'Nantes'], 'ventes': [1.0, 2.0, 3.0, 4.0]})
+
+
+def test_compiled_code_is_reused():
+    assert compile_cached("fig = None") is compile_cached("fig = None")
+    with pytest.raises(SyntaxError):
+        compile_cached("fig = (")
+
+
+def test_worker_returns_a_figure_without_mutating_the_dataset(executor, sales):
+    fig = executor.run(BAR_CODE, sales)
+
+    assert isinstance(fig, go.Figure)
+    assert dict(zip(fig.data[0].x, fig.data[0].y)) == {'Lyon': 2.0, 'Nantes': 4.0, 'Paris': 4.0}
+    assert executor.run("df['ventes'] = 0\nfig = None", sales) is None
+    fig = executor.run(BAR_CODE, sales)
+    assert list(fig.data[0].y) == [2.0, 4.0, 4.0]
+    assert sales['ventes'].sum() == 10.0
+
+
+def test_errors_are_reported_and_syntax_checked_locally(executor, sales):
+    with pytest.raises(CodeExecutionError, match="KeyError"):
+        executor.run("fig = px.bar(df, x=df['absente'])", sales)
+    with pytest.raises(SyntaxError):
+        executor.run("fig = (", sales)
+
+
+def test_timeout_replaces_the_worker(executor, sales):
+    with pytest.raises(CodeExecutionTimeout):
+        executor.run("while True:\n    pass", sales, timeout=2)
+
+    assert isinstance(executor.run(BAR_CODE, sales), go.Figure)
+    assert executor.stats()['timeouts'] == 1
+
+
+def test_memory_limit_is_enforced(executor, sales):
+    with pytest.raises(CodeExecutionError, match="MemoryError"):
+        executor.run("x = np.ones(300_000_000)", sales)
+
+    assert isinstance(executor.run(BAR_CODE, sales), go.Figure)
+
+
+def test_without_workers_code_runs_in_process(sales):
+    executor = CodeExecutor(workers=0)
+    sales['date'] = pd.date_range('2024-01-01', periods=len(sales))
+
+    fig = executor.run("fig = go.Figure(go.Scatter(x=df['date'], y=np.cumsum(df['ventes'])))", sales)
+
+    assert list(fig.data[0].y) == [1.0, 3.0, 6.0, 10.0]
+    assert executor.stats()['in_process_runs'] == 1
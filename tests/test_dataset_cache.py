@@ -0,0 +1,130 @@
+import gc
+import io
+import threading
+import pandas as pd
+import pytest
+from projet_final_data_viz.dataset_cache import DatasetCache, content_hash
+from projet_final_data_viz.ingestion import load_csv
+
+
+@pytest.fixture
+def counting_loader():
+    """ Loader qui compte les analyses de CSV """
+    calls = []
+
+    def loader(file, progress=None):
+        calls.append(1)
+        return load_csv(file, progress=progress)
+
+    loader.calls = calls
+    return loader
+
+
+def csv_file(content):
+    return io.BytesIO(content.encode())
+
+
+def test_content_hash_ignores_name_and_position():
+    first = csv_file("a,b\n1,2\n")
+    first.read(3)
+    assert content_hash(first) == content_hash(csv_file("a,b\n1,2\n"))
+    assert first.tell() == 0
+    assert content_hash(csv_file("a,b\n1,3\n")) != content_hash(first)
+
+
+def test_same_content_is_parsed_once(tmp_path, counting_loader):
+    cache = DatasetCache(tmp_path)
+    key, entry = cache.load(csv_file("a,b\n1,2\n"), loader=counting_loader)
+    cache.update(key, suggestions=["1. Histogramme de a"])
+
+    same_key, same_entry = cache.load(csv_file("a,b\n1,2\n"), loader=counting_loader)
+    other_key, _ = cache.load(csv_file("a,b\n1,3\n"), loader=counting_loader)
+
+    assert same_key == key and same_entry is entry
+    assert other_key != key
+    assert len(counting_loader.calls) == 2
+
+
+def test_entries_are_restored_from_parquet(tmp_path, counting_loader):
+    first = DatasetCache(tmp_path)
+    key, entry = first.load(csv_file("city,sales\nParis,1\nParis,2\n"), loader=counting_loader)
+    first.update(key, suggestions=["1. Barres"])
+
+    key2, restored = DatasetCache(tmp_path).load(csv_file("city,sales\nParis,1\nParis,2\n"), loader=counting_loader)
+
+    assert key2 == key
+    assert len(counting_loader.calls) == 1
+    assert restored['report']['engine'] == 'arrow-mmap'
+    assert restored['suggestions'] == ["1. Barres"]
+    pd.testing.assert_frame_equal(restored['df'], entry['df'])
+
+
+def test_memory_budget_evicts_to_disk(tmp_path, counting_loader):
+    cache = DatasetCache(tmp_path, max_mb=0)
+    cache.load(csv_file("a\n1\n"), loader=counting_loader)
+    cache.load(csv_file("a\n1\n"), loader=counting_loader)
+
+    assert len(counting_loader.calls) == 1
+    assert cache.stats()['items'] == 0
+
+
+def test_sessions_share_one_read_only_mapped_frame(tmp_path, counting_loader):
+    cache = DatasetCache(tmp_path)
+    key, entry = cache.load(csv_file("city,sales\nParis,10\nLyon,20\nParis,30\n"), loader=counting_loader)
+
+    first, second = cache.acquire(key), cache.acquire(key)
+
+    assert first.df is second.df is entry['df']
+    assert entry['df']['sales'].sum() == 60
+    # Colonne numérique : vue en lecture seule sur le fichier Arrow
+    assert not entry['df']['sales'].to_numpy().flags.writeable
+    assert entry['heap_bytes'] < entry['memory_bytes']
+    assert (tmp_path / f"{key}.arrow").exists()
+    assert cache.stats()['leased'] == 1 and cache.stats()['leases'] == 2
+
+
+def test_leased_entries_are_not_evicted(tmp_path, counting_loader):
+    cache = DatasetCache(tmp_path, max_mb=0, max_disk_mb=0)
+    key, entry = cache.load(csv_file("a\n1\n"), loader=counting_loader)
+    lease = cache.acquire(key, entry)
+    cache.load(csv_file("a\n2\n"), loader=counting_loader)
+
+    # L'entrée ouverte reste en mémoire et sur disque malgré les budgets nuls
+    assert cache.get(key) is entry and (tmp_path / f"{key}.arrow").exists()
+    assert cache.load(csv_file("a\n1\n"), loader=counting_loader)[1]['df'] is lease.df
+    assert len(counting_loader.calls) == 2
+
+    del lease
+    gc.collect()
+    assert cache.stats()['leases'] == 0 and cache.get(key) is None
+    with pytest.raises(KeyError):
+        cache.acquire("inconnu")
+
+
+def test_parsing_one_file_does_not_block_other_files(tmp_path):
+    cache = DatasetCache(tmp_path)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_loader(file, progress=None):
+        calls.append(1)
+        started.set()
+        release.wait(10)
+        return load_csv(file, progress=progress)
+
+    slow = [threading.Thread(target=cache.load, args=(csv_file("a\n1\n"),), kwargs={'loader': slow_loader})
+            for _ in range(2)]
+    for thread in slow:
+        thread.start()
+    assert started.wait(10)
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(cache.load(csv_file("b\n2\n"))))
+    thread.start()
+    thread.join(5)
+    assert other and other[0][1]['df']['b'].tolist() == [2]
+
+    release.set()
+    for thread in slow:
+        thread.join(10)
+    assert len(calls) == 1
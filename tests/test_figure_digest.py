@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import pytest
+from projet_final_data_viz.agents import interpretation_prompt
+from projet_final_data_viz.figure_digest import digest_figure, format_digest
+
+
+def test_digest_covers_every_trace_with_trend():
+    df = pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=10).repeat(2),
+        'ventes': np.concatenate([[3 * i, 100 - i] for i in range(10)]),
+        'magasin': ['A', 'B'] * 10,
+    })
+    digest = digest_figure(px.line(df, x='date', y='ventes', color='magasin', title='Ventes'))
+
+    assert digest['title'] == 'Ventes' and digest['trace_count'] == 2
+    first, second = digest['traces']
+    assert first['x']['kind'] == 'datetime' and first['points'] == 10
+    assert first['trend']['slope'] == pytest.approx(3.0) and first['trend']['per'] == 'jour'
+    assert second['trend']['slope'] == pytest.approx(-1.0)
+    assert second['y']['median'] == pytest.approx(95.5)
+
+
+def test_digest_bar_top_categories():
+    fig = px.bar(pd.DataFrame({'ville': ['Paris', 'Lyon', 'Paris', 'Nice'], 'ca': [5, 8, 4, 1]}), x='ville', y='ca')
+    trace = digest_figure(fig)['traces'][0]
+    assert trace['y_by_x']['top'] == [('Paris', 9), ('Lyon', 8), ('Nice', 1)]
+    assert "plus grands totaux de y par x : Paris 9, Lyon 8, Nice 1" in format_digest(digest_figure(fig))
+
+
+def test_digest_axisless_traces():
+    sankey = go.Figure(go.Sankey(node=dict(label=['A', 'B', 'C']), link=dict(source=[0, 0, 1], target=[1, 2, 2], value=[5, 3, 2])))
+    trace = digest_figure(sankey)['traces'][0]
+    assert trace['top_links'][0] == ('A → B', 5.0)
+    assert trace['top_nodes'][0] == ('A', 8.0)
+
+    pie = digest_figure(px.pie(names=['x', 'y'], values=[3, 1]))['traces'][0]
+    assert pie['top'][0] == ('x', 3, 0.75)
+
+    heatmap = digest_figure(px.imshow(np.arange(6).reshape(2, 3)))['traces'][0]
+    assert heatmap['shape'] == (2, 3) and heatmap['argmax'] == (2, 1)
+
+
+def test_interpretation_prompt_uses_digest_not_json():
+    fig = px.scatter(x=np.arange(50_000), y=np.arange(50_000) * 2.0)
+    prompt = interpretation_prompt(fig)
+    assert '"type":' not in prompt
+    assert "pente 2 par unité de x" in prompt
+    assert len(prompt) < 2000
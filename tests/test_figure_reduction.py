@@ -0,0 +1,112 @@
+from unittest import mock
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from projet_final_data_viz import figure_reduction
+from projet_final_data_viz.figure_reduction import lttb_indices, minmax_indices, reduce_figure, reduction_caption
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(10_000, dtype=float)
+    y = np.zeros_like(x)
+    y[4321] = 100.0
+    indices = lttb_indices(x, y, 200)
+
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == 9_999
+    assert 4321 in indices
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_minmax_keeps_extremes_and_skips_missing():
+    y = np.sin(np.linspace(0, 20, 5_000))
+    y[10] = np.nan
+    indices = minmax_indices(y, 100)
+    assert len(indices) <= 100
+    assert np.nanargmax(y) in indices and np.nanargmin(y) in indices
+    assert 10 not in indices
+
+
+def test_reduce_figure_respects_budget_and_keeps_original():
+    rng = np.random.default_rng(0)
+    n = 200_000
+    df = pd.DataFrame({'x': rng.normal(size=n), 'y': rng.normal(size=n), 'valeur': rng.random(n)})
+    fig = go.Figure([
+        go.Scatter(x=df['x'], y=df['y'], mode='markers', marker=dict(color=df['valeur'])),
+        go.Scatter(x=np.arange(n), y=np.cumsum(df['y']), mode='lines'),
+    ])
+    reduced, report = reduce_figure(fig, max_points=20_000)
+
+    assert report['points_before'] == 2 * n
+    assert report['points_after'] <= 20_000
+    assert [action['method'] for action in report['actions']] == ['grid-binning', 'lttb']
+    assert all(trace.type == 'scattergl' for trace in reduced.data)
+    # Couleurs par point restreintes aux mêmes points que x et y
+    assert len(reduced.data[0].marker.color) == len(reduced.data[0].x)
+    assert len(fig.data[0].x) == n
+    assert "400 000 →" in reduction_caption(report)
+
+
+def test_histogram_is_binned_server_side():
+    fig = px.histogram(pd.DataFrame({'v': np.random.default_rng(1).normal(size=100_000)}), x='v')
+    reduced, report = reduce_figure(fig, max_points=10_000)
+    assert reduced.data[0].type == 'bar'
+    assert reduced.data[0].y.sum() == 100_000
+    assert report['payload_bytes'] < 50_000
+
+
+def test_colored_histograms_share_bins():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({'v': np.r_[rng.normal(size=60_000), rng.normal(3, 0.2, size=40_000)],
+                       'g': ['a'] * 60_000 + ['b'] * 40_000})
+    reduced, _ = reduce_figure(px.histogram(df, x='v', color='g'), max_points=10_000)
+
+    first, second = reduced.data
+    assert first.type == second.type == 'bar'
+    assert np.array_equal(first.x, second.x) and np.array_equal(first.width, second.width)
+    assert first.y.sum() == 60_000 and second.y.sum() == 40_000
+
+
+def test_histogram_settings_are_honoured():
+    df = pd.DataFrame({'v': np.random.default_rng(3).uniform(0, 6, size=100_000)})
+    fig = px.histogram(df, x='v', cumulative=True)
+    fig.update_traces(xbins={'start': 0, 'end': 6, 'size': 1})
+    reduced, _ = reduce_figure(fig, max_points=10_000)
+
+    assert len(reduced.data[0].x) == 6
+    assert list(reduced.data[0].y) == sorted(reduced.data[0].y) and reduced.data[0].y[-1] == 100_000
+
+    fig.update_traces(cumulative={'currentbin': 'half'})
+    assert reduce_figure(fig, max_points=10_000)[0].data[0].type == 'histogram'
+
+
+def test_small_figures_are_untouched():
+    fig = px.bar(x=['a', 'b'], y=[1, 2])
+    reduced, report = reduce_figure(fig)
+    assert reduced is fig and report['actions'] == [] and reduction_caption(report) is None
+
+
+def test_stacked_areas_and_splines_stay_svg():
+    rng = np.random.default_rng(4)
+    n = 30_000
+    df = pd.DataFrame({'t': np.tile(np.arange(n), 2), 'v': rng.random(2 * n), 'g': ['a'] * n + ['b'] * n})
+    reduced, report = reduce_figure(px.area(df, x='t', y='v', color='g'), max_points=10_000)
+
+    first, second = reduced.data
+    assert first.type == second.type == 'scatter'
+    assert first.stackgroup == second.stackgroup == '1'
+    assert np.array_equal(first.x, second.x) and len(first.x) <= 5_000
+    assert report['points_after'] <= 10_000
+
+    spline = px.line(df[df['g'] == 'a'], x='t', y='v', line_shape='spline')
+    reduced, report = reduce_figure(spline, max_points=10_000)
+    assert reduced.data[0].type == 'scatter' and reduced.data[0].line.shape == 'spline'
+    assert report['points_after'] <= 10_000
+
+
+def test_failed_reduction_shows_the_original_figure():
+    fig = go.Figure(go.Scatter(x=np.arange(60_000), y=np.arange(60_000), mode='lines'))
+    with mock.patch.object(figure_reduction, 'lttb_indices', side_effect=ValueError("boom")):
+        reduced, report = reduce_figure(fig, max_points=10_000)
+    assert reduced is fig and report['actions'] == []
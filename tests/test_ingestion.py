@@ -0,0 +1,109 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from projet_final_data_viz.ingestion import load_csv, optimize_dtypes, iter_csv_chunks
+
+
+@pytest.fixture
+def csv_bytes():
+    """ CSV de 1000 lignes : ville peu variée, dates, entiers et flottants """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'city': rng.choice(['Paris', 'Lyon', 'Nice'], 1000),
+        'label': [f"item-{i}" for i in range(1000)],
+        'day': pd.date_range('2024-01-01', periods=1000, freq='h').strftime('%d/%m/%Y'),
+        'quantity': rng.integers(0, 100, 1000),
+        'price': rng.integers(0, 1000, 1000) / 4,
+    })
+    return df.to_csv(index=False).encode()
+
+
+def test_optimize_dtypes():
+    df = pd.DataFrame({
+        'city': ['Paris', 'Lyon', 'Paris', 'Lyon'],
+        'name': ['a', 'b', 'c', 'd'],
+        'date': ['2024-01-01', '2024-02-01', None, '2024-03-01'],
+        'count': [1, 2, 3, 4],
+        'ratio': [0.5, 0.25, np.nan, 1.0],
+        'precise': [0.1, 0.2, 0.3, 0.4],
+    })
+    optimized = optimize_dtypes(df)
+
+    assert optimized['city'].dtype == 'category'
+    assert optimized['name'].dtype == object
+    assert pd.api.types.is_datetime64_any_dtype(optimized['date'])
+    assert optimized['count'].dtype == np.int32
+    assert optimized['ratio'].dtype == np.float64
+    assert optimized['precise'].dtype == np.float64
+    assert df['city'].dtype == object
+
+
+def test_optimize_dtypes_parses_dates_with_one_format():
+    df = pd.DataFrame({
+        'french': ['01/02/2024', '13/02/2024', '05/03/2024', None],
+        'us': ['01/02/2024', '02/13/2024', '03/05/2024', '12/31/2024'],
+        'iso': ['2024-02-01', '2024-02-13', '2024-03-05 10:30:00', '2024-12-31'],
+        'mixed': ['01/02/2024', '2024-02-13', '05/03/2024', '2024-12-31'],
+    })
+    optimized = optimize_dtypes(df)
+
+    assert optimized['french'].dt.strftime('%Y-%m-%d').tolist()[:3] == ['2024-02-01', '2024-02-13', '2024-03-05']
+    assert optimized['french'].isna().tolist() == [False, False, False, True]
+    assert optimized['us'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-02', '2024-02-13', '2024-03-05', '2024-12-31']
+    assert optimized['iso'].dt.strftime('%Y-%m-%d').tolist() == ['2024-02-01', '2024-02-13', '2024-03-05', '2024-12-31']
+    assert optimized['mixed'].dtype == object
+
+
+def test_optimize_dtypes_keeps_wide_integers():
+    df = pd.DataFrame({'qty': [100, 120], 'price': [300, 250], 'big': [1, 2**40]})
+    optimized = optimize_dtypes(df)
+
+    assert optimized['qty'].dtype == np.int32
+    assert (optimized['qty'] * optimized['price']).tolist() == [30000, 30000]
+    assert optimized['big'].dtype == np.int64
+
+
+def test_optimize_dtypes_keeps_float_sums_exact():
+    amounts = np.arange(2_000_000) % 1_000_000 + 0.25 * (np.arange(2_000_000) % 4)
+    optimized = optimize_dtypes(pd.DataFrame({'amount': amounts}))
+
+    # Quarts d'unité exacts en float32, mais leur somme en float32 perd les unités
+    assert optimized['amount'].sum() == 999_999_750_000.0
+    assert optimized['amount'].mean() == amounts.mean()
+
+
+def test_load_csv_small_file(csv_bytes):
+    df, report = load_csv(io.BytesIO(csv_bytes))
+
+    assert report['engine'] == 'pyarrow'
+    assert (report['rows'], report['columns']) == (1000, 5)
+    assert report['memory_saved_mb'] > 0
+    assert df['city'].dtype == 'category'
+    assert pd.api.types.is_datetime64_any_dtype(df['day'])
+    assert df['price'].sum() == pd.read_csv(io.BytesIO(csv_bytes))['price'].sum()
+
+
+def test_load_csv_streaming_with_progress(csv_bytes):
+    fractions = []
+    df, report = load_csv(io.BytesIO(csv_bytes), progress=fractions.append, block_size=4096, large_file_bytes=0)
+
+    assert report['engine'] == 'pyarrow-stream'
+    assert len(df) == 1000
+    assert len(fractions) > 2
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
+
+
+def test_load_csv_falls_back_when_types_change_between_blocks():
+    content = "value\n" + "1\n" * 5000 + "abc\n"
+    df, report = load_csv(io.BytesIO(content.encode()), block_size=1024, large_file_bytes=0)
+
+    assert report['engine'] == 'c'
+    assert len(df) == 5001
+
+
+def test_iter_csv_chunks(csv_bytes):
+    chunks = list(iter_csv_chunks(io.BytesIO(csv_bytes), block_size=4096))
+
+    assert len(chunks) > 1
+    assert sum(len(chunk) for chunk in chunks) == 1000
@@ -0,0 +1,210 @@
+import threading
+import time
+from types import SimpleNamespace
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from projet_final_data_viz import agents
+from projet_final_data_viz.llm_cache import ResponseCache
+
+
+class FakeClient:
+    """ Client Claude qui compte les appels à l'API """
+
+    def __init__(self, text="1. Histogramme des ventes"):
+        self.calls = []
+        self.messages = SimpleNamespace(create=self._create)
+        self.text = text
+
+    def _create(self, **params):
+        self.calls.append(params)
+        return SimpleNamespace(content=[SimpleNamespace(text=self.text)])
+
+
+PARAMS = {'model': 'claude-3-5-sonnet-20241022', 'max_tokens': 500,
+          'messages': [{'role': 'user', 'content': 'Bonjour'}]}
+
+
+def test_response_cache_memory_and_disk_tiers(tmp_path):
+    client = FakeClient()
+    cache = ResponseCache(tmp_path / "claude.sqlite")
+
+    assert cache.create(client, **PARAMS).content[0].text == client.text
+    assert cache.create(client, **PARAMS).content[0].text == client.text
+    assert len(client.calls) == 1
+
+    # Nouveau processus : la réponse est relue depuis SQLite
+    other = ResponseCache(tmp_path / "claude.sqlite")
+    assert other.create(client, **PARAMS).content[0].text == client.text
+    assert len(client.calls) == 1
+    assert other.stats()['disk_hits'] == 1
+    assert cache.stats()['memory_hits'] == 1 and cache.stats()['misses'] == 1
+
+    # Paramètres différents : nouvel appel
+    cache.create(client, **dict(PARAMS, max_tokens=200))
+    assert len(client.calls) == 2
+
+
+def test_response_cache_ttl_and_empty_responses(tmp_path):
+    client = FakeClient(text=None)
+    cache = ResponseCache(tmp_path / "claude.sqlite", ttl=-1)
+    cache.create(client, **PARAMS)
+    cache.create(client, **PARAMS)
+    assert len(client.calls) == 2
+
+    client.text = "ok"
+    cache.create(client, **PARAMS)
+    cache.create(client, **PARAMS)
+    assert len(client.calls) == 4
+    assert cache.stats()['misses'] == 4
+
+
+def test_generate_plotly_code_uses_cache(tmp_path, monkeypatch):
+    cache = ResponseCache(path=None)
+    monkeypatch.setattr(agents, 'get_response_cache', lambda: cache)
+    client = FakeClient(text="fig = px.bar(df, x='a', y='b')")
+    df = pd.DataFrame({'a': ['x', 'y'], 'b': [1, 2]})
+
+    first = agents.generate_plotly_code(df, "Bar chart", client)
+    second = agents.generate_plotly_code(df, "Bar chart", client)
+
+    assert first == second == "[fig = px.bar(df, x='a', y='b')]"
+    assert len(client.calls) == 1
+    assert cache.stats()['hit_rate'] == pytest.approx(0.5)
+
+
+def test_forgotten_plotly_code_is_generated_again(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path / "claude.sqlite")
+    monkeypatch.setattr(agents, 'get_response_cache', lambda: cache)
+    client = FakeClient(text="fig = px.bar(df, x='inconnue')")
+    df = pd.DataFrame({'a': ['x', 'y'], 'b': [1, 2]})
+
+    agents.generate_plotly_code(df, "Bar chart", client)
+    agents.forget_plotly_code(df, "Bar chart")
+    agents.generate_plotly_code(df, "Bar chart", client)
+    assert len(client.calls) == 2
+
+    # Oublié aussi sur disque
+    agents.forget_plotly_code(df, "Bar chart")
+    assert ResponseCache(tmp_path / "claude.sqlite").get(client.calls[0]) is None
+
+
+class FakeStream:
+    """ Flux de réponse : fragments de texte produits un par un """
+
+    def __init__(self, chunks):
+        self.text_stream = iter(chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_response_cache_stream_caches_full_text(tmp_path):
+    client = FakeClient()
+    client.messages.stream = lambda **params: client.calls.append(params) or FakeStream(["1. Histo", "gramme", " des ventes"])
+    cache = ResponseCache(tmp_path / "claude.sqlite")
+
+    metrics = {}
+    assert list(cache.stream(client, metrics, **PARAMS)) == ["1. Histo", "gramme", " des ventes"]
+    assert metrics['cached'] is False
+    assert 0 <= metrics['ttft_seconds'] <= metrics['total_seconds']
+
+    # Le texte complet est partagé avec les appels non diffusés
+    assert cache.create(client, **PARAMS).content[0].text == "1. Histogramme des ventes"
+    metrics = {}
+    assert "".join(cache.stream(client, metrics, **PARAMS)) == "1. Histogramme des ventes"
+    assert metrics['cached'] is True
+    assert len(client.calls) == 1
+
+
+def test_stream_interpretation_reports_errors(monkeypatch):
+    monkeypatch.setattr(agents, 'get_response_cache', lambda: ResponseCache(path=None))
+    client = FakeClient()
+
+    def failing_stream(**params):
+        raise RuntimeError("surcharge")
+
+    client.messages.stream = failing_stream
+    fig = go.Figure(go.Bar(x=['a', 'b'], y=[1, 2]))
+    assert "".join(agents.stream_interpretation(fig, client)) == "Erreur lors du traitement : surcharge"
+
+
+class SlowClient(FakeClient):
+    """ Client dont l'appel reste en cours jusqu'à ``release`` """
+
+    def __init__(self, text="1. Histogramme des ventes", error=None):
+        super().__init__(text)
+        self.started, self.release = threading.Event(), threading.Event()
+        self.error = error
+
+    def _create(self, **params):
+        self.calls.append(params)
+        self.started.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(content=[SimpleNamespace(text=self.text)])
+
+
+def run_concurrently(cache, client, count):
+    results = [None] * count
+
+    def call(i):
+        try:
+            results[i] = cache.create(client, **PARAMS).content[0].text
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    threads[0].start()
+    client.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Les suivants attendent l'appel en cours avant qu'il ne se termine
+    while cache.stats()['coalesced'] < count - 1:
+        time.sleep(0.001)
+    client.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_identical_concurrent_requests_share_one_call():
+    cache, client = ResponseCache(path=None), SlowClient()
+
+    assert run_concurrently(cache, client, 5) == [client.text] * 5
+    assert len(client.calls) == 1
+    assert cache.stats()['coalesced'] == 4 and cache.stats()['misses'] == 1
+
+
+def test_a_failed_shared_call_fails_every_waiter_then_is_retried():
+    cache, client = ResponseCache(path=None), SlowClient(error=RuntimeError("surcharge"))
+
+    results = run_concurrently(cache, client, 3)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(client.calls) == 1
+
+    client.error = None
+    assert cache.create(client, **PARAMS).content[0].text == client.text
+    assert len(client.calls) == 2
+
+
+def test_concurrent_streams_share_one_call():
+    cache, client = ResponseCache(path=None), SlowClient()
+    client.messages.stream = lambda **params: client._create(**params) and FakeStream(["1. Histo", "gramme"])
+    metrics = {}
+    follower = threading.Thread(target=lambda: list(cache.stream(client, metrics, **PARAMS)))
+
+    leader = cache.stream(client, {}, **PARAMS)
+    chunks = [next(leader)]
+    follower.start()
+    while cache.stats()['coalesced'] < 1:
+        time.sleep(0.001)
+    chunks.extend(leader)
+    follower.join(5)
+
+    assert chunks == ["1. Histo", "gramme"]
+    assert metrics['coalesced'] is True and len(client.calls) == 1
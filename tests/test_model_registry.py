@@ -0,0 +1,95 @@
+import threading
+import pytest
+import torch
+from projet_final_data_viz.model_registry import ModelRegistry, model_memory_bytes, READY, FAILED, NOT_LOADED
+
+
+@pytest.fixture
+def counting_loader():
+    """ Loader factice qui compte ses appels et attend un signal avant de terminer """
+    calls = []
+    release = threading.Event()
+
+    def loader(key):
+        calls.append(key)
+        release.wait(5)
+        return "tokenizer", torch.nn.Linear(4, 2)
+
+    loader.calls = calls
+    loader.release = release
+    return loader
+
+
+def test_get_loads_once(counting_loader):
+    registry = ModelRegistry(counting_loader)
+    counting_loader.release.set()
+
+    first = registry.get('pytorch')
+    second = registry.get('pytorch')
+
+    assert first is second
+    assert counting_loader.calls == ['pytorch']
+    assert registry.state('pytorch') == READY
+
+
+def test_preload_in_background(counting_loader):
+    registry = ModelRegistry(counting_loader)
+
+    registry.preload('pytorch')
+    registry.preload('pytorch')
+    assert registry.state('pytorch') == 'loading'
+
+    counting_loader.release.set()
+    _, model = registry.get('pytorch')
+
+    assert counting_loader.calls == ['pytorch']
+    status = registry.status()[0]
+    assert status['state'] == READY
+    assert status['memory_mb'] == pytest.approx(model_memory_bytes(model) / 1024**2)
+    assert model_memory_bytes(model) == (4 * 2 + 2) * 4
+
+
+def test_failed_load_is_reported_and_retried():
+    attempts = []
+
+    def loader(key):
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise OSError("no network")
+        return "tokenizer", torch.nn.Linear(1, 1)
+
+    registry = ModelRegistry(loader)
+    with pytest.raises(OSError):
+        registry.get('pytorch')
+    assert registry.state('pytorch') == FAILED
+    assert registry.status()[0]['error'] == "no network"
+
+    assert registry.get('pytorch')[0] == "tokenizer"
+    assert registry.state('int8') == NOT_LOADED
+
+
+def test_preload_backs_off_after_a_failure():
+    attempts, now = [], [0.0]
+
+    def loader(key):
+        attempts.append(key)
+        raise OSError("no network")
+
+    registry = ModelRegistry(loader, retry_seconds=60, clock=lambda: now[0])
+    with pytest.raises(OSError):
+        registry.get('pytorch')
+
+    # Reruns Streamlit : pas de nouvelle tentative avant le délai
+    assert [registry.preload('pytorch') for _ in range(3)] == [FAILED] * 3
+    assert len(attempts) == 1
+
+    registry.preload('pytorch', force=True)
+    wait_until_done(registry)
+    now[0] = 61
+    registry.preload('pytorch')
+    wait_until_done(registry)
+    assert len(attempts) == 3
+
+
+def wait_until_done(registry):
+    registry._entries['pytorch']['done'].wait(5)
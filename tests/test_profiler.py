@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from unittest import mock
+from projet_final_data_viz.profiler import compute_profile, profile_dataset, hyperloglog_count, hyperloglog_error
+from projet_final_data_viz.agents import df_summary
+
+
+@pytest.fixture
+def sample_dataframe():
+    """ DataFrame avec valeurs manquantes, doublons et types variés """
+    return pd.DataFrame({
+        'col1': [1, 2, np.nan, 4, 4],
+        'col2': ['a', None, 'c', 'd', 'd'],
+        'col3': pd.to_datetime(['2021-01-01', '2022-01-01', '2023-01-01', '2024-01-01', '2024-01-01']),
+    })
+
+
+def test_compute_profile(sample_dataframe):
+    profile = compute_profile(sample_dataframe)
+
+    assert (profile['rows'], profile['columns']) == (5, 3)
+    assert profile['missing'] == 2
+    assert profile['duplicates'] == 1
+    assert (profile['numeric_columns'], profile['categorical_columns'], profile['datetime_columns']) == (1, 1, 1)
+    stats = profile['column_stats'].set_index('Colonne')
+    assert stats.loc['col2', 'Valeurs Uniques'] == 3
+    assert stats.loc['col2', 'Valeurs Non Manquantes'] == 4
+    assert stats.loc['col2', 'Exemples'] == ['a', 'c', 'd', 'd']
+
+
+def test_df_summary_matches_column_scan(sample_dataframe):
+    summary = df_summary(sample_dataframe)
+
+    for _, row in summary.iterrows():
+        column = sample_dataframe[row['Colonne']]
+        assert row['Type de données'] == str(column.dtype)
+        assert row['Nombre de valeurs distinctes'] == column.nunique()
+        assert row['Nombre de valeurs manquantes'] == column.isnull().sum()
+        assert row['Nombre de valeurs non manquantes'] == column.notnull().sum()
+        assert row['Exemples de valeurs'] == [str(v) for v in column.dropna().head(5).tolist()]
+
+
+def test_profile_is_memoized(sample_dataframe):
+    with mock.patch('projet_final_data_viz.profiler.compute_profile', wraps=compute_profile) as compute:
+        assert profile_dataset(sample_dataframe) is profile_dataset(sample_dataframe)
+    assert compute.call_count == 1
+
+
+def test_hyperloglog_count_within_error_bound():
+    values = pd.Series(np.arange(200_000) % 50_000)
+    estimate = hyperloglog_count(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+    assert abs(estimate - 50_000) / 50_000 < hyperloglog_error()
+    assert hyperloglog_count(np.array([], dtype=np.uint64)) == 0
+
+
+def test_approximate_profile_marks_estimates():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'a': rng.integers(0, 1000, 100_000), 'b': rng.choice(['x', 'y', None], 100_000)})
+    exact = compute_profile(df)
+
+    with mock.patch('projet_final_data_viz.profiler.APPROX_ROW_THRESHOLD', 50_000):
+        approx = profile_dataset(df)
+
+    assert approx['approximate'] and not exact['approximate']
+    assert approx['missing'] == exact['missing']
+    assert abs(approx['duplicates'] - exact['duplicates']) <= approx['estimates']['duplicates']['margin']
+    unique = approx['column_stats']['Valeurs Uniques'].to_numpy()
+    assert np.all(np.abs(unique - exact['column_stats']['Valeurs Uniques'].to_numpy()) <= 0.05 * unique + 1)
+    assert set(approx['column_stats'].loc[1, 'Exemples']) <= {'x', 'y'}
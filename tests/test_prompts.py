@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from projet_final_data_viz.prompts import (
+    PROMPT_CACHE_MIN_TOKENS, build_dataset_context, estimate_tokens, plotly_code_request, prompt_tokens,
+    suggest_graphs_request
+)
+
+
+def wide_dataframe(columns=120, rows=500):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({f"mesure_{i}": rng.random(rows) for i in range(columns)})
+    df['identifiant'] = [f"id-{i}" for i in range(rows)]
+    df['ville'] = rng.choice(['Paris', 'Lyon', 'Nantes'], rows)
+    return df
+
+
+def test_dataset_context_respects_budget_and_relevance():
+    df = wide_dataframe()
+    context = build_dataset_context(df, budget=400)
+
+    assert estimate_tokens(context) <= 400
+    # Colonne de regroupement détaillée, identifiant seulement nommé (ou omis)
+    assert "- ville (object)" in context
+    assert "- identifiant" not in context
+    assert "Autres colonnes :" in context
+
+
+def test_small_dataset_context_is_complete():
+    df = pd.DataFrame({'prix': [1.5, 2.0, None], 'produit': ['a', 'b', 'c']})
+    context = build_dataset_context(df)
+
+    assert "- prix (float64) · 2 distinctes · 33% manquantes · de 1.5 à 2" in context
+    assert "Autres colonnes" not in context
+    assert "Premières lignes (CSV) :\nprix,produit\n1.5,a" in context
+
+
+def test_requests_share_a_cached_dataset_prefix():
+    df = wide_dataframe(columns=200)
+    suggestions = suggest_graphs_request(df)
+    first = plotly_code_request(df, "Histogramme des prix")
+    second = plotly_code_request(df, "Barres par ville")
+
+    assert suggestions['system'][0] == first['system'][0] == second['system'][0]
+    assert first['system'] == second['system']
+    # Un seul point de cache, en fin de système, quand le préfixe dépasse le minimum d'Anthropic
+    assert prompt_tokens({'system': first['system'], 'messages': []}) >= PROMPT_CACHE_MIN_TOKENS
+    assert first['system'][-1]['cache_control'] == {'type': 'ephemeral'}
+    assert not any('cache_control' in block for block in first['system'][:-1])
+    assert "Barres par ville" in second['messages'][0]['content']
+    assert prompt_tokens(first) < estimate_tokens(df.head(5).to_string() + df.to_string())
+
+
+def test_short_prefixes_are_not_marked_for_caching():
+    df = pd.DataFrame({'prix': [1.5, 2.0], 'produit': ['a', 'b']})
+
+    for params in (suggest_graphs_request(df), plotly_code_request(df, "Barres")):
+        assert not any('cache_control' in block for block in params['system'])
@@ -0,0 +1,68 @@
+from unittest import mock
+import pandas as pd
+from projet_final_data_viz import tapas_code
+from projet_final_data_viz.query_cache import QueryCache
+
+
+def counting(result):
+    calls = []
+
+    def compute(question, df):
+        calls.append(question)
+        return result
+
+    return compute, calls
+
+
+def test_repeated_questions_are_served_from_the_cache():
+    cache = QueryCache()
+    compute, calls = counting({'type': 'direct', 'content': "• Paris", 'total': 1})
+    df = pd.DataFrame({'city': ['Paris']})
+
+    first = cache.answer("Show the city", df, 'abc', compute, engine=1)
+    first['content'] = "modifié"
+    second = cache.answer("  show THE city ", df, 'abc', compute, engine=1)
+
+    assert second['content'] == "• Paris"
+    assert len(calls) == 1
+    cache.answer("Show the city", df, 'autre-fichier', compute, engine=1)
+    cache.answer("Show the city", df, 'abc', compute, engine=2)
+    assert len(calls) == 3
+
+
+def test_invalid_questions_are_not_cached_and_old_answers_are_evicted():
+    cache = QueryCache(max_items=2)
+    compute, calls = counting(None)
+    df = pd.DataFrame()
+
+    cache.answer(" ", df, 'abc', compute, engine=1)
+    cache.answer(" ", df, 'abc', compute, engine=1)
+    assert len(calls) == 2
+
+    for question in ("a", "b", "c"):
+        cache.answer(question, df, 'abc', lambda question, df: question, engine=1)
+    assert cache.stats()['items'] == 2
+
+
+def test_answer_question_skips_the_engine_on_reruns():
+    cache = QueryCache()
+    df = pd.DataFrame({'Category': ['A', 'B'], 'Sales': [100, 250]})
+
+    assert tapas_code.answer_question("What is the sum of Sales?", df, 'abc', cache=cache) == "350"
+    with mock.patch.object(tapas_code, '_process_question', return_value=("350", True)) as process_question:
+        assert tapas_code.answer_question("What is the sum of Sales?", df, 'abc', cache=cache) == "350"
+        tapas_code.answer_question("What is the sum of Sales?", df, 'abc', cache=cache, max_rows=20)
+
+    assert process_question.call_count == 1
+
+
+def test_degraded_tapas_answers_are_not_cached():
+    cache = QueryCache()
+    df = pd.DataFrame({'City': ['Paris', 'Lyon'], 'Country': ['France', 'France']})
+
+    with mock.patch.object(tapas_code, 'load_tapas_model', return_value=(None, None)), \
+            mock.patch.object(tapas_code, 'get_tapas_client', return_value=None):
+        answer = tapas_code.answer_question("which city is the capital", df, 'abc', cache=cache, workers=0)
+
+    assert answer == "Could not find an answer in the table."
+    assert cache.stats()['items'] == 0
@@ -0,0 +1,86 @@
+from unittest import mock
+import pandas as pd
+import pytest
+from projet_final_data_viz import tapas_code
+from projet_final_data_viz.query_planner import answer_path_stats, execute_plan, plan_question
+
+
+@pytest.fixture
+def orders():
+    return pd.DataFrame({
+        'order_date': pd.to_datetime(['2020-12-30', '2021-01-15', '2021-03-02', '2021-07-20', '2022-01-05']),
+        'city': ['Paris', 'Lyon', 'Paris', 'New York', 'Lyon'],
+        'Category': ['A', 'B', 'A', 'B', 'A'],
+        'sales': [100.0, 250.0, 50.0, 400.0, 75.0],
+        'customer': ['c1', 'c2', 'c1', 'c3', 'c4'],
+    })
+
+
+def answer(question, df):
+    plan = plan_question(question, df)
+    assert plan is not None, question
+    return tapas_code.format_answers(execute_plan(plan, df))
+
+
+def test_filters_dates_and_values(orders):
+    assert answer("total sales in Paris", orders) == "150"
+    assert answer("how many orders in 2021", orders) == "3"
+    assert answer("sum of sales where sales > 90 in lyon", orders) == "250"
+    assert answer("average sales between 2021-01-01 and 2021-06-30", orders) == "150.00"
+    assert answer("total sales for category a", orders) == "225"
+    assert plan_question("total sales for category a", orders)['filters'] == [('Category', 'in', ['A'])]
+
+
+def test_group_bys_top_k_and_distinct_counts(orders):
+    assert answer("count of sales by city and category", orders) == (
+        "Lyon / A: 1\nLyon / B: 1\nNew York / B: 1\nParis / A: 2"
+    )
+    assert answer("top 2 city by total sales", orders) == "New York: 400.00\nLyon: 325.00"
+    assert answer("which city has the lowest average sales", orders) == "Paris: 75.00"
+    assert answer("how many distinct customers", orders) == "4"
+    assert answer("top 2 rows by sales", orders) == {
+        'type': 'direct', 'content': "• c3: 400.00\n• c2: 250.00", 'total': 2
+    }
+
+
+def test_unexplained_questions_are_left_to_tapas(orders):
+    assert plan_question("what is the customer of the 3rd order", orders) is None
+    assert plan_question("total sales in 1999 of store 12", orders) is None
+    assert plan_question("which customer came back", orders) is None
+
+
+def test_unknown_subjects_are_left_to_tapas():
+    df = pd.DataFrame({'country': ['FR', 'US', 'FR'], 'customer': ['Ann', 'Bob', 'Dan'], 'sales': [100.0, 250.0, 300.0]})
+
+    assert answer("top 2 countries by sales", df) == "FR: 400.00\nUS: 250.00"
+    assert answer("which country has the highest sales", df) == "FR: 300.00"
+    assert answer("which country has the highest total sales", df) == "FR: 400.00"
+    assert plan_question("top 2 products by sales", df) is None
+    assert plan_question("which region has the highest sales", df) is None
+
+
+def test_superlatives_text_measures_and_unknown_words():
+    df = pd.DataFrame({
+        'product': ['apple', 'pear', 'apple', 'kiwi', 'pear', 'apple'],
+        'city': ['Paris', 'Lyon', 'Lyon', 'Paris', 'Nice', 'Nice'],
+        'price': [6.0, 3.5, 5.0, 10.0, 1.0, 4.0],
+        'quantity': [10, 5, 3, 1, 7, 2],
+    })
+
+    assert answer("Which product has the highest price?", df) == "kiwi: $10.00"
+    assert answer("What is the city with the lowest quantity?", df) == "Paris: 1"
+    assert answer("count of product by city", df) == "Lyon: 2\nNice: 2\nParis: 2"
+    assert answer("which city has the most products", df) == "Lyon: 2"
+    assert plan_question("average price of products under 5", df) is None
+    assert plan_question("How many apples were sold?", df) is None
+
+
+def test_process_question_logs_the_answering_path(orders):
+    with mock.patch('projet_final_data_viz.query_planner.logger') as logger, \
+            mock.patch.object(tapas_code, 'chunk_answers', return_value=[['c1']]), \
+            mock.patch.object(tapas_code, 'load_tapas_model', return_value=(None, None)):
+        assert tapas_code.process_question("What is the sum of sales?", orders) == "875"
+        tapas_code.process_question("which customer came back", orders)
+
+    assert [call.args[1] for call in logger.info.call_args_list] == ['planner', 'tapas']
+    assert answer_path_stats()['tapas']['questions'] >= 1
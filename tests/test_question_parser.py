@@ -0,0 +1,52 @@
+import pandas as pd
+from projet_final_data_viz.question_parser import ColumnIndex, get_column_index
+from projet_final_data_viz.tapas_code import detect_question_type
+
+
+def test_longest_column_name_wins_over_prefixes():
+    index = ColumnIndex(['Sale', 'Sales', 'unit_price', 'Region'])
+
+    assert index.parse("What is the total Sales?") == ('aggregation', {'operation': 'sum', 'column': 'Sales'})
+    assert index.parse("average unit price") == ('aggregation', {'operation': 'mean', 'column': 'unit_price'})
+    assert index.parse("sum of sales by region") == (
+        'group_aggregation', {'operation': 'sum', 'column': 'Sales', 'group_by': 'Region'}
+    )
+
+
+def test_group_words_are_matched_fuzzily():
+    index = ColumnIndex(['Revenue', 'Country'])
+
+    assert index.parse("mean of revenu by countrys") == (
+        'group_aggregation', {'operation': 'mean', 'column': 'Revenue', 'group_by': 'Country'}
+    )
+    assert index.match("profit") is None
+
+
+def test_plural_column_names():
+    index = ColumnIndex(['Country', 'Box', 'sales'])
+
+    assert index.find_in(('top', 'countries')) == 'Country'
+    assert index.find_in(('boxes',)) == 'Box'
+    assert index.parse("sum of sales by countries") == (
+        'group_aggregation', {'operation': 'sum', 'column': 'sales', 'group_by': 'Country'}
+    )
+
+
+def test_keywords_match_whole_words_only():
+    index = ColumnIndex(['Country', 'Minutes'])
+
+    assert index.parse("Show the Country values") == ('column', 'Country')
+    assert index.parse("Minutes") == ('default', None)
+    assert index.parse("lowest minutes") == ('aggregation', {'operation': 'min', 'column': 'Minutes'})
+
+
+def test_parses_are_cached_per_question_and_index_per_dataset():
+    df = pd.DataFrame({'Category': ['A'], 'Sales': [1]})
+    index = get_column_index(df)
+
+    first = detect_question_type("What is the  sum of Sales?", df)
+    first[1]['column'] = 'modifié'
+
+    assert get_column_index(df) is index
+    assert detect_question_type("what is the sum of sales?", df) == ('aggregation', {'operation': 'sum', 'column': 'Sales'})
+    assert index._parses.hits == 1
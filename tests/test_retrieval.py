@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+from projet_final_data_viz.retrieval import ChunkIndex, get_chunk_index, tokenize
+
+
+@pytest.fixture
+def sample_dataframe():
+    """ 5 chunks de 10 lignes, 'Zurich' n'apparaît que dans le chunk 3 """
+    cities = ['Paris'] * 50
+    cities[31:33] = ['Zurich', 'Zurich']
+    return pd.DataFrame({'city': cities, 'sales': range(50)})
+
+
+def test_tokenize():
+    assert tokenize("Who sold in New-York?") == ['who', 'sold', 'in', 'new', 'york']
+
+
+def test_candidate_chunks(sample_dataframe):
+    index = ChunkIndex(sample_dataframe, max_rows=10)
+
+    assert index.n_chunks == 5
+    assert index.candidate_chunks("What are the sales in Zurich?") == [3]
+    assert index.candidate_chunks("Which rows mention Paris or Zurich?", top_k=5) == [0, 1, 2, 3, 4]
+    # Aucun terme présent dans les cellules : analyse complète
+    assert index.candidate_chunks("What is the best month?") is None
+
+
+def test_get_chunk_index_is_memoized(sample_dataframe):
+    assert get_chunk_index(sample_dataframe, 10) is get_chunk_index(sample_dataframe, 10)
+    assert get_chunk_index(sample_dataframe, 10) is not get_chunk_index(sample_dataframe.copy(), 10)
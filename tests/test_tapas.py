@@ -2,10 +2,14 @@ import pytest
 import pandas as pd
 import sys
 import os
+from unittest import mock
 from projet_final_data_viz.tapas_code import (
     load_tapas_model, validate_question, process_aggregation,
-    detect_question_type
+    detect_question_type, memory_capped_batch_size, process_question,
+    parallel_chunk_answers, chunk_answers, split_dataframe, fill_missing,
+    render_chunk, iter_string_chunks, coordinate_answers
 )
+from tests.conftest import load_tiny_tapas
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 
@@ -34,6 +38,49 @@ def test_process_aggregation():
     assert process_aggregation(df, 'max', 'Sales') == "250"
 
 
+def test_fill_missing_handles_categories():
+    df = pd.DataFrame({'city': pd.Categorical(['Paris', None]), 'sales': [1.0, None]})
+
+    filled = fill_missing(df)
+
+    assert filled['city'].tolist() == ['Paris', '']
+    assert filled['sales'].tolist() == [1.0, '']
+    assert df['city'].isna().sum() == 1
+
+
+def test_render_chunk_matches_fill_missing():
+    df = pd.DataFrame({
+        'city': pd.Categorical(['Paris', None, 'Lyon']),
+        'sales': [1.0, None, 3.5],
+        'units': pd.array([1, None, 3], dtype='Int64')
+    }, index=[10, 11, 12])
+
+    chunk = render_chunk(df)
+
+    assert chunk.index.tolist() == [0, 1, 2]
+    assert chunk.to_numpy().tolist() == [['Paris', '1.0', '1'], ['', '', ''], ['Lyon', '3.5', '3']]
+    assert chunk[['city', 'sales']].equals(fill_missing(df[['city', 'sales']]).astype(str).reset_index(drop=True))
+
+
+def test_iter_string_chunks_follows_split_dataframe():
+    df = pd.DataFrame({'n': range(120)})
+
+    chunks = iter_string_chunks(df, max_rows=50)
+
+    assert next(chunks)['n'].tolist() == [str(n) for n in range(50)]
+    assert [len(chunk) for chunk in chunks] == [50, 20]
+    windowed = list(iter_string_chunks(df, max_rows=50, window=2))
+    assert [chunk.index.tolist() for chunk in windowed] == [list(range(50)), list(range(50)), list(range(20))]
+    assert windowed[2]['n'].tolist() == [str(n) for n in range(100, 120)]
+
+
+def test_coordinate_answers_reads_cells_in_bulk():
+    chunk = render_chunk(pd.DataFrame({'name': ['a', ' ', 'c'], 'city': ['paris', None, ' berlin ']}))
+
+    assert coordinate_answers(chunk, [(0, 1), (1, 0), (1, 1), (2, 1), (2, 0), (5, 0)]) == ['paris', 'berlin', 'c']
+    assert coordinate_answers(chunk, []) == []
+
+
 def test_detect_question_type():
     df = pd.DataFrame({
         'Category': ['A', 'B', 'C'],
@@ -41,7 +88,57 @@ def test_detect_question_type():
     })
     
     assert detect_question_type("What is the sum of Sales?", df) == ('aggregation', {'operation': 'sum', 'column': 'Sales'})
-    assert detect_question_type("Show all Categories", df) == ('default', None)  # Expecting 'default', None
+    assert detect_question_type("Show all Categories", df) == ('column', 'Category')  # pluriel en -ies reconnu
+    assert detect_question_type("Show all regions", df) == ('default', None)
+
+
+def test_memory_capped_batch_size():
+    assert memory_capped_batch_size(0) == 1
+    assert memory_capped_batch_size(4) <= 4
+    assert memory_capped_batch_size(10_000) <= 64
+
+
+def test_process_question_batched_matches_sequential(tiny_tapas):
+    df = pd.DataFrame({
+        'name': ['a'] * 50 + ['b'] * 50 + ['c'] * 20,
+        'city': ['paris'] * 50 + ['london'] * 50 + ['berlin'] * 20
+    })
+    with mock.patch('projet_final_data_viz.tapas_code.load_tapas_model', return_value=tiny_tapas):
+        sequential = process_question("what is the city", df, max_rows=50, batch_size=1)
+        batched = process_question("what is the city", df, max_rows=50, batch_size=8)
+
+    assert batched == sequential
+    assert batched['total'] == 3
+
+
+def test_process_question_prunes_chunks(tiny_tapas):
+    df = pd.DataFrame({
+        'name': ['a'] * 50 + ['b'] * 50 + ['c'] * 20,
+        'city': ['paris'] * 50 + ['london'] * 50 + ['berlin'] * 20
+    })
+    with mock.patch('projet_final_data_viz.tapas_code.load_tapas_model', return_value=tiny_tapas), \
+            mock.patch('projet_final_data_viz.tapas_code.predict_answer_coordinates', return_value=[[(0, 1)]]) as predict:
+        result = process_question("what is the name in berlin", df, max_rows=50)
+
+    tables = predict.call_args.args[2]
+    assert len(tables) == 1
+    assert tables[0]['city'].tolist() == ['berlin'] * 20
+    assert result['content'] == "• berlin"
+
+
+def test_parallel_chunk_answers_keeps_chunk_order(tiny_tapas):
+    df = pd.DataFrame({
+        'name': ['a'] * 50 + ['b'] * 50 + ['c'] * 20,
+        'city': ['paris'] * 50 + ['london'] * 50 + ['berlin'] * 20
+    }).astype(str)
+    tokenizer, model = tiny_tapas
+    expected = chunk_answers(tokenizer, model, split_dataframe(df, 50), "what is the city")
+
+    parallel = parallel_chunk_answers(df, "what is the city", workers=2, max_rows=50, batch_size=1, loader=load_tiny_tapas)
+
+    assert parallel == expected
+    assert len(parallel) == 3
+    assert len({answers[0] for answers in parallel}) == 3
 
 
 if __name__ == "__main__":
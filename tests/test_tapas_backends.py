@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from projet_final_data_viz.tapas_backends import apply_backend, onnx_export_path
+from projet_final_data_viz.tapas_code import predict_answer_coordinates
+from tests.conftest import load_tiny_tapas
+
+REGRESSION_TABLES = [
+    pd.DataFrame({'name': ['a', 'b', 'c'], 'city': ['paris', 'london', 'berlin']}),
+    pd.DataFrame({'name': ['c', 'a'], 'city': ['london', 'paris']}),
+]
+REGRESSION_QUESTIONS = ["what is the city", "who is in paris"]
+
+
+def regression_coordinates(tokenizer, model):
+    return [predict_answer_coordinates(tokenizer, model, REGRESSION_TABLES, question) for question in REGRESSION_QUESTIONS]
+
+
+def test_unknown_backend(tiny_tapas):
+    _, model = tiny_tapas
+    with pytest.raises(ValueError):
+        apply_backend(model, 'tensorrt')
+
+
+def test_int8_backend_runs(tiny_tapas):
+    tokenizer, model = tiny_tapas
+    quantized = apply_backend(load_tiny_tapas()[1], 'int8')
+
+    coordinates = regression_coordinates(tokenizer, quantized)
+
+    assert [len(table_coords) for table_coords in coordinates] == [2, 2]
+    assert all(coords for table_coords in coordinates for coords in table_coords)
+
+
+def test_onnx_backend_matches_pytorch(tiny_tapas, tmp_path):
+    pytest.importorskip("onnxruntime")
+    tokenizer, model = tiny_tapas
+    expected = regression_coordinates(tokenizer, model)
+
+    onnx_model = apply_backend(load_tiny_tapas()[1], 'onnx', cache_dir=tmp_path)
+
+    assert onnx_export_path(onnx_model, tmp_path).exists()
+    assert regression_coordinates(tokenizer, onnx_model) == expected
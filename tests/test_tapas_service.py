@@ -0,0 +1,139 @@
+import os
+import socket
+import threading
+import time
+from unittest import mock
+import pandas as pd
+import pytest
+from projet_final_data_viz import tapas_code
+from projet_final_data_viz.tapas_client import TapasClient, TapasServiceBusy
+from projet_final_data_viz.tapas_code import chunk_answers, process_question, split_dataframe
+from projet_final_data_viz.tapas_server import TapasService
+from tests.conftest import load_tiny_tapas
+
+AUTHKEY = b"test-secret"
+DF = pd.DataFrame({
+    'name': ['a'] * 50 + ['b'] * 50 + ['c'] * 20,
+    'city': ['paris'] * 50 + ['london'] * 50 + ['berlin'] * 20
+}).astype(str)
+
+
+@pytest.fixture
+def start_service(tmp_path):
+    services = []
+
+    def start(loader=None, **options):
+        service = TapasService(("127.0.0.1", 0), authkey=AUTHKEY,
+                               loader=loader or (lambda backend: load_tiny_tapas(tmp_path)), **options)
+        threading.Thread(target=service.serve_forever, daemon=True).start()
+        services.append(service)
+        return service, TapasClient(service.address, authkey=AUTHKEY, timeout=30)
+
+    yield start
+    for service in services:
+        service.shutdown()
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_service_answers_like_local_inference(start_service, tiny_tapas):
+    service, client = start_service()
+    expected = chunk_answers(*tiny_tapas, split_dataframe(DF, 50), "what is the city")
+
+    assert client.chunk_answers(DF, "what is the city", max_rows=50) == expected
+    assert client.chunk_answers(DF, "what is the name", max_rows=50) == chunk_answers(
+        *tiny_tapas, split_dataframe(DF, 50), "what is the name")
+    assert client.stats()['questions'] == 2
+
+
+def test_concurrent_questions_share_batches(start_service):
+    service, client = start_service(batch_wait=0.5)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda q=question: results.__setitem__(q, client.chunk_answers(DF, q, max_rows=50)))
+        for question in ("what is the city", "what is the name", "what is the city in paris")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    stats = client.stats()
+    assert len(results) == 3 and all(len(answers) == 3 for answers in results.values())
+    assert stats['questions'] == 3 and stats['batches'] < 3 and stats['chunks'] == 9
+
+
+def test_full_queue_rejects_questions(start_service, tmp_path):
+    gate = threading.Event()
+
+    def slow_loader(backend):
+        gate.wait(10)
+        return load_tiny_tapas(tmp_path)
+
+    service, client = start_service(loader=slow_loader, max_queue=1)
+    # La première question occupe le thread d'inférence, la deuxième remplit la file
+    first = threading.Thread(target=client.chunk_answers, args=(DF, "what is the city"))
+    first.start()
+    wait_for(lambda: service.stats()['questions'] == 1 and service.stats()['queued'] == 0)
+    second = threading.Thread(target=client.chunk_answers, args=(DF, "what is the name"))
+    second.start()
+    wait_for(lambda: service.stats()['queued'] == 1)
+
+    with pytest.raises(TapasServiceBusy):
+        client.chunk_answers(DF, "what is the city in berlin")
+    gate.set()
+    first.join(30)
+    second.join(30)
+    assert service.stats()['rejected'] == 1
+
+
+def test_process_question_falls_back_when_service_is_down(tiny_tapas):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        address = probe.getsockname()
+    client = TapasClient(address, authkey=AUTHKEY)
+    with mock.patch.object(tapas_code, 'get_tapas_client', return_value=client), \
+            mock.patch.object(tapas_code, 'load_tapas_model', return_value=tiny_tapas):
+        answer = process_question("what is the city", DF, max_rows=50, top_k_chunks=0)
+
+    assert answer['total'] == 3
+
+
+def test_busy_service_gets_no_local_inference():
+    client = mock.Mock(chunk_answers=mock.Mock(side_effect=TapasServiceBusy("queue is full")))
+    with mock.patch.object(tapas_code, 'get_tapas_client', return_value=client), \
+            mock.patch.object(tapas_code, 'load_tapas_model') as load:
+        assert process_question("what is the city", DF, max_rows=50) is None
+
+    load.assert_not_called()
+
+
+def test_service_requires_a_secret_key(tmp_path):
+    with pytest.raises(ValueError):
+        TapasService(("127.0.0.1", 0), authkey=b"")
+    with pytest.raises(ValueError):
+        TapasClient(("127.0.0.1", 8765), authkey=b"")
+
+    socket_path = str(tmp_path / "tapas.sock")
+    service = TapasService(socket_path, authkey=AUTHKEY, loader=lambda backend: None)
+    try:
+        assert os.stat(socket_path).st_mode & 0o777 == 0o600
+    finally:
+        service._listener.close()
+
+
+def test_service_receives_the_table_window_by_window():
+    client = mock.Mock(chunk_answers=mock.Mock(side_effect=lambda window, *args: [[]] * -(-len(window) // 50)))
+    df = pd.DataFrame({'n': range(230)})
+    with mock.patch.object(tapas_code, 'get_tapas_client', return_value=client), \
+            mock.patch.object(tapas_code, 'WINDOW_CHUNKS', 2):
+        assert process_question("what is the city", df, max_rows=50, top_k_chunks=0) is not None
+
+    windows = [call.args[0] for call in client.chunk_answers.call_args_list]
+    assert [len(window) for window in windows] == [100, 100, 30]
+    assert windows[1]['n'].tolist()[0] == '100' and windows[1].index[0] == 0
@@ -1,8 +1,8 @@
-import pandas as pd
+from src.projet_final_data_viz.ingestion import load_csv
 
 def load_data(file):
-    """Charge un fichier CSV en DataFrame Pandas."""
-    return pd.read_csv(file)
+    """Charge un fichier CSV en DataFrame Pandas (moteur pyarrow, types compacts)."""
+    return load_csv(file)[0]
 
 def get_columns_summary(df):
     """Retourne un résumé des colonnes du dataset."""